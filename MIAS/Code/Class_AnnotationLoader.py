@@ -0,0 +1,267 @@
+# ? Class for loading the Mini-MIAS annotations.
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+from typing import Optional
+
+from Class_CropWorker import CropWorker
+
+class AnnotationLoader:
+    """
+    A class used to load the Mini-MIAS annotations into a typed dataframe, once.
+
+    Both the raw 'Info.txt' of the database (columns separated by spaces or commas,
+    NORM rows without SEVERITY, X, Y and RADIUS, notes such as '*NOTE 3*' instead of
+    coordinates) and 'Info.csv' are read. The columns are encoded once:
+
+    REFNUM
+        str.
+    BG, CLASS
+        Categorical with the fixed categories of the database (Backgrounds, Classes).
+    SEVERITY
+        int8 crop label (CropWorker.Benign, CropWorker.Malignant, CropWorker.Normal).
+    X, Y, RADIUS
+        float32, NaN when the row has no coordinates.
+
+    The encoded columns are cached as a '.npz' file next to the source (or in a
+    cache folder) together with the size and modification time of the source, so
+    later runs skip the parsing until the source changes. Frames loaded in this
+    process are also kept in memory.
+
+    Methods
+    -------
+    load(Path_file)
+        Returns the annotations of a file, from the caches when it did not change.
+    parse(Path_file)
+        Returns the annotations of a file, always parsing it.
+
+    Example
+    -------
+    Dataframe = AnnotationLoader().load('MIAS/Info.txt');
+    Malignant = Dataframe[Dataframe['SEVERITY'] == CropWorker.Malignant];
+    """
+
+    Columns = ('REFNUM', 'BG', 'CLASS', 'SEVERITY', 'X', 'Y', 'RADIUS');
+
+    # * Categories of the database
+    Backgrounds = ('F', 'G', 'D');
+    Classes = ('CALC', 'CIRC', 'SPIC', 'MISC', 'ARCH', 'ASYM', 'NORM');
+    Severity_letters = {'B': CropWorker.Benign, 'M': CropWorker.Malignant};
+
+    # * Bumped when the layout of the cache files changes
+    Cache_version = 1;
+
+    # * Frames loaded in this process: (path, size, mtime) -> dataframe
+    _Cache: dict = {};
+    _Cache_lock = threading.Lock();
+
+    # * Initializing (Constructor)
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters
+        ----------
+        cache : bool
+            Keep the parsed annotations as a '.npz' file between runs (default is True).
+        cache_folder : str
+            Folder of the '.npz' files (default is None, the folder of the source).
+        """
+
+        self.Cache: bool = kwargs.get('cache', True);
+        self.Cache_folder: Optional[str] = kwargs.get('cache_folder', None);
+
+        if self.Cache and self.Cache_folder is not None:
+            os.makedirs(self.Cache_folder, exist_ok = True);
+
+    # * Class description
+    def __str__(self) -> str:
+        """
+        Return a string description of the AnnotationLoader object.
+
+        Returns:
+        ----------
+        str
+            A string description of the AnnotationLoader object.
+        """
+
+        return f'''{self.__class__.__name__}:A class used to load the Mini-MIAS annotations ({'cached' if self.Cache else 'not cached'}).''';
+
+    # * Rows of the raw text, padded to the seven columns
+    @staticmethod
+    def __read_rows(Path_file: str) -> list[list[str]]:
+
+        Rows = [];
+
+        with open(Path_file, 'r') as File:
+            for Line in File:
+                Line = Line.strip();
+
+                if not Line:
+                    continue;
+
+                Fields = [Field.strip() for Field in Line.split(',')] if ',' in Line else Line.split();
+
+                # * Header line
+                if Fields[0].upper() == AnnotationLoader.Columns[0]:
+                    continue;
+
+                Fields = (Fields + [''] * len(AnnotationLoader.Columns))[:len(AnnotationLoader.Columns)];
+                Rows.append(Fields);
+
+        return Rows
+
+    # * Categorical column with the fixed categories, unknown values are an error
+    @staticmethod
+    def __categorical(Values: pd.Series, Categories: tuple, Name: str, Path_file: str) -> pd.Categorical:
+
+        Column = pd.Categorical(Values.str.strip().str.upper(), categories = Categories);
+        Unknown = Values[(Column.codes < 0) & Values.notna().to_numpy()].unique();
+
+        if len(Unknown) > 0:
+            raise ValueError(f"{Name} {list(Unknown)} of {Path_file} incompatible, it must be: {Categories}");
+
+        return Column
+
+    # ? Parse an annotation file.
+    @staticmethod
+    def parse(Path_file: str) -> pd.DataFrame:
+        """
+        Parse an annotation file without using the caches.
+
+        Parameters
+        ----------
+        Path_file : str
+            The 'Info.txt' or 'Info.csv' file.
+
+        Returns
+        -------
+        pd.DataFrame
+            The typed annotations, one row per lesion (see the class description).
+
+        Raises
+        ------
+        ValueError
+            If a BG or CLASS value is not one of the database.
+        """
+
+        if Path_file.lower().endswith('.csv'):
+            Raw = pd.read_csv(Path_file, dtype = {'REFNUM': str, 'BG': str, 'CLASS': str, 'SEVERITY': str}, usecols = list(AnnotationLoader.Columns));
+        else:
+            Raw = pd.DataFrame(AnnotationLoader.__read_rows(Path_file), columns = list(AnnotationLoader.Columns));
+
+        # * Notes and blanks become NaN
+        Numbers = Raw[['X', 'Y', 'RADIUS']].apply(pd.to_numeric, errors = 'coerce').astype(np.float32);
+
+        Severity = Raw['SEVERITY'].fillna('').str.strip().str.upper().map(AnnotationLoader.Severity_letters);
+
+        return pd.DataFrame({
+            'REFNUM': Raw['REFNUM'].str.strip().to_numpy(dtype = object),
+            'BG': AnnotationLoader.__categorical(Raw['BG'], AnnotationLoader.Backgrounds, 'BG', Path_file),
+            'CLASS': AnnotationLoader.__categorical(Raw['CLASS'], AnnotationLoader.Classes, 'CLASS', Path_file),
+            'SEVERITY': Severity.fillna(CropWorker.Normal).to_numpy(dtype = np.int8),
+            'X': Numbers['X'].to_numpy(),
+            'Y': Numbers['Y'].to_numpy(),
+            'RADIUS': Numbers['RADIUS'].to_numpy(),
+        })
+
+    # * Cache file of a source
+    def __cache_file(self, Path_file: str) -> str:
+
+        Folder = self.Cache_folder if self.Cache_folder is not None else os.path.dirname(os.path.abspath(Path_file));
+
+        return os.path.join(Folder, f"{os.path.basename(Path_file)}.npz")
+
+    # * Annotations of a cache file, None when it is missing or stale
+    def __read_cache(self, Cache_file: str, Stat: os.stat_result) -> Optional[pd.DataFrame]:
+
+        if not os.path.isfile(Cache_file):
+            return None
+
+        try:
+            with np.load(Cache_file, allow_pickle = False) as Data:
+                Source = Data['Source'];
+
+                if int(Data['Version']) != self.Cache_version or int(Source[0]) != Stat.st_size or int(Source[1]) != Stat.st_mtime_ns:
+                    return None
+
+                return pd.DataFrame({
+                    'REFNUM': Data['REFNUM'].astype(object),
+                    'BG': pd.Categorical.from_codes(Data['BG'], categories = self.Backgrounds),
+                    'CLASS': pd.Categorical.from_codes(Data['CLASS'], categories = self.Classes),
+                    'SEVERITY': Data['SEVERITY'],
+                    'X': Data['X'],
+                    'Y': Data['Y'],
+                    'RADIUS': Data['RADIUS'],
+                })
+
+        except (OSError, KeyError, ValueError):
+            return None
+
+    # * Write the encoded columns under a temporary name and move them into place
+    def __write_cache(self, Cache_file: str, Stat: os.stat_result, Dataframe: pd.DataFrame) -> None:
+
+        with open(Cache_file + '.tmp', 'wb') as File:
+            np.savez(
+                File,
+                Version = np.int64(self.Cache_version),
+                Source = np.array([Stat.st_size, Stat.st_mtime_ns], dtype = np.int64),
+                REFNUM = Dataframe['REFNUM'].to_numpy(dtype = str),
+                BG = Dataframe['BG'].cat.codes.to_numpy(),
+                CLASS = Dataframe['CLASS'].cat.codes.to_numpy(),
+                SEVERITY = Dataframe['SEVERITY'].to_numpy(),
+                X = Dataframe['X'].to_numpy(),
+                Y = Dataframe['Y'].to_numpy(),
+                RADIUS = Dataframe['RADIUS'].to_numpy(),
+            );
+
+        os.replace(Cache_file + '.tmp', Cache_file);
+
+    # ? Load an annotation file.
+    def load(self, Path_file: str) -> pd.DataFrame:
+        """
+        Return the annotations of a file, parsing it only when it changed since the last load.
+
+        Parameters
+        ----------
+        Path_file : str
+            The 'Info.txt' or 'Info.csv' file.
+
+        Returns
+        -------
+        pd.DataFrame
+            A copy of the typed annotations (see the class description).
+
+        Raises
+        ------
+        FileNotFoundError
+            If the file does not exist.
+        ValueError
+            If a BG or CLASS value is not one of the database.
+        """
+
+        Stat = os.stat(Path_file);
+        Key = (os.path.abspath(Path_file), Stat.st_size, Stat.st_mtime_ns);
+
+        with AnnotationLoader._Cache_lock:
+            Dataframe = AnnotationLoader._Cache.get(Key);
+
+        if Dataframe is not None:
+            return Dataframe.copy()
+
+        Cache_file = self.__cache_file(Path_file) if self.Cache else None;
+        Dataframe = self.__read_cache(Cache_file, Stat) if Cache_file is not None else None;
+
+        if Dataframe is None:
+            Dataframe = self.parse(Path_file);
+
+            if Cache_file is not None:
+                try:
+                    self.__write_cache(Cache_file, Stat, Dataframe);
+                except OSError:
+                    pass;
+
+        with AnnotationLoader._Cache_lock:
+            AnnotationLoader._Cache[Key] = Dataframe;
+
+        return Dataframe.copy()
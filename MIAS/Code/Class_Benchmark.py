@@ -0,0 +1,360 @@
+# ? Class for benchmarking the preprocessing pipeline.
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+try:
+    import resource
+except ImportError:
+    resource = None;
+
+from Class_SyntheticMIAS import SyntheticMIAS
+from Class_ImageSorter import ImageSorter
+from Class_ChangeFormat import ChangeFormat
+from Class_CropMias import CropImages
+from Class_EventReporter import EventReporter
+from Class_Data import Data
+
+class Benchmark:
+    """
+    A class used to measure the throughput, latency and memory of the pipeline on a synthetic dataset.
+
+    A dataset is generated with SyntheticMIAS, then every case runs in a fresh
+    process so its peak RSS is not inflated by the previous ones:
+
+    sort
+        ImageSorter.sort_images without the listing cache, 'repeat' times.
+    change_format/<format>/<mode>
+        ChangeFormat.ChangeFormat into every target format.
+    crop/<mode>
+        CropImages.CropMIAS.
+
+    The modes are 'serial' (one worker) and 'parallel' ('workers' workers). Each case
+    reports the images, wall time, throughput (images/s), mean and p50/p95/p99 latency
+    per image (seconds) and the peak RSS (MiB, None where the resource module is not
+    available). The results are written as JSON with sorted keys, so two runs (e.g.
+    two commits) can be diffed directly or compared with Benchmark.compare.
+
+    Methods
+    -------
+    run()
+        Generates the dataset, runs every case and writes the results.
+    run_case(Case)
+        Runs a single case, in the current process.
+    compare(Old_path, New_path)
+        Returns the throughput and latency changes between two results files.
+
+    Example
+    -------
+    Bench = Benchmark(folder = 'Bench', count = 100, formats = ('.png', '.jpg'), workers = 4, output = 'bench.json');
+    Bench.run();
+    print(Benchmark.compare('bench_old.json', 'bench.json'));
+
+    From the command line:
+
+    python Class_Benchmark.py --folder Bench --count 100 --output bench.json
+    """
+
+    Metrics = ('Images', 'Time', 'Throughput', 'Latency_mean', 'Latency_p50', 'Latency_p95', 'Latency_p99', 'Peak_rss');
+
+    # * Initializing (Constructor)
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters
+        ----------
+        folder : str
+            Working folder, receives the dataset and the outputs of every case.
+        count : int
+            Number of synthetic images (default is 100).
+        size : int
+            Height and width of the images (default is 1024).
+        depth : int
+            Bits per pixel of the images, 8 or 16 (default is 8).
+        lesions : int
+            Maximum number of lesions per abnormal image (default is 1).
+        seed : int
+            Seed of the dataset (default is 0).
+        formats : tuple[str]
+            Target formats of ChangeFormat (default is ('.png', '.jpg', '.tiff')).
+        workers : int
+            Workers of the parallel mode (default is the CPU count).
+        shapes : int
+            Side of the normal crops of CropImages (default is 50).
+        repeat : int
+            Repetitions of the sort case (default is 5).
+        output : str
+            JSON file receiving the results (default is 'benchmark.json' inside the folder).
+        """
+
+        self.Folder: str = kwargs.get('folder', None);
+        self.Count: int = kwargs.get('count', 100);
+        self.Size: int = kwargs.get('size', 1024);
+        self.Depth: int = kwargs.get('depth', 8);
+        self.Lesions: int = kwargs.get('lesions', 1);
+        self.Seed: int = kwargs.get('seed', 0);
+        self.Formats: tuple = tuple(kwargs.get('formats', ('.png', '.jpg', '.tiff')));
+        self.Workers: int = kwargs.get('workers', os.cpu_count() or 1);
+        self.Shapes: int = kwargs.get('shapes', 50);
+        self.Repeat: int = kwargs.get('repeat', 5);
+
+        if self.Folder is None:
+            raise ValueError("Folder does not exist");
+
+        self.Output: str = kwargs.get('output', os.path.join(self.Folder, 'benchmark.json'));
+
+    # * Class description
+    def __str__(self) -> str:
+        """
+        Return a string description of the Benchmark object.
+
+        Returns:
+        ----------
+        str
+            A string description of the Benchmark object.
+        """
+
+        return f'''{self.__class__.__name__}:{self.Count} images of {self.Size}x{self.Size}, {len(self.Formats)} formats, {self.Workers} workers.''';
+
+    # * Peak resident memory of the process and its children, in MiB
+    @staticmethod
+    def __peak_rss() -> Optional[float]:
+
+        if resource is None:
+            return None
+
+        Peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss);
+
+        # * ru_maxrss is in bytes on macOS and in KiB elsewhere
+        return Peak / (1024 * 1024) if sys.platform == 'darwin' else Peak / 1024
+
+    # * Metrics of a case from its wall time and per-image latencies
+    @staticmethod
+    def __metrics(Images: int, Elapsed_time: float, Latencies: list[float]) -> dict:
+
+        Latencies = np.asarray(Latencies, dtype = np.float64);
+        Empty = len(Latencies) == 0;
+
+        return {
+            'Images': Images,
+            'Time': Elapsed_time,
+            'Throughput': Images / Elapsed_time if Elapsed_time > 0 else 0.0,
+            'Latency_mean': None if Empty else float(Latencies.mean()),
+            'Latency_p50': None if Empty else float(np.percentile(Latencies, 50)),
+            'Latency_p95': None if Empty else float(np.percentile(Latencies, 95)),
+            'Latency_p99': None if Empty else float(np.percentile(Latencies, 99)),
+        }
+
+    # ? Run a single case.
+    @staticmethod
+    def run_case(Case: dict) -> dict:
+        """
+        Run a single case in the current process. Called by run() inside a fresh process.
+
+        Parameters
+        ----------
+        Case : dict
+            Dictionary with the keys 'Kind' ('sort', 'change_format' or 'crop'), 'Dataset',
+            'Output' (output folder), 'Workers', 'Repeat', 'Format', 'Size' and 'Shapes'.
+
+        Returns
+        -------
+        dict
+            The metrics of the case (see Benchmark.Metrics).
+        """
+
+        # * ChangeFormat logs into Data.Folder_logs, relative to the working directory
+        os.makedirs(Case['Output'], exist_ok = True);
+        os.chdir(Case['Output']);
+        os.makedirs(Data.Folder_logs, exist_ok = True);
+
+        if Case['Kind'] == 'sort':
+            Sorter = ImageSorter(Case['Dataset'], cache = False, verbosity = EventReporter.QUIET);
+            Latencies = [];
+
+            for _ in range(Case['Repeat']):
+                Start_time = time.perf_counter();
+                _, Images = Sorter.sort_images();
+                Latencies.append(time.perf_counter() - Start_time);
+
+            # * Throughput of the sort case is in images listed per second
+            Metrics = Benchmark.__metrics(Images * Case['Repeat'], sum(Latencies), Latencies);
+
+        elif Case['Kind'] == 'change_format':
+            Change_format = ChangeFormat(
+                folder = Case['Dataset'],
+                new_folder = Case['Output'],
+                new_format = Case['Format'],
+                workers = Case['Workers'],
+                verbosity = EventReporter.QUIET,
+            );
+
+            Summary = Change_format.ChangeFormat();
+            Metrics = Benchmark.__metrics(Summary['Converted'], Summary['Time'], [Result['Time'] for Result in Change_format.get_results()]);
+
+        else:
+            Folders = {Key: os.path.join(Case['Output'], Key) for Key in ('NF', 'TF', 'BF', 'MF')};
+
+            for Folder in Folders.values():
+                os.makedirs(Folder, exist_ok = True);
+
+            Crop_images = CropImages(
+                annotations = os.path.join(Case['Dataset'], 'Info.csv'),
+                folder = Case['Dataset'],
+                Shapes = Case['Shapes'],
+                Xmean = Case['Size'] // 4,
+                Ymean = Case['Size'] // 2,
+                Height = Case['Size'],
+                Width = Case['Size'],
+                workers = Case['Workers'],
+                verbosity = EventReporter.QUIET,
+                **Folders,
+            );
+
+            Summary = Crop_images.CropMIAS();
+            Metrics = Benchmark.__metrics(Summary['Cropped'], Summary['Time'], [Result['Time'] for Result in Crop_images.get_results()]);
+
+        Metrics['Peak_rss'] = Benchmark.__peak_rss();
+
+        return Metrics
+
+    # * Cases of the run, by name
+    def __cases(self, Dataset: str) -> dict:
+
+        Base = {'Dataset': Dataset, 'Repeat': self.Repeat, 'Format': None, 'Size': self.Size, 'Shapes': self.Shapes};
+        Modes = {'serial': 1, 'parallel': self.Workers};
+        Cases = {'sort': dict(Base, Kind = 'sort', Output = os.path.join(self.Folder, 'sort'), Workers = 1)};
+
+        for Format in self.Formats:
+            for Mode, Workers in Modes.items():
+                Cases[f"change_format/{Format.lstrip('.')}/{Mode}"] = dict(Base, Kind = 'change_format', Format = Format, Output = os.path.join(self.Folder, 'change_format', Format.lstrip('.'), Mode), Workers = Workers);
+
+        for Mode, Workers in Modes.items():
+            Cases[f"crop/{Mode}"] = dict(Base, Kind = 'crop', Output = os.path.join(self.Folder, 'crop', Mode), Workers = Workers);
+
+        return Cases
+
+    # * Commit of the working tree, if it is a git checkout
+    @staticmethod
+    def __commit() -> Optional[str]:
+
+        try:
+            return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output = True, text = True, cwd = os.path.dirname(os.path.abspath(__file__)), check = True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    # ? Run the benchmark.
+    def run(self) -> dict:
+        """
+        Generate the dataset, run every case in a fresh process and write the results.
+
+        Returns
+        -------
+        dict
+            The results, with the keys 'Meta' (settings, machine and commit) and 'Cases' (case name -> metrics).
+        """
+
+        self.Folder = os.path.abspath(self.Folder);
+        Dataset = os.path.join(self.Folder, 'dataset');
+
+        SyntheticMIAS(folder = Dataset, count = self.Count, size = self.Size, depth = self.Depth, lesions = self.Lesions, seed = self.Seed).generate();
+
+        Results = {
+            'Meta': {
+                'Commit': self.__commit(),
+                'Machine': {'Node': platform.node(), 'Platform': platform.platform(), 'Python': platform.python_version(), 'Cpus': os.cpu_count()},
+                'Settings': {'Count': self.Count, 'Size': self.Size, 'Depth': self.Depth, 'Lesions': self.Lesions, 'Seed': self.Seed, 'Workers': self.Workers, 'Repeat': self.Repeat},
+            },
+            'Cases': {},
+        };
+
+        for Name, Case in self.__cases(Dataset).items():
+
+            with ProcessPoolExecutor(max_workers = 1) as Executor:
+                Results['Cases'][Name] = Executor.submit(Benchmark.run_case, Case).result();
+
+            Metrics = Results['Cases'][Name];
+            print(f"{Name}: {Metrics['Throughput']:.2f} images/s, p95 {Metrics['Latency_p95'] or 0:.4f} s, peak RSS {Metrics['Peak_rss'] or 0:.1f} MiB");
+
+        with open(self.Output, 'w') as File:
+            json.dump(Results, File, indent = 2, sort_keys = True);
+
+        return Results
+
+    # ? Compare two results files.
+    @staticmethod
+    def compare(Old_path: str, New_path: str) -> pd.DataFrame:
+        """
+        Compare the cases of two results files.
+
+        Parameters
+        ----------
+        Old_path : str
+            The baseline results.
+        New_path : str
+            The new results.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per case with the old and new throughput, p95 latency and peak RSS, and the throughput change in %.
+        """
+
+        with open(Old_path) as File:
+            Old = json.load(File)['Cases'];
+
+        with open(New_path) as File:
+            New = json.load(File)['Cases'];
+
+        Rows = [];
+
+        for Name in sorted(set(Old) | set(New)):
+            Old_case = Old.get(Name, {});
+            New_case = New.get(Name, {});
+
+            Old_throughput = Old_case.get('Throughput');
+            New_throughput = New_case.get('Throughput');
+
+            Rows.append({
+                'Case': Name,
+                'Throughput_old': Old_throughput,
+                'Throughput_new': New_throughput,
+                'Throughput_change': 100 * (New_throughput - Old_throughput) / Old_throughput if Old_throughput and New_throughput is not None else None,
+                'Latency_p95_old': Old_case.get('Latency_p95'),
+                'Latency_p95_new': New_case.get('Latency_p95'),
+                'Peak_rss_old': Old_case.get('Peak_rss'),
+                'Peak_rss_new': New_case.get('Peak_rss'),
+            });
+
+        return pd.DataFrame(Rows)
+
+if __name__ == '__main__':
+
+    Parser = argparse.ArgumentParser(description = "Benchmark the Mini-MIAS preprocessing pipeline on a synthetic dataset.");
+    Parser.add_argument('--folder', required = True, help = "Working folder.");
+    Parser.add_argument('--count', type = int, default = 100);
+    Parser.add_argument('--size', type = int, default = 1024);
+    Parser.add_argument('--depth', type = int, default = 8, choices = (8, 16));
+    Parser.add_argument('--lesions', type = int, default = 1);
+    Parser.add_argument('--seed', type = int, default = 0);
+    Parser.add_argument('--formats', nargs = '+', default = ['.png', '.jpg', '.tiff']);
+    Parser.add_argument('--workers', type = int, default = os.cpu_count() or 1);
+    Parser.add_argument('--repeat', type = int, default = 5);
+    Parser.add_argument('--output', default = None);
+    Parser.add_argument('--compare', default = None, help = "Previous results file to compare with.");
+    Arguments = Parser.parse_args();
+
+    Settings = {Key: Value for Key, Value in vars(Arguments).items() if Key != 'compare' and Value is not None};
+    Bench = Benchmark(**Settings);
+    Bench.run();
+
+    if Arguments.compare is not None:
+        print(Benchmark.compare(Arguments.compare, Bench.Output).to_string(index = False));
@@ -1,11 +1,22 @@
 import os
 import cv2
 import json
+import time
 import logging
 
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
 from Decorator.Timer import Timer
 from Class_Data import Data
 from Class_ImageSorter import ImageSorter
+from Class_ImageReader import ImageReader
+from Class_Manifest import Manifest
+from Class_EncodeProfile import EncodeProfile
+from Class_EventReporter import EventReporter
+from Class_ImageWriter import ImageWriter
+from Class_StageProfiler import StageProfiler
+from Class_Pipeline import Pipeline
+from Class_ImageCache import ImageCache
 
 class ChangeFormat:
     """
@@ -19,13 +30,26 @@ class ChangeFormat:
         The path to the folder where the converted image files will be saved.
     new_format : str
         The desired format for the image files (e.g., '.png', '.jpg').
+    decode : str
+        How the images are decoded (see ImageReader).
+    workers : int
+        Number of threads or processes converting images.
+    executor : str
+        The kind of pool used to convert images ('thread' or 'process').
 
     Methods:
     -------
     ChangeFormat()
         Changes the format of image files in the specified folder to the desired format.
+    get_results()
+        Returns the per-file results of the last ChangeFormat call.
+    get_profiler()
+        Returns the per-stage timings of the last ChangeFormat call.
     """
 
+    # * List of Image Formats Supported by OpenCV
+    Images_supported_format = ImageReader.Extensions;
+
     # * Initializing (Constructor)
     def __init__(self, **kwargs):
         """
@@ -39,6 +63,49 @@ class ChangeFormat:
             The path to the folder where the converted image files will be saved.
         new_format : str
             The desired format for the image files (default is '.png').
+        decode : str
+            How the images are decoded: 'unchanged' (native channels and depth), 'grayscale' or 'color' (default is 'unchanged').
+        anydepth : bool
+            Keep 16-bit sources in 16 bits with the 'grayscale' and 'color' decode modes (default is False).
+        profile : str
+            Encode profile: 'fast', 'balanced' or 'smallest' (default is None, OpenCV defaults).
+        png_compression, jpeg_quality, jpeg_progressive, jpeg_optimize, tiff_compression, jp2_rate
+            Explicit encoder settings that override the profile (see EncodeProfile).
+        workers : int
+            Number of threads or processes converting images (default is the CPU count).
+        executor : str
+            'thread' or 'process' (default is 'thread').
+        queue_size : int
+            Maximum number of conversions in flight (default is twice the workers).
+        pipeline : bool
+            Overlap the reads, conversions and writes in separate stages joined by bounded queues, for
+            network storage where the I/O dominates (default is False). Ignored with cprofile or tracemalloc.
+        readers : int
+            Threads reading the images in pipelined mode (default is 4).
+        writers : int
+            Threads writing the images in pipelined mode (default is 4).
+        verbosity : int
+            Console output, see EventReporter (default is EventReporter.PROGRESS, a single progress bar).
+        events : str
+            Path of a JSON-lines file receiving one event per image and the run summary (default is None).
+        profile_stages : bool
+            Print the per-stage timing table at the end of the run (default is False).
+        profile_output : str
+            Write the per-stage timings to this '.json' or '.csv' file (default is None).
+        cprofile : bool
+            Capture a cProfile of the run, the conversions run in a single thread (default is False).
+        tracemalloc : bool
+            Capture the tracemalloc memory peak of the run, the conversions run in a single thread (default is False).
+        incremental : bool
+            Only convert images that are new, changed or converted with other parameters, using a manifest
+            stored in new_folder (default is False).
+        hash : bool
+            With incremental, compare the content hash of images whose size or modification time changed (default is False).
+        image_cache : str or bool
+            Decode every image content once through an ImageCache: a folder keeps the decoded images as '.npy'
+            files between runs, True keeps them in memory only (default is None, no cache).
+        image_cache_bytes : int
+            Bound of the memory tier of the ImageCache in each process (default is 512 MiB).
 
         Note: If new_folder is not specified, the converted files will be saved in the same folder as the original files.
         """
@@ -53,6 +120,48 @@ class ChangeFormat:
         self.__New_folder = kwargs.get('new_folder', None);
         self.__New_format = kwargs.get('new_format', '.png');
 
+        # * Decode with the native channel layout of the source unless requested otherwise
+        self.__Decode = kwargs.get('decode', 'unchanged');
+        self.__Flags = ImageReader.flags(self.__Decode, kwargs.get('anydepth', False));
+
+        # * Encoder parameters of the new format
+        self.__Encoder = EncodeProfile(kwargs.get('profile', None), **{Key: kwargs[Key] for Key in EncodeProfile.Settings if Key in kwargs});
+
+        # * Conversions run in a bounded pool, OpenCV releases the GIL while decoding and encoding
+        self.__Workers = kwargs.get('workers', os.cpu_count() or 1);
+        self.__Executor = kwargs.get('executor', 'thread');
+        self.__Queue_size = kwargs.get('queue_size', self.__Workers * 2);
+
+        if self.__Executor not in ('thread', 'process'):
+            raise ValueError(f"Executor {self.__Executor} incompatible, it must be: ('thread', 'process')");
+
+        # * Skip images already converted with the same parameters
+        self.__Incremental = kwargs.get('incremental', False);
+        self.__Use_hash = kwargs.get('hash', False);
+
+        # * Console verbosity and JSON-lines events file
+        self.__Verbosity = kwargs.get('verbosity', EventReporter.PROGRESS);
+        self.__Events = kwargs.get('events', None);
+
+        # * Per-stage timings, optional cProfile and tracemalloc captures
+        self.__Profile_stages = kwargs.get('profile_stages', False);
+        self.__Profile_output = kwargs.get('profile_output', None);
+        self.__Cprofile = kwargs.get('cprofile', False);
+        self.__Tracemalloc = kwargs.get('tracemalloc', False);
+        self.__Profiler = StageProfiler(Data.Change_format_name);
+
+        # * Pipelined mode: reader threads, compute pool and writer threads joined by bounded queues
+        self.__Pipeline = kwargs.get('pipeline', False);
+        self.__Readers = kwargs.get('readers', 4);
+        self.__Writers = kwargs.get('writers', 4);
+
+        # * Decoded images shared with CropImages, keyed by content
+        Image_cache = kwargs.get('image_cache', None);
+        self.__Image_cache = ImageCache(folder = Image_cache if isinstance(Image_cache, str) else None, max_bytes = kwargs.get('image_cache_bytes', 512 << 20)) if Image_cache else None;
+
+        # * Per-file results of the last run
+        self.__Results = [];
+
         # * If NewFolder is None, use __Folder instead
         if self.__New_folder is None:
             self.__New_folder = self.__Folder;
@@ -98,11 +207,14 @@ class ChangeFormat:
         and saves the converted files in the 'new_folder' attribute (or the same folder if 'new_folder' is not specified).
 
         The method supports various image formats and tracks the progress of the conversion, reporting the number of images processed.
+        The images are converted by a pool of 'workers' threads (or processes) with at most 'queue_size' conversions in flight.
 
-        Raises:
+        Returns:
         ----------
-        OSError
-            If the image files cannot be converted to the desired format.
+        dict
+            Summary of the run with the keys 'Total', 'Converted', 'Failed', 'Skipped', 'Up_to_date', 'Time', 'Throughput' (images/s),
+            'Cache' (memory hits, disk hits, misses and evictions, with an image cache) and, in pipelined mode,
+            'Utilization' (stage -> busy share of its workers), or None if the new format is not supported. The per-file results are available through get_results().
 
         Note: The 'new_format' attribute should be a supported image format (e.g., '.png', '.jpg').
 
@@ -112,57 +224,235 @@ class ChangeFormat:
         change_format.ChangeFormat()
         """
 
-        # * List of Image Formats Supported by OpenCV
-        Images_supported_format = ('.bmp', '.pbm', '.pgm', '.ppm', '.sr', '.ras', '.jpeg', '.jpg', '.jpe', '.jp2', '.tiff', '.tif', '.png');
-        
-        Image_sorter = ImageSorter(self.__Folder);
+        if self.__New_format not in self.Images_supported_format:
+            self.logger.error(f"Format incompatible {self.__New_format}, It must be: {self.Images_supported_format} ❌");
+            return None
 
-        Count = 1;
+        Image_sorter = ImageSorter(self.__Folder, verbosity = self.__Verbosity, events = self.__Events);
 
-        try:
+        # * Changes the current working directory to the given path
+        os.chdir(self.__Folder);
+
+        self.__Profiler = StageProfiler(Data.Change_format_name);
+
+        Run_stages = {};
+
+        # * Using the sort function.
+        with StageProfiler.stage(Run_stages, 'list'):
+            Sorted_files, Total_images = Image_sorter.sort_images();
+
+        self.__Profiler.add_run_stage('list', Run_stages['list']);
+
+        # * One job per image, files that OpenCV cannot read are left out
+        Jobs = [];
+
+        for File in Sorted_files:
+            Filename, Format = os.path.splitext(File);
+
+            if Format.lower() not in self.Images_supported_format:
+                continue;
+
+            Jobs.append({
+                'File': File,
+                'Source': os.path.join(self.__Folder, File),
+                'Destination': os.path.join(self.__New_folder, Filename + self.__New_format),
+                'Flags': self.__Flags,
+                'Params': self.__Encoder.params(self.__New_format),
+                'Cache': self.__Image_cache,
+            });
+
+        # * Incremental runs only convert new or changed images
+        Up_to_date = 0;
+
+        if self.__Incremental:
+            Manifest_file = Manifest(os.path.join(self.__New_folder, Manifest.Default_name), self.__Use_hash);
+
+            Pending_jobs = [Job for Job in Jobs if not Manifest_file.is_up_to_date(Job['Source'], self.__job_params(Job))];
+            Up_to_date = len(Jobs) - len(Pending_jobs);
+            Jobs = Pending_jobs;
+
+        Reporter = EventReporter(Data.Change_format_name, self.__Verbosity, self.__Events);
+        Reporter.start(len(Jobs));
+
+        Start_time = time.perf_counter();
+
+        Results = [None] * len(Jobs);
+
+        # * Keep at most Queue_size conversions in flight so memory stays flat
+        Executor_class = ProcessPoolExecutor if self.__Executor == 'process' else ThreadPoolExecutor;
+
+        # * cProfile and tracemalloc only see the current process, so captured runs use one thread
+        Capture = self.__Cprofile or self.__Tracemalloc;
+
+        if Capture:
+            Executor_class = ThreadPoolExecutor;
+
+        Runner = None;
+
+        # * Reads, conversions and writes overlap, for storage where the I/O dominates
+        if self.__Pipeline and not Capture:
+            Runner = Pipeline(readers = self.__Readers, workers = self.__Workers, writers = self.__Writers, queue_size = self.__Queue_size, executor = self.__Executor);
+
+            for Index, Result in Runner.run(Jobs, lambda Job: Job['Source'], ChangeFormat.convert_image):
+                Results[Index] = Result;
+
+                Reporter.update(Result['File'], Result['Success'], Result['Time'], Result['Error']);
+                self.__Profiler.add(Result['File'], Result['Stages']);
+
+        else:
+            with self.__Profiler.capture(self.__Cprofile, self.__Tracemalloc), Executor_class(max_workers = 1 if Capture else self.__Workers) as Executor:
+
+                Pending = {};
+                Next_job = 0;
+
+                while Next_job < len(Jobs) or Pending:
 
-            # * Compare the new format proposed with each format supported by OpenCV
-            for Format_supported in Images_supported_format:
-        
-                if(self.__New_format == Format_supported):
-                
-                    # * Changes the current working directory to the given path
-                    os.chdir(self.__Folder);
-                    print(os.getcwd());
-                    print("\n");
-
-                    # * Using the sort function.
-                    Sorted_files, Total_images = Image_sorter.sort_images();
-
-                    # * Reading the files.
-                    for File in Sorted_files:
-                        # * Extract the file name and format.
-                        Filename, Format  = os.path.splitext(File)
-
-                        if File.endswith(Format):
-
-                            try:
-                                Filename, Format  = os.path.splitext(File)
-                                print(f"Working with {Count} of {Total_images} {Format} images, {Filename} ------- {self.__New_format} ✅");
-                                
-                                # * Reading each image using cv2.
-                                Path_file = os.path.join(self.__Folder, File)
-                                Image = cv2.imread(Path_file)         
-                                
-                                # * Changing its format to a new one.
-                                New_name_filename = Filename + self.__New_format
-                                New_folder = os.path.join(self.__New_folder, New_name_filename)
-
-                                cv2.imwrite(New_folder, Image)
-                                Count += 1
-
-                            except OSError:
-                                print(f"Cannot convert {File} ❌") #! Alert
-
-                    print("\n")
-                    print(f"{Count} of {Total_images} tranformed ✅. From {Format} to {self.__New_format}.");
+                    while Next_job < len(Jobs) and len(Pending) < self.__Queue_size:
+                        Pending[Executor.submit(ChangeFormat.convert_image, Jobs[Next_job])] = Next_job;
+                        Next_job += 1;
+
+                    Done, _ = wait(Pending, return_when = FIRST_COMPLETED);
+
+                    for Future in Done:
+                        Index = Pending.pop(Future);
+                        Results[Index] = Future.result();
+
+                        Reporter.update(Results[Index]['File'], Results[Index]['Success'], Results[Index]['Time'], Results[Index]['Error']);
+                        self.__Profiler.add(Results[Index]['File'], Results[Index]['Stages']);
+
+        Elapsed_time = time.perf_counter() - Start_time;
+
+        self.__Results = Results;
+
+        if self.__Incremental:
+            for Job, Result in zip(Jobs, Results):
+                if Result['Success']:
+                    Manifest_file.update(Job['Source'], self.__job_params(Job), [Result['Output']]);
+                else:
+                    Manifest_file.remove(Job['Source']);
+
+            Manifest_file.save();
+
+        Converted = sum(1 for Result in Results if Result['Success']);
+
+        Summary = {
+            'Total': Total_images,
+            'Converted': Converted,
+            'Failed': len(Results) - Converted,
+            'Skipped': Total_images - len(Jobs) - Up_to_date,
+            'Up_to_date': Up_to_date,
+            'Time': Elapsed_time,
+            'Throughput': len(Jobs) / Elapsed_time if Elapsed_time > 0 else 0.0,
+        };
+
+        if self.__Image_cache is not None:
+            Summary['Cache'] = ImageCache.summary(Results);
+
+        # * Share of the time every stage was busy, to tune the worker counts
+        if Runner is not None:
+            Summary['Utilization'] = {Stage: Values['Utilization'] for Stage, Values in Runner.utilization().items()};
+
+        Reporter.close(Summary);
+
+        if self.__Profile_stages:
+            Reporter.message(self.__Profiler.table(), EventReporter.QUIET);
+
+        if self.__Profile_output is not None:
+            self.__Profiler.dump(self.__Profile_output);
+
+        return Summary
+
+    # * Parameters that affect the output of a job
+    @staticmethod
+    def __job_params(Job: dict) -> dict:
+        return {'Destination': Job['Destination'], 'Flags': Job['Flags'], 'Params': Job['Params']}
+
+    # * Stage timings of the last run
+    def get_profiler(self) -> StageProfiler:
+        """
+        Return the per-stage timings of the last ChangeFormat call.
+
+        Returns
+        -------
+        StageProfiler
+            The profiler with the per-image timings, summary and captures.
+        """
+
+        return self.__Profiler
+
+    # * Results of the last run
+    def get_results(self) -> list[dict]:
+        """
+        Return the per-file results of the last ChangeFormat call.
+
+        Returns
+        -------
+        list[dict]
+            One dictionary per image with the keys 'File', 'Success', 'Output', 'Error' and 'Time'.
+        """
+
+        return self.__Results
+
+    # ? Convert a single image.
+    @staticmethod
+    def convert_image(Job: dict) -> dict:
+        """
+        Read an image and write it with the new format.
+
+        The method is static so it can run in a thread or be pickled for a process pool.
+
+        Parameters
+        ----------
+        Job : dict
+            Dictionary with the keys 'File', 'Source', 'Destination', 'Flags' (cv2.imread flags),
+            'Params' (cv2.imwrite parameters) and 'Cache' (ImageCache, or None). Pipeline jobs add 'Data' (raw bytes) and 'Deferred'.
+
+        Returns
+        -------
+        dict
+            Result of the job with the keys 'File', 'Success', 'Output', 'Error', 'Time',
+            'Stages' (seconds spent reading, decoding, encoding and writing), 'Cache' (tier and evicted
+            entries, with a cache) and 'Writes' (paths, encoded bytes and link mode of the output, for 'Deferred' jobs).
+        """
+
+        Start_time = time.perf_counter();
+
+        Stages = dict.fromkeys(StageProfiler.Image_stages, 0.0);
+
+        Result = {'File': Job['File'], 'Success': False, 'Output': None, 'Error': None, 'Time': 0.0, 'Stages': Stages, 'Cache': None, 'Writes': []};
+
+        try:
+            # * Reading each image using cv2, pipelines read the bytes in their own stage
+            Data = Job.get('Data');
+
+            if isinstance(Data, Exception):
+                raise Data;
+
+            if Data is None:
+                with StageProfiler.stage(Stages, 'read'):
+                    Data = ImageReader.read_bytes(Job['Source']);
+
+            # * Decoded-image cache, a hit skips the decoding
+            with StageProfiler.stage(Stages, 'decode'):
+                if Job.get('Cache') is not None:
+                    Image, Tier, Evicted = Job['Cache'].decode(Data, Job['Flags'], Job['Source']);
+                    Result['Cache'] = (Tier, Evicted);
+                else:
+                    Image = ImageReader.decode(Data, Job['Flags'], Job['Source']);
+
+            # * Changing its format to a new one.
+            if Job.get('Deferred', False):
+                with StageProfiler.stage(Stages, 'encode'):
+                    Result['Writes'].append(([Job['Destination']], ImageWriter.encode(Image, os.path.splitext(Job['Destination'])[1], Job['Params']), 'copy'));
+            else:
+                ImageWriter.write(Image, [Job['Destination']], 'copy', Job['Params'], Stages);
+
+            Result['Output'] = Job['Destination'];
+            Result['Success'] = True;
 
         except Exception as e:
-            self.logger.error(f"Format incompatible {self.__New_format}, It must be: {Images_supported_format} ❌ {str(e)}")
+            Result['Error'] = str(e);
 
+        Result['Time'] = time.perf_counter() - Start_time;
 
+        return Result
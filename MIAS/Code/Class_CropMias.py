@@ -1,9 +1,35 @@
 # ? Class for images cropping.
 import os 
+import time
+import queue
+import threading
+import warnings
+import numpy as np
 import pandas as pd
-import cv2
+
+from typing import Iterator
+
+from concurrent.futures import ProcessPoolExecutor
 
 from Class_ImageSorter import ImageSorter
+from Class_CropWorker import CropWorker
+from Class_LesionIndex import LesionIndex
+from Class_CropPlan import CropPlanner
+from Class_ImageReader import ImageReader
+from Class_ImageWriter import ImageWriter
+from Class_Manifest import Manifest
+from Class_EncodeProfile import EncodeProfile
+from Class_EventReporter import EventReporter
+from Class_Data import Data
+from Class_StageProfiler import StageProfiler
+from Class_PatchStore import PatchStore
+from Class_PatchNormalizer import PatchNormalizer
+from Class_PatchTiler import PatchTiler
+from Class_TissueMask import TissueMask
+from Class_Pipeline import Pipeline
+from Class_AnnotationLoader import AnnotationLoader
+from Class_ImageCache import ImageCache
+from Class_DatasetSplitter import DatasetSplitter
 
 class CropImages:
     """
@@ -16,6 +42,16 @@ class CropImages:
         Returns a dictionary containing the attributes of the class.
     CropMIAS()
         Crops the images according to the coordinates in the CSV file.
+    get_results()
+        Returns the per-image results of the last CropMIAS call.
+    get_crops()
+        Returns the label, number and box of every crop of the last CropMIAS call.
+    get_plan()
+        Returns the crop plan of the dataframe.
+    get_profiler()
+        Returns the per-stage timings of the last CropMIAS call.
+    iter_crops(prefetch)
+        Yields the crops lazily without writing any file.
 
     Attributes
     ----------
@@ -31,12 +67,40 @@ class CropImages:
         Path to the folder containing the cropped malignant images.
     __Dataframe : pd.DataFrame
         The dataframe containing the coordinates of the images to be cropped.
+    __Plan : pd.DataFrame
+        The crop rectangles of every annotation (see CropPlanner.plan).
+    __Index : LesionIndex
+        The boxes of the plan indexed by REFNUM.
     __Shapes : int
         The size of the cropped images.
     __X_mean : int
         The x-coordinate of the center of the image.
     __Y_mean : int
         The y-coordinate of the center of the image.
+    Decode : str
+        The decode mode of the images (see ImageReader).
+    Flags : int
+        The cv2.imread flags of the decode mode.
+    Link : str
+        How the crops are placed into their additional category folders (see ImageWriter).
+    Encoder : EncodeProfile
+        The encoder parameters of the crops.
+    Format : str
+        The format of the crops, None keeps the format of each source image.
+    Incremental : bool
+        Whether up-to-date images are skipped (see Manifest).
+    Manifest_path : str
+        The path of the manifest used by incremental runs.
+    Workers : int
+        Number of processes used to crop the images.
+    Store : str
+        Folder of the PatchStore receiving the crops instead of the output folders.
+    Normalizer : PatchNormalizer
+        The fixed-size policy of the crops, None keeps the size of every box.
+    Tiler : PatchTiler
+        The tiling of the normal images, None takes a single crop at Xmean and Ymean.
+    Tissue : TissueMask
+        The tissue segmentation of the images, None when no option needs it.
     """
 
     # * Initializing (Constructor)
@@ -56,24 +120,129 @@ class CropImages:
             Path to the folder for saving the cropped malignant images.
         Dataframe : pd.DataFrame
             The dataframe containing the coordinates of the images to be cropped.
+        annotations : str
+            The 'Info.txt' or 'Info.csv' file loaded with AnnotationLoader when no dataframe is given (default is None).
         Shapes : int
             The size of the cropped images.
         X mean : int
             The x-coordinate of the center of the image.
         Y mean : int
             The y-coordinate of the center of the image.
+        Height : int
+            The height of the images used to plan the crops (default is 1024).
+        Width : int
+            The width of the images used to plan the crops (default is 1024).
+        decode : str
+            How the images are decoded: 'unchanged' (native channels and depth), 'grayscale' or 'color' (default is 'unchanged').
+        anydepth : bool
+            Keep 16-bit sources in 16 bits with the 'grayscale' and 'color' decode modes (default is False).
+        link : str
+            How benign and malignant crops are placed in the tumor folder: 'encode' (encode twice),
+            'copy' (encode once, write the bytes twice), 'hardlink' or 'symlink' (default is 'copy').
+        format : str
+            Format of the crops (e.g. '.png'), so the encode profile applies to Mini-MIAS '.pgm'
+            sources (default is None, the format of each source image).
+        profile : str
+            Encode profile of the crops: 'fast', 'balanced' or 'smallest' (default is None, OpenCV defaults).
+        png_compression, jpeg_quality, jpeg_progressive, jpeg_optimize, tiff_compression, jp2_rate
+            Explicit encoder settings that override the profile (see EncodeProfile).
+        incremental : bool
+            Only crop images that are new, changed or planned with other boxes or settings (default is False).
+        hash : bool
+            With incremental, compare the content hash of images whose size or modification time changed (default is False).
+        manifest : str
+            Path of the manifest used by incremental runs (default is a file in the first output folder).
+        verbosity : int
+            Console output, see EventReporter (default is EventReporter.PROGRESS, a single progress bar).
+        events : str
+            Path of a JSON-lines file receiving one event per image and the run summary (default is None).
+        profile_stages : bool
+            Print the per-stage timing table at the end of the run (default is False).
+        profile_output : str
+            Write the per-stage timings to this '.json' or '.csv' file (default is None).
+        cprofile : bool
+            Capture a cProfile of the run, the images are cropped in the current process (default is False).
+        tracemalloc : bool
+            Capture the tracemalloc memory peak of the run, the images are cropped in the current process (default is False).
+        workers : int
+            Number of processes used to crop the images (default is the CPU count).
+            With 1 worker the images are cropped in the current process.
+        pipeline : bool
+            Overlap the reads, crops and writes in separate stages joined by bounded queues, for network
+            storage where the I/O dominates (default is False). Ignored with cprofile or tracemalloc.
+        readers : int
+            Threads reading the images in pipelined mode (default is 4).
+        writers : int
+            Threads writing the crops in pipelined mode (default is 4).
+        queue_size : int
+            Capacity of the pipeline queues and maximum number of images in the pool (default is twice the workers).
+        store : str
+            Folder of a PatchStore receiving every crop and its metadata instead of one image file per
+            crop in the output folders (default is None). The store is rewritten on every run, so
+            incremental is ignored.
+        patch_size : int
+            Side of every crop, written files and store alike, so the patches are ready for batching and
+            the store is readable as a single array (default is None, every crop keeps the size of its box).
+        patch_policy : str
+            How the crops reach patch_size: 'center' (window of patch_size centered on the box), 'resize'
+            (crop then resize) or 'pad' (pad smaller crops, center-crop larger ones) (default is 'resize').
+        pad_mode : str
+            Border of the padding, 'reflect' or 'constant' (default is 'constant').
+        tiling : str
+            Extract many patches from every normal image instead of the single crop at Xmean and Ymean:
+            'grid', 'random' or 'tissue' (see PatchTiler) (default is None).
+        tile_size : int
+            Side of the tiles (default is Shapes).
+        tile_stride : int
+            Step of the 'grid' and 'tissue' windows (default is tile_size).
+        tile_count : int
+            Tiles per image of the 'random' and 'tissue' modes (default is 16).
+        tile_seed : int
+            Seed of the 'random' and 'tissue' selections (default is 0).
+        min_tissue : float
+            Minimum tissue fraction of the 'tissue' tiles and of the crops checked by tissue_policy (default is 0.5).
+        tissue_policy : str
+            What happens to crops whose tissue fraction is below min_tissue: 'reject' drops them, 'recenter'
+            moves them to the nearest position with enough tissue (default is None, no check).
+        auto_center : bool
+            Center the normal crops on the point deepest inside the tissue of each image instead of Xmean and Ymean (default is False).
+        mask_side : int
+            Longest side of the low-resolution tissue masks (default is 256).
+        mask_cache : str
+            Folder keeping the tissue masks between runs (default is None, memory only).
+        image_cache : str or bool
+            Decode every image content once through an ImageCache: a folder keeps the decoded images as '.npy'
+            files between runs, so sweeps over the crop settings skip the decoding, True keeps them in memory
+            only (default is None, no cache).
+        image_cache_bytes : int
+            Bound of the memory tier of the ImageCache in each process (default is 512 MiB).
+        split : dict or tuple
+            Split the images into train/val/test before cropping (see DatasetSplitter): the crops go to a
+            '<split>' subfolder of every output folder, or to a '<split>' PatchStore inside 'store'
+            (default is None, no split).
+        split_seed : int
+            The seed of the split (default is 0).
+        split_group : str
+            Keep the images of a 'refnum' or of a 'patient' in the same split (default is 'refnum').
+        shards : int
+            Spread the crops of every split over this many '<shard>' subfolders, by REFNUM (default is None, no shards).
         """
 
         # * CSV to extract data
         self.__Dataframe: pd.DataFrame = kwargs.get('Dataframe', None);
 
+        # * Typed annotations, parsed once and cached next to the source
+        if self.__Dataframe is None and kwargs.get('annotations', None) is not None:
+            self.__Dataframe = AnnotationLoader().load(kwargs.get('annotations'));
+
         # * This algorithm outputs crop values for images based on the coordinates of the CSV file.
         self.Folder_path: str = kwargs.get('folder', None);
 
-        '''self.__Folder_Normal_images: str = kwargs.get('Normal', None)
-        self.__Folder_Tumor_images: str = kwargs.get('Tumor', None)
-        self.__Folder_Benign_images: str = kwargs.get('Benign', None)
-        self.__Folder_Malignant_images: str = kwargs.get('Malignant', None)'''
+        # * Folders used to save the cropped images
+        self.__Normalfolder: str = kwargs.get('NF', None);
+        self.__Tumorfolder: str = kwargs.get('TF', None);
+        self.__Benignfolder: str = kwargs.get('BF', None);
+        self.__Malignantfolder: str = kwargs.get('MF', None);
 
         self.Shapes = kwargs.get('Shapes', None);
         
@@ -81,7 +250,116 @@ class CropImages:
         self.X_mean = kwargs.get('Xmean', None);
         self.Y_mean = kwargs.get('Ymean', None);
 
-        self.Image_sorter = ImageSorter(self.Folder_path);
+        # * Crop rectangles of every annotation and REFNUM -> boxes lookup, built once from the dataframe
+        self.__Planner = CropPlanner(
+            Shapes = self.Shapes,
+            Xmean = self.X_mean,
+            Ymean = self.Y_mean,
+            Height = kwargs.get('Height', 1024),
+            Width = kwargs.get('Width', 1024),
+        );
+
+        self.__Plan_stages = {};
+
+        with StageProfiler.stage(self.__Plan_stages, 'plan'):
+            self.__Plan: pd.DataFrame = self.__Planner.plan(self.__Dataframe);
+            self.__Index = LesionIndex(self.__Plan);
+
+        # * Decode with the native channel layout of the source unless requested otherwise
+        self.Decode: str = kwargs.get('decode', 'unchanged');
+        self.Flags: int = ImageReader.flags(self.Decode, kwargs.get('anydepth', False));
+
+        # * How the tumor folder receives the benign and malignant crops
+        self.Link: str = kwargs.get('link', 'copy');
+
+        if self.Link not in ImageWriter.Link_modes:
+            raise ValueError(f"Link mode {self.Link} incompatible, it must be: {ImageWriter.Link_modes}");
+
+        # * Encoder parameters of the crops
+        self.Encoder = EncodeProfile(kwargs.get('profile', None), **{Key: kwargs[Key] for Key in EncodeProfile.Settings if Key in kwargs});
+        self.Format: str = kwargs.get('format', None);
+
+        if self.Format is not None and self.Format.lower() not in ImageReader.Extensions:
+            raise ValueError(f"Format {self.Format} incompatible, it must be: {ImageReader.Extensions}");
+
+        if self.Format is not None and self.Encoder.Values and not self.Encoder.params(self.Format):
+            raise ValueError(f"Format {self.Format} incompatible with the encode settings {self.Encoder.Values}, it must be: ('.png', '.jpg', '.jpeg', '.jpe', '.tif', '.tiff', '.jp2')");
+
+        # * Skip images already cropped with the same boxes and settings
+        self.Incremental: bool = kwargs.get('incremental', False);
+        self.Use_hash: bool = kwargs.get('hash', False);
+
+        Output_folders = [Folder for Folder in (self.__Normalfolder, self.__Tumorfolder, self.__Benignfolder, self.__Malignantfolder) if Folder is not None];
+        self.Manifest_path: str = kwargs.get('manifest', os.path.join(Output_folders[0], Manifest.Default_name) if Output_folders else None);
+
+        # * Number of processes used to crop the images
+        self.Workers: int = kwargs.get('workers', os.cpu_count() or 1);
+
+        # * Pipelined mode: reader threads, crop processes and writer threads joined by bounded queues
+        self.Pipeline: bool = kwargs.get('pipeline', False);
+        self.Readers: int = kwargs.get('readers', 4);
+        self.Writers: int = kwargs.get('writers', 4);
+        self.Queue_size: int = kwargs.get('queue_size', 2 * self.Workers);
+
+        # * Per-image results of the last run
+        self.__Results: list[dict] = [];
+
+        # * Console verbosity and JSON-lines events file
+        self.Verbosity: int = kwargs.get('verbosity', EventReporter.PROGRESS);
+        self.Events: str = kwargs.get('events', None);
+
+        # * Per-stage timings, optional cProfile and tracemalloc captures
+        self.Profile_stages: bool = kwargs.get('profile_stages', False);
+        self.Profile_output: str = kwargs.get('profile_output', None);
+        self.Cprofile: bool = kwargs.get('cprofile', False);
+        self.Tracemalloc: bool = kwargs.get('tracemalloc', False);
+        self.__Profiler = StageProfiler(Data.Crop_MIAS_name);
+
+        # * Packed store receiving the crops instead of the folders
+        self.Store: str = kwargs.get('store', None);
+
+        # * Split of every REFNUM, assigned once on the plan so no file is listed or copied
+        Split = kwargs.get('split', None);
+
+        self.Splitter: DatasetSplitter = DatasetSplitter(Split, kwargs.get('split_seed', 0), kwargs.get('split_group', 'refnum')) if Split is not None else None;
+        self.Shards: int = kwargs.get('shards', None);
+
+        with StageProfiler.stage(self.__Plan_stages, 'plan'):
+            self.__Splits: pd.DataFrame = self.Splitter.split(self.__Plan) if self.Splitter is not None else None;
+            self.__Split_of: dict = dict(zip(self.__Splits['REFNUM'], self.__Splits['Split'])) if self.Splitter is not None else {};
+
+        # * Fixed-size patches, applied in the crop pass
+        Patch_size = kwargs.get('patch_size', None);
+        self.Normalizer: PatchNormalizer = PatchNormalizer(Patch_size, kwargs.get('patch_policy', 'resize'), kwargs.get('pad_mode', 'constant')) if Patch_size is not None else None;
+
+        # * Many normal patches per image, extracted from the same decode
+        Tiling = kwargs.get('tiling', None);
+
+        self.Tiler: PatchTiler = PatchTiler(
+            Size = kwargs.get('tile_size', self.Shapes),
+            Stride = kwargs.get('tile_stride', None),
+            Mode = Tiling,
+            Count = kwargs.get('tile_count', 16),
+            Seed = kwargs.get('tile_seed', 0),
+            Min_tissue = kwargs.get('min_tissue', 0.5),
+        ) if Tiling is not None else None;
+
+        # * Tissue masks, computed once per image at low resolution when an option needs them
+        self.Min_tissue: float = kwargs.get('min_tissue', 0.5);
+        self.Tissue_policy: str = kwargs.get('tissue_policy', None);
+        self.Auto_center: bool = kwargs.get('auto_center', False);
+
+        if self.Tissue_policy not in (None, 'reject', 'recenter'):
+            raise ValueError(f"Tissue policy {self.Tissue_policy} incompatible, it must be: (None, 'reject', 'recenter')");
+
+        Needs_mask = self.Tissue_policy is not None or self.Auto_center or Tiling == 'tissue';
+        self.Tissue: TissueMask = TissueMask(kwargs.get('mask_side', 256), cache_folder = kwargs.get('mask_cache', None)) if Needs_mask else None;
+
+        # * Decoded images shared with ChangeFormat, keyed by content
+        Image_cache = kwargs.get('image_cache', None);
+        self.Image_cache: ImageCache = ImageCache(folder = Image_cache if isinstance(Image_cache, str) else None, max_bytes = kwargs.get('image_cache_bytes', 512 << 20)) if Image_cache else None;
+
+        self.Image_sorter = ImageSorter(self.Folder_path, verbosity = self.Verbosity, events = self.Events);
 
     # * Class description
     def __str__(self) -> str:
@@ -109,199 +387,451 @@ class CropImages:
         print(f'Destructor called, {self.__class__.__name__} class destroyed.');
     
     
-    # ? Method to crop Mini-MIAS images.
-    def CropMIAS(self) -> None:
-        
 
-        os.chdir(self.Folder_path)
+    # * Crop plan
+    def get_plan(self) -> pd.DataFrame:
+        """
+        Return the crop plan of the dataframe, so it can be inspected before cropping.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per annotation with the REFNUM, lesion number, severity, clipped box and the Valid, Clipped and Outside flags.
+        """
 
-        Asterisks = 60;
+        return self.__Plan
 
-        # * Columns
-        Name_column = 0;
-        Severity = 3;
-        X_column = 4;
-        Y_column = 5;
-        Radius = 6;
+    # * Stage timings of the last run
+    def get_profiler(self) -> StageProfiler:
+        """
+        Return the per-stage timings of the last CropMIAS call.
 
-        # * Labels
-        Benign = 0;
-        Malignant = 1;
-        Normal = 2;
+        Returns
+        -------
+        StageProfiler
+            The profiler with the per-image timings, summary and captures.
+        """
 
-        # * Initial index
-        Index = 1;
-        
-        # * Using sort function
-        Sorted_files, Total_images = self.Image_sorter.sort_images();
-        Count = 1;
+        return self.__Profiler
+
+    # * Splits of the images
+    def get_splits(self) -> pd.DataFrame:
+        """
+        Return the split of every image.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per REFNUM with the columns REFNUM, Group, Stratum and Split (see DatasetSplitter.split),
+            None without split.
+        """
+
+        return self.__Splits
+
+    # * Results of the last run
+    def get_results(self) -> list[dict]:
+        """
+        Return the per-image results of the last CropMIAS call.
+
+        Returns
+        -------
+        list[dict]
+            One dictionary per cropped image with the keys 'File', 'Success', 'Outputs', 'Shapes', 'Boxes', 'Error' and 'Time'.
+        """
+
+        return self.__Results
+
+    # * Crops of the last run
+    def get_crops(self) -> pd.DataFrame:
+        """
+        Return the coordinates of every crop of the last CropMIAS call, tiles included.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per crop with the columns REFNUM, Label, Number, Y0, Y1, X0, X1 (box in the image), Height and Width.
+        """
+
+        Rows = [];
+
+        for Result in self.__Results:
+            Refnum, _ = os.path.splitext(Result['File']);
+
+            for (Severity, Number, Y0, Y1, X0, X1), Shape in zip(Result['Boxes'], Result['Shapes']):
+                Rows.append((Refnum, CropWorker.Label_names[Severity], Number, Y0, Y1, X0, X1, Shape[0], Shape[1]));
+
+        return pd.DataFrame(Rows, columns = ['REFNUM', 'Label', 'Number', 'Y0', 'Y1', 'X0', 'X1', 'Height', 'Width'])
+
+    # ? Method to build the crop jobs of Mini-MIAS images.
+    def __build_jobs(self, Sorted_files: list[str]) -> list[dict]:
+        """
+        Build one crop job per image with every box planned for its REFNUM.
+
+        Parameters
+        ----------
+        Sorted_files : list[str]
+            The sorted image file names.
+
+        Returns
+        -------
+        list[dict]
+            The jobs consumed by CropWorker.crop_image.
+        """
+
+        # * Folders for each label, tumors are also saved in the tumor folder
+        Folders = {
+            CropWorker.Benign: [self.__Benignfolder, self.__Tumorfolder],
+            CropWorker.Malignant: [self.__Malignantfolder, self.__Tumorfolder],
+            CropWorker.Normal: [self.__Normalfolder],
+        };
+
+        Jobs = [];
+        Ignored_formats = set();
 
-        # * Reading the files
         for File in Sorted_files:
-        
+
             Filename, Format = os.path.splitext(File);
+            Boxes = self.__Index.get(Filename);
+
+            if len(Boxes) == 0:
+                continue;
+
+            # * The crops keep the format of the source unless one is given
+            Format = self.Format or Format;
+            Params = self.Encoder.params(Format);
+
+            if self.Encoder.Values and not Params:
+                Ignored_formats.add(Format);
+
+            # * Split and shard subfolders of the image
+            Job_folders = Folders;
+
+            if self.Splitter is not None:
+                Subfolders = [self.__Split_of[Filename]] + ([f"{DatasetSplitter.shard(Filename, self.Shards):03d}"] if self.Shards else []);
+                Job_folders = {Label: [os.path.join(Folder, *Subfolders) for Folder in Label_folders if Folder is not None] for Label, Label_folders in Folders.items()};
+
+            Jobs.append({
+                'File': File,
+                'Folder': self.Folder_path,
+                'Boxes': Boxes,
+                'Height': self.__Planner.Height,
+                'Flags': self.Flags,
+                'Folders': Job_folders,
+                'Link': self.Link,
+                'Format': Format,
+                'Params': Params,
+                'Store': self.Store is not None,
+                'Normalizer': self.Normalizer,
+                'Tiler': self.Tiler,
+                'Tissue': self.Tissue,
+                'Tissue_policy': self.Tissue_policy,
+                'Min_tissue': self.Min_tissue,
+                'Auto_center': self.Auto_center,
+                'Shapes': self.Shapes,
+                'Cache': self.Image_cache,
+            });
+
+        # * A profile has no setting for formats such as '.pgm', the crops would silently use the OpenCV defaults
+        if Ignored_formats and self.Store is None:
+            warnings.warn(f"Encode settings {self.Encoder.Values} do not apply to {sorted(Ignored_formats)} crops, give format = '.png' or another supported format");
+
+        return Jobs
+
+    # * Background tissue and abnormality class of every REFNUM, for the store metadata
+    def __image_info(self) -> dict[str, dict]:
+
+        Columns = [Column for Column in ('BG', 'CLASS') if Column in self.__Dataframe.columns];
+        Info = self.__Dataframe.drop_duplicates(CropPlanner.Refnum_column).set_index(CropPlanner.Refnum_column)[Columns];
+
+        return Info.to_dict(orient = 'index')
+
+    # * Parameters that affect the outputs of a job
+    @staticmethod
+    def __job_params(Job: dict) -> dict:
+        return {
+            'Boxes': Job['Boxes'].tolist(),
+            'Height': Job['Height'],
+            'Flags': Job['Flags'],
+            'Normalizer': None if Job['Normalizer'] is None else [Job['Normalizer'].Size, Job['Normalizer'].Policy, Job['Normalizer'].Pad_mode],
+            'Tiler': None if Job['Tiler'] is None else [Job['Tiler'].Mode, Job['Tiler'].Size, Job['Tiler'].Stride, Job['Tiler'].Count, Job['Tiler'].Seed, Job['Tiler'].Min_tissue],
+            'Tissue': None if Job['Tissue'] is None else [Job['Tissue'].Side, Job['Tissue_policy'], Job['Min_tissue'], Job['Auto_center'], Job['Shapes']],
+            'Folders': Job['Folders'],
+            'Link': Job['Link'],
+            'Format': Job['Format'],
+            'Params': Job['Params'],
+        }
+
+    # ? Method to crop Mini-MIAS images.
+    def CropMIAS(self) -> dict:
+        """
+        Crop the Mini-MIAS images according to the coordinates of the dataframe.
+
+        The images are cropped by a pool of ``workers`` processes. Each result is
+        gathered in the same order as the sorted files, so the output names do not
+        depend on the scheduling.
+
+        Returns
+        -------
+        dict
+            Summary of the run with the keys 'Total', 'Cropped', 'Failed', 'Skipped', 'Up_to_date', 'Crops', 'Rejected' (crops without enough tissue), 'Time', 'Throughput' (images/s),
+            'Cache' (memory hits, disk hits, misses and evictions, with an image cache) and, in pipelined mode,
+            'Utilization' (stage -> busy share of its workers).
+        """
+
+        os.chdir(self.Folder_path);
+
+        self.__Profiler = StageProfiler(Data.Crop_MIAS_name);
+        Run_stages = dict(self.__Plan_stages);
+
+        # * Using sort function
+        with StageProfiler.stage(Run_stages, 'list'):
+            Sorted_files, Total_images = self.Image_sorter.sort_images();
+
+        with StageProfiler.stage(Run_stages, 'plan'):
+            Jobs = self.__build_jobs(Sorted_files);
+
+        for Name, Seconds in Run_stages.items():
+            self.__Profiler.add_run_stage(Name, Seconds);
+
+        # * Incremental runs only crop new or changed images, or images whose boxes changed
+        Up_to_date = 0;
+        Incremental = self.Incremental and self.Store is None;
+
+        if Incremental:
+            Manifest_file = Manifest(self.Manifest_path, self.Use_hash);
+
+            Pending_jobs = [Job for Job in Jobs if not Manifest_file.is_up_to_date(os.path.join(Job['Folder'], Job['File']), self.__job_params(Job))];
+            Up_to_date = len(Jobs) - len(Pending_jobs);
+            Jobs = Pending_jobs;
+
+        Reporter = EventReporter(Data.Crop_MIAS_name, self.Verbosity, self.Events);
+        Reporter.start(len(Jobs));
+
+        Start_time = time.perf_counter();
+        self.__Results = [];
+
+        # * Crop in the current process or fan out the jobs across the pool,
+        # * cProfile and tracemalloc only see the current process so captured runs stay in it
+        Capture = self.Cprofile or self.Tracemalloc;
+
+        Executor = None;
+        Runner = None;
+
+        if self.Pipeline and not Capture:
+            Runner = Pipeline(readers = self.Readers, workers = self.Workers, writers = self.Writers, queue_size = self.Queue_size);
+        elif self.Workers > 1 and len(Jobs) > 1 and not Capture:
+            Executor = ProcessPoolExecutor(max_workers = self.Workers);
+
+        # * One packed store per split
+        Stores = {};
+
+        if self.Store is not None:
+            Stores = {Name: PatchStore(os.path.join(self.Store, Name), mode = 'w') for Name in self.Splitter.Fractions} if self.Splitter is not None else {None: PatchStore(self.Store, mode = 'w')};
+
+        Image_info = self.__image_info() if Stores else {};
+
+        # * Split folders are created once, the workers only write into them
+        if self.Splitter is not None and not Stores:
+            for Folder in {Folder for Job in Jobs for Label_folders in Job['Folders'].values() for Folder in Label_folders}:
+                os.makedirs(Folder, exist_ok = True);
+
+        Completed = False;
+
+        try:
+            with self.__Profiler.capture(self.Cprofile, self.Tracemalloc):
+
+                # * Reads, crops and writes overlap, the results keep the order of the jobs
+                if Runner is not None:
+                    Results = (Result for _, Result in Runner.run(Jobs, lambda Job: os.path.join(Job['Folder'], Job['File']), CropWorker.crop_image, Ordered = True));
+                elif Executor is None:
+                    Results = map(CropWorker.crop_image, Jobs);
+                else:
+                    Chunksize = max(1, len(Jobs) // (self.Workers * 4));
+                    Results = Executor.map(CropWorker.crop_image, Jobs, chunksize = Chunksize);
+
+                for Result in Results:
+                    self.__Results.append(Result);
+                    Reporter.update(Result['File'], Result['Success'], Result['Time'], Result['Error'], crops = len(Result['Shapes']));
+                    self.__Profiler.add(Result['File'], Result['Stages']);
+
+                    if Stores:
+                        Refnum, _ = os.path.splitext(Result['File']);
+                        Split = self.__Split_of.get(Refnum);
+                        Store = Stores[Split];
+
+                        for Severity, Number, (Y0, Y1, X0, X1), Patch in Result.pop('Patches'):
+                            Store.add(
+                                Patch,
+                                REFNUM = Refnum,
+                                Label = CropWorker.Label_names[Severity],
+                                Severity = Severity,
+                                **Image_info.get(Refnum, {}),
+                                **({'Split': Split} if Split is not None else {}),
+                                Number = Number,
+                                Y0 = Y0, Y1 = Y1, X0 = X0, X1 = X1,
+                            );
+
+            Completed = True;
+
+        finally:
+            if Executor is not None:
+                Executor.shutdown();
+
+            # * A failed run never moves a partial store into place
+            for Store in Stores.values():
+                if Completed:
+                    Store.close();
+                else:
+                    Store.abort();
+
+        Elapsed_time = time.perf_counter() - Start_time;
+
+        if Incremental:
+            for Job, Result in zip(Jobs, self.__Results):
+                Source = os.path.join(Job['Folder'], Job['File']);
+
+                if Result['Success']:
+                    Manifest_file.update(Source, self.__job_params(Job), Result['Outputs']);
+                else:
+                    Manifest_file.remove(Source);
+
+            Manifest_file.save();
+
+        Cropped = sum(1 for Result in self.__Results if Result['Success']);
+
+        Summary = {
+            'Total': Total_images,
+            'Cropped': Cropped,
+            'Failed': len(self.__Results) - Cropped,
+            'Skipped': Total_images - len(Jobs) - Up_to_date,
+            'Up_to_date': Up_to_date,
+            'Crops': sum(len(Result['Shapes']) for Result in self.__Results),
+            'Rejected': sum(len(Result['Rejected']) for Result in self.__Results),
+            'Time': Elapsed_time,
+            'Throughput': len(Jobs) / Elapsed_time if Elapsed_time > 0 else 0.0,
+        };
+
+        if self.Image_cache is not None:
+            Summary['Cache'] = ImageCache.summary(self.__Results);
+
+        # * Share of the time every stage was busy, to tune the worker counts
+        if Runner is not None:
+            Summary['Utilization'] = {Stage: Values['Utilization'] for Stage, Values in Runner.utilization().items()};
+
+        Reporter.close(Summary);
+
+        if self.Profile_stages:
+            Reporter.message(self.__Profiler.table(), EventReporter.QUIET);
+
+        if self.Profile_output is not None:
+            self.__Profiler.dump(self.Profile_output);
+
+        return Summary
+
+    # ? Method to stream the crops of Mini-MIAS images.
+    def iter_crops(self, prefetch: int = 2) -> Iterator[tuple[str, int, np.ndarray]]:
+        """
+        Yield the crops of the Mini-MIAS images without writing any file.
+
+        The images are decoded lazily in the order of the sorted files. With ``prefetch``
+        greater than zero a background thread decodes up to that many images ahead of
+        the consumer (OpenCV releases the GIL while decoding).
+
+        Parameters
+        ----------
+        prefetch : int
+            Number of decoded images kept ahead of the consumer, 0 decodes in the calling thread (default is 2).
+
+        Yields
+        ------
+        tuple[str, int, np.ndarray]
+            The REFNUM, the label (0 benign, 1 malignant, 2 normal) and a copy of the crop.
+
+        Raises
+        ------
+        OSError
+            If an image cannot be read.
+
+        Example
+        -------
+        for Refnum, Label, Crop in Crop_images.iter_crops(prefetch = 4):
+            Batch.append(Crop);
+        """
+
+        Sorted_files, _ = self.Image_sorter.sort_images();
+        Jobs = self.__build_jobs(Sorted_files);
+
+        # * Decode in the calling thread
+        if prefetch <= 0:
+            for Job in Jobs:
+                Image = self.__read(Job);
+                yield from self.__yield_crops(Job, Image);
+            return
+
+        Decoded = queue.Queue(maxsize = prefetch);
+        Stop = threading.Event();
+
+        def Put(Item) -> bool:
+            # * Wait for room unless the consumer stopped iterating
+            while not Stop.is_set():
+                try:
+                    Decoded.put(Item, timeout = 0.1);
+                    return True
+                except queue.Full:
+                    continue;
+            return False
+
+        def Reader() -> None:
+            for Job in Jobs:
+                try:
+                    Item = (Job, self.__read(Job));
+                except Exception as e:
+                    Item = (Job, e);
+
+                if not Put(Item):
+                    return;
+
+            Put(None);
+
+        Thread = threading.Thread(target = Reader, name = 'CropImages-prefetch', daemon = True);
+        Thread.start();
+
+        try:
+            while True:
+                Item = Decoded.get();
+
+                if Item is None:
+                    break;
+
+                Job, Image = Item;
+
+                if isinstance(Image, Exception):
+                    raise Image;
+
+                yield from self.__yield_crops(Job, Image);
+
+        finally:
+            Stop.set();
+            Thread.join();
+
+    # * Decoded image of a job, through the cache when there is one
+    def __read(self, Job: dict) -> np.ndarray:
+
+        Path_file = os.path.join(Job['Folder'], Job['File']);
+
+        return self.Image_cache.read(Path_file, Job['Flags']) if self.Image_cache is not None else ImageReader.read(Path_file, Job['Flags'])
+
+    # * Crops of a decoded image
+    def __yield_crops(self, Job: dict, Image: np.ndarray) -> Iterator[tuple[str, int, np.ndarray]]:
+        """
+        Yield the REFNUM, label and crop of every box of a decoded image.
+
+        The crops are copied so the decoded image can be released once its boxes are consumed.
+        """
+
+        Refnum, _ = os.path.splitext(Job['File']);
+
+        Crops, _ = CropWorker.crops(Image, Job);
 
-            print("*" * Asterisks);
-            print(self.__Dataframe.iloc[Index - 1, Name_column]);
-            print(Filename);
-            print("*" * Asterisks);
-
-            if self.__Dataframe.iloc[Index - 1, Severity] == Benign:
-                if self.__Dataframe.iloc[Index - 1, X_column] > 0  or self.__Dataframe.iloc[Index - 1, Y_column] > 0:
-                
-                    try:
-                    
-                        print(f"Working with {Count} of {Total_images} {Format} Benign images, {Filename} X: {self.__Dataframe.iloc[Index - 1, X_column]} Y: {self.__Dataframe.iloc[Index - 1, Y_column]}")
-                        print(self.__Dataframe.iloc[Index - 1, Name_column], " ------ ", Filename, " ✅")
-                        Count += 1
-
-                        # * Reading the image
-                        Path_file = os.path.join(self.Folder_path, File)
-                        Image = cv2.imread(Path_file)
-                        
-                        #Distance = self.Shape # X and Y.
-                        #Distance = self.Shape # Perimetro de X y Y de la imagen.
-                        #Image_center = Distance / 2 
-                            
-                        # * Obtaining the center using the radius
-                        Image_center = (self.__Dataframe.iloc[Index - 1, Radius] / 2);
-
-                        # * Obtaining dimension
-                        Height_Y = Image.shape[0] ;
-                        #print(Image.shape[0]);
-                        #print(self.__Dataframe.iloc[Index - 1, Radius]);
-
-                        # * Extract the value of X and Y of each image
-                        X_size = self.__Dataframe.iloc[Index - 1, X_column];
-                        Y_size = self.__Dataframe.iloc[Index - 1, Y_column];
-                            
-                        # * Extract the value of X and Y of each image
-                        XDL = (X_size - Image_center);
-                        XDM = (X_size + Image_center);
-                            
-                        # * Extract the value of X and Y of each image
-                        YDL = (Height_Y - Y_size - Image_center);
-                        YDM = (Height_Y - Y_size + Image_center);
-
-                        # * Cropped image
-                        Cropped_Image = Image[int(YDL):int(YDM), int(XDL):int(XDM)]
-
-                        print(Image.shape, " ----------> ", Cropped_Image.shape)
-
-                        New_name_filename = Filename + '_Benign_cropped' + Format
-
-                        New_folder = os.path.join(self.__Benignfolder, New_name_filename)
-                        cv2.imwrite(New_folder, Cropped_Image)
-
-                        New_folder = os.path.join(self.__Tumorfolder, New_name_filename)
-                        cv2.imwrite(New_folder, Cropped_Image)
-
-                    except OSError:
-                            print(f"Cannot convert {File} ❌, {str(e)}");
-
-            elif self.__Dataframe.iloc[Index - 1, Severity] == Malignant:
-                if self.__Dataframe.iloc[Index - 1, X_column] > 0  or self.__Dataframe.iloc[Index - 1, Y_column] > 0:
-
-                    try:
-
-                        print(f"Working with {Count} of {Total_images} {Format} Malignant images, {Filename} X {self.__Dataframe.iloc[Index - 1, X_column]} Y {self.__Dataframe.iloc[Index - 1, Y_column]}")
-                        print(self.__Dataframe.iloc[Index - 1, Name_column], " ------ ", Filename, " ✅")
-                        Count += 1
-
-                        # * Reading the image
-                        Path_file = os.path.join(self.__Folder, File)
-                        Image = cv2.imread(Path_file)
-                        
-                        #Distance = self.Shape # X and Y.
-                        #Distance = self.Shape # Perimetro de X y Y de la imagen.
-                        #Image_center = Distance / 2 
-                            
-                        # * Obtaining the center using the radius
-                        Image_center = self.__Dataframe.iloc[Index - 1, Radius] / 2 # Center
-                        # * Obtaining dimension
-                        Height_Y = Image.shape[0] 
-                        print(Image.shape[0])
-
-                        # * Extract the value of X and Y of each image
-                        X_size = self.__Dataframe.iloc[Index - 1, X_column]
-                        Y_size = self.__Dataframe.iloc[Index - 1, Y_column]
-                            
-                        # * Extract the value of X and Y of each image
-                        XDL = X_size - Image_center
-                        XDM = X_size + Image_center
-                            
-                        # * Extract the value of X and Y of each image
-                        YDL = Height_Y - Y_size - Image_center
-                        YDM = Height_Y - Y_size + Image_center
-
-                        # * Cropped image
-                        Cropped_Image_Malig = Image[int(YDL):int(YDM), int(XDL):int(XDM)]
-
-                        print(Image.shape, " ----------> ", Cropped_Image_Malig.shape)
-                
-                        # print(Cropped_Image_Malig.shape)
-                        # Display cropped image
-                        # cv2_imshow(cropped_image)
-
-                        New_name_filename = Filename + '_Malignant_cropped' + Format
-
-                        New_folder = os.path.join(self.__Malignantfolder, New_name_filename)
-                        cv2.imwrite(New_folder, Cropped_Image_Malig)
-
-                        New_folder = os.path.join(self.__Tumorfolder, New_name_filename)
-                        cv2.imwrite(New_folder, Cropped_Image_Malig)
-
-                        #Images.append(Cropped_Image_Malig)
-
-
-                    except OSError:
-                        print(f"Cannot convert {File} ❌, {str(e)}");
-            
-            elif self.__Dataframe.iloc[Index - 1, Severity] == Normal:
-                if self.__Dataframe.iloc[Index - 1, X_column] == 0  or self.__Dataframe.iloc[Index - 1, Y_column] == 0:
-
-                    try:
-
-                        print(f"Working with {Count} of {Total_images} {Format} Normal images, {Filename}")
-                        print(self.__Dataframe.iloc[Index - 1, Name_column], " ------ ", Filename, " ✅")
-                        Count += 1
-
-                        Path_file = os.path.join(self.__Folder, File)
-                        Image = cv2.imread(Path_file)
-
-                        Distance = self.__Shapes # Perimetro de X y Y de la imagen.
-                        Image_center = Distance / 2 # Centro de la imagen.
-                        #CD = self.df.iloc[Index - 1, Radius] / 2
-                        # * Obtaining dimension
-                        Height_Y = Image.shape[0] 
-                        print(Image.shape[0])
-
-                        # * Extract the value of X and Y of each image
-                        X_size = self.__X_mean
-                        Y_size = self.__Y_mean
-                            
-                        # * Extract the value of X and Y of each image
-                        XDL = X_size - Image_center
-                        XDM = X_size + Image_center
-                            
-                        # * Extract the value of X and Y of each image
-                        YDL = Height_Y - Y_size - Image_center
-                        YDM = Height_Y - Y_size + Image_center
-
-                        # * Cropped image
-                        Cropped_Image_Normal = Image[int(YDL):int(YDM), int(XDL):int(XDM)]
-
-                        # * Comparison two images
-                        print(Image.shape, " ----------> ", Cropped_Image_Normal.shape)
-                    
-                        New_name_filename = Filename + '_Normal_cropped' + Format
-
-                        New_folder = os.path.join(self.__Normalfolder, New_name_filename)
-                        cv2.imwrite(New_folder, Cropped_Image_Normal)
-
-                        #Images.append(Cropped_Image_Normal)
-
-                    except OSError as e:
-                        print(f"Cannot convert {File} ❌, {str(e)}");
-
-            Index += 1   
\ No newline at end of file
+        for Severity, _, _, Cropped_Image in Crops:
+            yield Refnum, Severity, Cropped_Image.copy()
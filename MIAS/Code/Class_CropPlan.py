@@ -0,0 +1,157 @@
+# ? Class for planning the crops of Mini-MIAS images.
+import numpy as np
+import pandas as pd
+
+from Class_CropWorker import CropWorker
+
+class CropPlanner:
+    """
+    A class used to compute every crop rectangle of the Mini-MIAS annotations at once.
+
+    Lesion boxes are centered on X/Y with the RADIUS as side, normal boxes are centered
+    on Xmean/Ymean with Shapes as side. The coordinates of the annotations start at the
+    bottom-left corner, so Y is flipped with the image height. Every box is computed with
+    NumPy array operations over the whole dataframe, clipped to the image bounds and
+    flagged when it falls partially (Clipped) or completely (Outside) out of the image.
+
+    Methods
+    -------
+    plan(Dataframe)
+        Returns the crop plan of the dataframe as a table.
+
+    Attributes
+    ----------
+    Shapes : int
+        The size of the cropped normal images.
+    X_mean : int
+        The x-coordinate of the center of the normal crops.
+    Y_mean : int
+        The y-coordinate of the center of the normal crops.
+    Height : int
+        The height of the images (default is 1024).
+    Width : int
+        The width of the images (default is 1024).
+
+    Example
+    -------
+    Planner = CropPlanner(Shapes = 50, Xmean = 200, Ymean = 400);
+    Plan = Planner.plan(Dataframe);
+    print(Plan[Plan['Clipped']]);
+    """
+
+    # * Columns of the dataframe
+    Refnum_column = 'REFNUM';
+    Severity_column = 'SEVERITY';
+    X_column = 'X';
+    Y_column = 'Y';
+    Radius_column = 'RADIUS';
+
+    # * Severity letters used by Info.csv
+    Severity_letters = {'B': CropWorker.Benign, 'M': CropWorker.Malignant};
+
+    # * Initializing (Constructor)
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters
+        ----------
+        Shapes : int
+            The size of the cropped normal images.
+        Xmean : int
+            The x-coordinate of the center of the normal crops.
+        Ymean : int
+            The y-coordinate of the center of the normal crops.
+        Height : int
+            The height of the images (default is 1024).
+        Width : int
+            The width of the images (default is 1024).
+        """
+
+        self.Shapes = kwargs.get('Shapes', None);
+        self.X_mean = kwargs.get('Xmean', None);
+        self.Y_mean = kwargs.get('Ymean', None);
+
+        self.Height: int = kwargs.get('Height', 1024);
+        self.Width: int = kwargs.get('Width', 1024);
+
+    # * Class description
+    def __str__(self) -> str:
+        """
+        Return a string description of the CropPlanner object.
+
+        Returns:
+        ----------
+        str
+            A string description of the CropPlanner object.
+        """
+
+        return f'''{self.__class__.__name__}:A class used to compute the crop rectangles of the Mini-MIAS annotations.''';
+
+    # ? Method to compute the crop plan.
+    def plan(self, Dataframe: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compute the crop rectangle of every row of the dataframe.
+
+        Parameters
+        ----------
+        Dataframe : pd.DataFrame
+            The dataframe with the REFNUM, SEVERITY, X, Y and RADIUS columns.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per annotation with the columns REFNUM, Number (lesion number inside the image),
+            Severity, Y0, Y1, X0, X1 (clipped, end exclusive), Valid, Clipped and Outside.
+        """
+
+        Severity = Dataframe[self.Severity_column];
+
+        # * Info.csv stores B/M/blank, the crop labels are 0/1/2
+        if not pd.api.types.is_numeric_dtype(Severity):
+            Severity = Severity.map(self.Severity_letters);
+
+        Severity = Severity.fillna(CropWorker.Normal).to_numpy(dtype = np.int8);
+        X_size = Dataframe[self.X_column].fillna(0).to_numpy(dtype = np.float64);
+        Y_size = Dataframe[self.Y_column].fillna(0).to_numpy(dtype = np.float64);
+        Radius = Dataframe[self.Radius_column].fillna(0).to_numpy(dtype = np.float64);
+
+        Is_lesion = (Severity == CropWorker.Benign) | (Severity == CropWorker.Malignant);
+        Is_normal = Severity == CropWorker.Normal;
+
+        # * Lesions need coordinates, normal images must not have them
+        Valid = (Is_lesion & ((X_size > 0) | (Y_size > 0))) | (Is_normal & ((X_size == 0) | (Y_size == 0)));
+
+        # * Obtaining the center using the radius or the global shape
+        Normal_center = (self.Shapes or 0) / 2;
+
+        Image_center = np.where(Is_normal, Normal_center, Radius / 2);
+        X_center = np.where(Is_normal, self.X_mean or 0, X_size);
+        Y_center = np.where(Is_normal, self.Y_mean or 0, Y_size);
+
+        # * Extract the value of X and Y of each box, the y-axis starts at the bottom
+        XDL = np.trunc(X_center - Image_center).astype(np.int32);
+        XDM = np.trunc(X_center + Image_center).astype(np.int32);
+        YDL = np.trunc(self.Height - Y_center - Image_center).astype(np.int32);
+        YDM = np.trunc(self.Height - Y_center + Image_center).astype(np.int32);
+
+        X0 = np.clip(XDL, 0, self.Width);
+        X1 = np.clip(XDM, 0, self.Width);
+        Y0 = np.clip(YDL, 0, self.Height);
+        Y1 = np.clip(YDM, 0, self.Height);
+
+        Outside = (X1 <= X0) | (Y1 <= Y0);
+        Clipped = ~Outside & ((X0 != XDL) | (X1 != XDM) | (Y0 != YDL) | (Y1 != YDM));
+
+        Plan = pd.DataFrame({
+            self.Refnum_column: Dataframe[self.Refnum_column].astype(str).to_numpy(),
+            'Number': Dataframe.groupby(self.Refnum_column, sort = False).cumcount().to_numpy(dtype = np.int32),
+            'Severity': Severity,
+            'Y0': Y0,
+            'Y1': Y1,
+            'X0': X0,
+            'X1': X1,
+            'Valid': Valid,
+            'Clipped': Clipped,
+            'Outside': Outside,
+        });
+
+        return Plan
@@ -0,0 +1,269 @@
+# ? Functions executed by the crop process pool.
+import os
+import time
+import numpy as np
+
+from typing import Iterator
+
+from Class_ImageReader import ImageReader
+from Class_ImageWriter import ImageWriter
+from Class_StageProfiler import StageProfiler
+from Class_PatchNormalizer import PatchNormalizer
+from Class_PatchTiler import PatchTiler
+from Class_TissueMask import TissueMask
+
+class CropWorker:
+    """
+    A class that groups the functions used to crop a single Mini-MIAS image.
+
+    The methods are static so they can be pickled and sent to the worker
+    processes of a ``concurrent.futures.ProcessPoolExecutor``.
+
+    Methods
+    -------
+    crop_boxes(Image, Boxes, Height)
+        Yields the crop of every box of an image.
+    crops(Image, Job)
+        Returns the crops of a job, checked against the tissue, tiled and normalized.
+    crop_image(Job)
+        Reads, crops and writes the image described by the job.
+
+    Attributes
+    ----------
+    Benign : int
+        Label used for benign lesions.
+    Malignant : int
+        Label used for malignant lesions.
+    Normal : int
+        Label used for normal images.
+    """
+
+    # * Labels
+    Benign = 0;
+    Malignant = 1;
+    Normal = 2;
+
+    # * Names used for the output files
+    Label_names = {Benign: 'Benign', Malignant: 'Malignant', Normal: 'Normal'};
+
+    # ? Crop the boxes of an image.
+    @staticmethod
+    def crop_boxes(Image: np.ndarray, Boxes: np.ndarray, Height: int) -> Iterator[tuple[int, int, tuple[int, int, int, int], np.ndarray]]:
+        """
+        Yield the crop of every box of an image.
+
+        The boxes are planned for an image of 'Height' rows; if the decoded image is
+        taller or shorter the boxes are shifted (the y-axis starts at the bottom) and
+        clipped again.
+
+        Parameters
+        ----------
+        Image : np.ndarray
+            The decoded image.
+        Boxes : np.ndarray
+            The LesionIndex records of the image.
+        Height : int
+            The height used to plan the boxes.
+
+        Yields
+        ------
+        tuple[int, int, tuple[int, int, int, int], np.ndarray]
+            The severity, the lesion number, the box (Y0, Y1, X0, X1) in the image and the crop (a view of the image).
+        """
+
+        # * Obtaining dimension
+        Height_Y, Width_X = Image.shape[:2];
+        Offset = Height_Y - Height;
+
+        for Severity, Number, Y0, Y1, X0, X1 in Boxes:
+
+            if Offset != 0:
+                Y0 = min(max(Y0 + Offset, 0), Height_Y);
+                Y1 = min(max(Y1 + Offset, 0), Height_Y);
+            X1 = min(X1, Width_X);
+
+            # * Cropped image
+            yield int(Severity), int(Number), (int(Y0), int(Y1), int(X0), int(X1)), Image[Y0:Y1, X0:X1]
+
+    # ? Crops of a job.
+    @staticmethod
+    def crops(Image: np.ndarray, Job: dict) -> tuple[list[tuple[int, int, tuple[int, int, int, int], np.ndarray]], list[tuple[int, int, tuple[int, int, int, int]]]]:
+        """
+        Return the crops of a decoded image for a job.
+
+        With a 'Tissue' mask, 'Auto_center' moves the normal box onto the point deepest
+        inside the tissue, and the 'Tissue_policy' rejects ('reject') or moves onto the
+        nearest tissue ('recenter') the crops whose tissue fraction is below 'Min_tissue'.
+        With a 'Tiler' the normal box of the image is replaced by the patches of the
+        tiler, numbered from 0. With a 'Normalizer' every crop is brought to a fixed side.
+
+        Parameters
+        ----------
+        Image : np.ndarray
+            The decoded image.
+        Job : dict
+            The job of the image (see crop_image).
+
+        Returns
+        -------
+        tuple[list, list]
+            The severity, the number, the box (Y0, Y1, X0, X1) and the crop of every patch,
+            and the severity, the number and the box of every rejected crop.
+        """
+
+        Tiler: PatchTiler = Job.get('Tiler');
+        Normalizer: PatchNormalizer = Job.get('Normalizer');
+        Tissue: TissueMask = Job.get('Tissue');
+        Policy = Job.get('Tissue_policy');
+
+        # * Segmented once per image, at low resolution
+        Mask = Tissue.get(Image, os.path.join(Job['Folder'], Job['File'])) if Tissue is not None else None;
+
+        Crops = [];
+        Rejected = [];
+
+        for Severity, Number, Box, Cropped_Image in CropWorker.crop_boxes(Image, Job['Boxes'], Job['Height']):
+
+            if Severity == CropWorker.Normal:
+
+                # * Many normal patches from the same decode
+                if Tiler is not None:
+                    Refnum, _ = os.path.splitext(Job['File']);
+                    Tiles = Tiler.tile(Image, Refnum, TissueMask.full(Mask, Image.shape) if Mask is not None else None);
+                    Crops.extend((Severity, i, Tile_box, Tile) for i, (Tile_box, Tile) in enumerate(Tiles));
+                    continue;
+
+                # * Normal crop centered on the tissue instead of the global Xmean and Ymean
+                if Mask is not None and Job.get('Auto_center', False):
+                    Center = TissueMask.center(Mask, Image.shape);
+
+                    if Center is not None:
+                        Side = min(Job['Shapes'], *Image.shape[:2]);
+                        Y0 = min(max(Center[0] - Side // 2, 0), Image.shape[0] - Side);
+                        X0 = min(max(Center[1] - Side // 2, 0), Image.shape[1] - Side);
+                        Box = (Y0, Y0 + Side, X0, X0 + Side);
+                        Cropped_Image = Image[Box[0]:Box[1], Box[2]:Box[3]];
+
+            # * Crops on the background are dropped or moved onto the tissue
+            if Mask is not None and Policy is not None and TissueMask.fraction(Mask, Box, Image.shape) < Job['Min_tissue']:
+                New_box = TissueMask.recenter(Mask, Box, Image.shape, Job['Min_tissue']) if Policy == 'recenter' else None;
+
+                if New_box is None:
+                    Rejected.append((Severity, Number, Box));
+                    continue;
+
+                Box = New_box;
+                Cropped_Image = Image[Box[0]:Box[1], Box[2]:Box[3]];
+
+            Crops.append((Severity, Number, Box, Cropped_Image));
+
+        # * Fixed-size patches are produced from the decoded image, no second pass
+        if Normalizer is not None:
+            Crops = [(Severity, Number, *Normalizer.normalize(Image, Box, Cropped_Image)) for Severity, Number, Box, Cropped_Image in Crops];
+
+        return Crops, Rejected
+
+    # ? Crop a single image.
+    @staticmethod
+    def crop_image(Job: dict) -> dict:
+        """
+        Crop every box of the image described by the job and write the results into their folders.
+
+        The image is decoded once and all its boxes are cropped from the same buffer.
+        When an image has several lesions, the second and following crops get the
+        lesion number as suffix (e.g. mdb005_Benign_cropped_1.png). With a 'Normalizer'
+        every crop is brought to a fixed side in the same pass, with a 'Tiler' the normal
+        box is replaced by many patches (see crops). Jobs for a PatchStore
+        return the crops in 'Patches' instead of writing them. Jobs of a Pipeline
+        carry the raw bytes in 'Data' and return the encoded outputs in 'Writes'.
+
+        Parameters
+        ----------
+        Job : dict
+            Dictionary with the keys 'File', 'Folder', 'Boxes' (LesionIndex records),
+            'Height', 'Flags' (cv2.imread flags), 'Folders' (label -> list of output folders)
+            'Link' (ImageWriter link mode), 'Format' (extension of the crops), 'Params' (encoder parameters), 'Store' (return the
+            crops instead of writing them), 'Normalizer' (PatchNormalizer of the crops, or None)
+            'Tiler' (PatchTiler of the normal patches, or None), 'Tissue' (TissueMask, or None),
+            'Tissue_policy' ('reject', 'recenter' or None), 'Min_tissue', 'Auto_center' and 'Shapes'
+            (side of the auto-centered normal crops) and 'Cache' (ImageCache, or None). Pipeline jobs add 'Data' (raw bytes) and 'Deferred'.
+
+        Returns
+        -------
+        dict
+            Result of the job with the keys 'File', 'Success', 'Outputs', 'Shapes', 'Error', 'Time',
+            'Stages' (seconds spent reading, decoding, cropping, encoding and writing), 'Boxes' (severity,
+            number, Y0, Y1, X0, X1 of every crop) and 'Patches' (severity, number, box and crop of every
+            crop, for 'Store' jobs), 'Rejected' (severity, number and box of the crops without enough tissue),
+            'Cache' (tier and evicted entries, with a cache) and 'Writes' (paths, encoded bytes and link mode of every crop, for 'Deferred' jobs).
+        """
+
+        Start_time = time.perf_counter();
+
+        Stages = dict.fromkeys(StageProfiler.Image_stages, 0.0);
+
+        Result = {'File': Job['File'], 'Success': False, 'Outputs': [], 'Shapes': [], 'Error': None, 'Time': 0.0, 'Stages': Stages, 'Boxes': [], 'Rejected': [], 'Patches': [], 'Cache': None, 'Writes': []};
+
+        Filename, Format = os.path.splitext(Job['File']);
+        Format = Job.get('Format') or Format;
+
+        try:
+
+            # * Reading the image
+            Path_file = os.path.join(Job['Folder'], Job['File']);
+
+            # * Pipelines read the bytes in their own stage
+            Data = Job.get('Data');
+
+            if isinstance(Data, Exception):
+                raise Data;
+
+            if Data is None:
+                with StageProfiler.stage(Stages, 'read'):
+                    Data = ImageReader.read_bytes(Path_file);
+
+            # * Decoded-image cache, a hit skips the decoding
+            with StageProfiler.stage(Stages, 'decode'):
+                if Job.get('Cache') is not None:
+                    Image, Tier, Evicted = Job['Cache'].decode(Data, Job['Flags'], Path_file);
+                    Result['Cache'] = (Tier, Evicted);
+                else:
+                    Image = ImageReader.decode(Data, Job['Flags'], Path_file);
+
+            with StageProfiler.stage(Stages, 'crop'):
+                Crops, Result['Rejected'] = CropWorker.crops(Image, Job);
+
+            for Severity, Number, Box, Cropped_Image in Crops:
+
+                Result['Shapes'].append(Cropped_Image.shape);
+                Result['Boxes'].append((Severity, Number, *Box));
+
+                # * Packed stores receive the pixels, copied so the image can be released
+                if Job.get('Store', False):
+                    Result['Patches'].append((Severity, Number, Box, Cropped_Image if Cropped_Image.base is None else Cropped_Image.copy()));
+                    continue;
+
+                Suffix = f"_{Number}" if Number > 0 else "";
+                New_name_filename = f"{Filename}_{CropWorker.Label_names[Severity]}_cropped{Suffix}{Format}";
+
+                # * Encoded once, the other category folders receive a link or a copy of the bytes
+                Paths = [os.path.join(Folder, New_name_filename) for Folder in Job['Folders'][Severity]];
+
+                # * Pipelines write the bytes in their own stage
+                if Job.get('Deferred', False):
+                    with StageProfiler.stage(Stages, 'encode'):
+                        Result['Writes'].append((Paths, ImageWriter.encode(Cropped_Image, Format, Job['Params']), Job['Link']));
+
+                    Result['Outputs'].extend(Paths);
+                    continue;
+
+                Result['Outputs'].extend(ImageWriter.write(Cropped_Image, Paths, Job['Link'], Job['Params'], Stages));
+
+            Result['Success'] = True;
+
+        except Exception as e:
+            Result['Error'] = str(e);
+
+        Result['Time'] = time.perf_counter() - Start_time;
+
+        return Result
@@ -13,6 +13,12 @@ class Data:
     ----------
     Change_format_name : str
         The name of the 'ChangeFormat' operation.
+    Crop_MIAS_name : str
+        The name of the 'CropMIAS' operation.
+    Sort_images_name : str
+        The name of the 'sort_images' operation.
+    Extract_features_name : str
+        The name of the 'extract' operation of DataExtractor.
 
     Example usage:
     --------------
@@ -25,4 +31,7 @@ class Data:
     Folder_data = r"MIAS\Code\Data"
     Folder_logs = r"MIAS\Code\Data\logs"
 
-    Change_format_name = "ChangeFormat"
\ No newline at end of file
+    Change_format_name = "ChangeFormat"
+    Crop_MIAS_name = "CropMIAS"
+    Sort_images_name = "SortImages"
+    Extract_features_name = "ExtractFeatures"
\ No newline at end of file
@@ -1,86 +1,561 @@
+# ? Class for extracting image and lesion features of Mini-MIAS images.
+import os
+import time
+import importlib.util
+import numpy as np
 import pandas as pd
-import logging
 
-class DataFrameRefiller:
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from Class_ImageSorter import ImageSorter
+from Class_ImageReader import ImageReader
+from Class_CropPlan import CropPlanner
+from Class_TissueMask import TissueMask
+from Class_AnnotationLoader import AnnotationLoader
+from Class_ImageCache import ImageCache
+from Class_EventReporter import EventReporter
+from Class_StageProfiler import StageProfiler
+from Class_Data import Data
+
+class DataExtractor:
     """
-    A class for refilling a Pandas DataFrame with 'None' values and saving it to a CSV file.
+    A class used to extract the features of the Mini-MIAS images into a single table.
 
-    Parameters
-    ----------
-    CSV_file_path : str
-        The path to the CSV file to be refilled.
+    Every image is decoded once and its features are computed with NumPy on the
+    whole image and on the box of every annotation (the boxes of CropPlanner).
+    The table has one row per annotation: the annotation columns (REFNUM, BG,
+    CLASS, SEVERITY, X, Y, RADIUS), the lesion Number and box, the image features
+    prefixed with 'Image_' and the crop features prefixed with 'Crop_' (NaN when
+    the annotation has no box inside the image).
 
-    Attributes
-    ----------
-    CSV_file_path : str
-        The path to the CSV file.
-    logger : Logger
-        A logger for logging messages.
+    Features
+    --------
+    Intensity
+        Mean, Std, Min, Max, percentiles (P5, P25, ...), Entropy and a normalized
+        histogram (Hist_0 ... Hist_<bins - 1>), on the full range of the image dtype.
+    Texture
+        Gradient (mean absolute difference of neighbouring pixels) and the Contrast,
+        Homogeneity, Energy and Correlation of the gray-level co-occurrence matrix
+        of the horizontal and vertical neighbours, quantized to 'levels' gray levels.
+    Tissue
+        Tissue_fraction (TissueMask), and for the image the mean and std inside the tissue.
+    Lesion contrast
+        Crop_Ring_mean, the mean of a ring of 'ring' box sides around the box, and
+        Crop_Lesion_contrast (Crop_Mean - Crop_Ring_mean) and Crop_Lesion_ratio.
+
+    The images are processed by a pool of 'workers' processes that only receive
+    the path and the boxes of an image and return its features.
 
     Methods
     -------
-    refill_dataframe()
-        Refills the DataFrame with 'None' values and saves it to the CSV file.
-
-    Raises
-    ------
-    FileNotFoundError
-        If the CSV file is not found.
-    Exception
-        If an error occurs during the operation.
+    extract()
+        Extracts the features of every image and writes the table.
+    get_features()
+        Returns the table of the last run.
+    get_results()
+        Returns the per-image results of the last run.
+    statistics(Pixels, Maximum, Bins, Percentiles)
+        Returns the intensity features of pixels.
+    texture(Image, Maximum, Levels)
+        Returns the texture features of an image.
+    extract_image(Job)
+        Reads an image and returns its features.
 
     Example
     -------
-    CSV_file_path = 'your_csv_file.csv';
-    RF = DataFrameRefiller(CSV_file_path);
-    RF.refill_dataframe();
+    Extractor = DataExtractor(folder = 'MIAS', annotations = 'MIAS/Info.txt', output = 'Features.csv', workers = 8);
+    Summary = Extractor.extract();
+    Features = Extractor.get_features();
     """
 
-    def __init__(self, CSV_file_path):
+    # * Columns of the annotations kept in the table
+    Annotation_columns = AnnotationLoader.Columns;
+
+    # * Initializing (Constructor)
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters
+        ----------
+        folder : str
+            Path to the folder containing the images.
+        annotations : str
+            The 'Info.txt' or 'Info.csv' file, loaded with AnnotationLoader (default is None).
+        Dataframe : pd.DataFrame
+            The annotations, instead of the annotations file.
+        output : str
+            The '.csv' or '.parquet' file receiving the table (default is None, not written).
+        Shapes : int
+            The side of the boxes of the normal images (default is None, normal images have no crop features).
+        Xmean : int
+            The x-coordinate of the center of the normal boxes.
+        Ymean : int
+            The y-coordinate of the center of the normal boxes.
+        Height : int
+            The height of the images used to plan the boxes (default is 1024).
+        Width : int
+            The width of the images used to plan the boxes (default is 1024).
+        anydepth : bool
+            Keep 16-bit sources in 16 bits (default is True).
+        bins : int
+            Bins of the intensity histograms (default is 16).
+        percentiles : tuple[int]
+            Percentiles of the intensity (default is (5, 25, 50, 75, 95)).
+        levels : int
+            Gray levels of the co-occurrence matrices (default is 16).
+        ring : float
+            Width of the ring around a box, in box sides (default is 0.5).
+        mask_side : int
+            Longest side of the low-resolution tissue masks (default is 256).
+        image_cache : str or bool
+            Decode every image content once through an ImageCache, a folder or True for memory only (default is None, no cache).
+        image_cache_bytes : int
+            Bound of the memory tier of the ImageCache in each process (default is 512 MiB).
+        workers : int
+            Number of processes (default is the number of CPUs).
+        verbosity : int
+            Console verbosity, one of the EventReporter levels (default is EventReporter.PROGRESS).
+        events : str
+            Path of a JSON-lines events file (default is None).
+        profile_stages : bool
+            Print the per-stage timings after the run (default is False).
+
+        Raises
+        ------
+        ValueError
+            If no annotations are given or the output format is not supported.
+        ImportError
+            If the output is '.parquet' and neither pyarrow nor fastparquet is installed.
+        """
+
+        self.Folder_path: str = kwargs.get('folder', None);
+
+        # * Typed annotations, parsed once and cached next to the source
+        self.__Dataframe: pd.DataFrame = kwargs.get('Dataframe', None);
+
+        if self.__Dataframe is None and kwargs.get('annotations', None) is not None:
+            self.__Dataframe = AnnotationLoader().load(kwargs.get('annotations'));
+
+        if self.__Dataframe is None:
+            raise ValueError("Annotations do not exist, give 'annotations' or 'Dataframe'");
+
+        self.__Dataframe = self.__Dataframe.reset_index(drop = True);
+
+        self.Output: Optional[str] = kwargs.get('output', None);
+
+        if self.Output is not None and os.path.splitext(self.Output)[1].lower() not in ('.csv', '.parquet'):
+            raise ValueError(f"Output {self.Output} incompatible, it must be: ('.csv', '.parquet')");
+
+        # * A missing parquet engine fails here, not after every image is extracted
+        if self.Output is not None and self.Output.lower().endswith('.parquet'):
+            if not any(importlib.util.find_spec(Engine) is not None for Engine in ('pyarrow', 'fastparquet')):
+                raise ImportError(f"Output {self.Output} needs a parquet engine, install pyarrow or fastparquet");
+
+        # * Boxes of every annotation, normal boxes only when a side is given
+        self.__Planner = CropPlanner(
+            Shapes = kwargs.get('Shapes', None),
+            Xmean = kwargs.get('Xmean', None),
+            Ymean = kwargs.get('Ymean', None),
+            Height = kwargs.get('Height', 1024),
+            Width = kwargs.get('Width', 1024),
+        );
+
+        self.__Plan_stages = {};
+
+        with StageProfiler.stage(self.__Plan_stages, 'plan'):
+            self.__Plan: pd.DataFrame = self.__Planner.plan(self.__Dataframe);
+
+        # * Features are computed on the grayscale image, in its native depth
+        self.Flags: int = ImageReader.flags('grayscale', kwargs.get('anydepth', True));
+
+        self.Bins: int = kwargs.get('bins', 16);
+        self.Percentiles: tuple = tuple(kwargs.get('percentiles', (5, 25, 50, 75, 95)));
+        self.Levels: int = kwargs.get('levels', 16);
+        self.Ring: float = kwargs.get('ring', 0.5);
+        self.Mask_side: int = kwargs.get('mask_side', 256);
+
+        Image_cache = kwargs.get('image_cache', None);
+        self.Image_cache: ImageCache = ImageCache(folder = Image_cache if isinstance(Image_cache, str) else None, max_bytes = kwargs.get('image_cache_bytes', 512 << 20)) if Image_cache else None;
+
+        self.Workers: int = kwargs.get('workers', os.cpu_count() or 1);
+
+        self.Verbosity: int = kwargs.get('verbosity', EventReporter.PROGRESS);
+        self.Events: str = kwargs.get('events', None);
+        self.Profile_stages: bool = kwargs.get('profile_stages', False);
+
+        self.__Profiler = StageProfiler(Data.Extract_features_name);
+        self.__Results: list[dict] = [];
+        self.__Features: Optional[pd.DataFrame] = None;
+
+    # * Class description
+    def __str__(self) -> str:
         """
-        Initialize the DataFrameRefiller.
+        Return a string description of the DataExtractor object.
+
+        Returns:
+        ----------
+        str
+            A string description of the DataExtractor object.
+        """
+
+        return f'''{self.__class__.__name__}:A class used to extract the features of the Mini-MIAS images ({len(self.__Dataframe)} annotations).''';
+
+    # ? Method to get the features of the last run.
+    def get_features(self) -> Optional[pd.DataFrame]:
+        """
+        Return the table of the last run.
+
+        Returns
+        -------
+        pd.DataFrame, optional
+            One row per annotation with its image and crop features, None before the first run.
+        """
+
+        return self.__Features
+
+    # ? Method to get the per-image results of the last run.
+    def get_results(self) -> list[dict]:
+        """
+        Return the per-image results of the last run.
+
+        Returns
+        -------
+        list[dict]
+            One dict per image with the keys 'File', 'Success', 'Error', 'Time', 'Stages', 'Image' and 'Crops'.
+        """
+
+        return self.__Results
+
+    # ? Intensity features.
+    @staticmethod
+    def statistics(Pixels: np.ndarray, Maximum: int, Bins: int = 16, Percentiles: tuple = (5, 25, 50, 75, 95)) -> dict:
+        """
+        Return the intensity features of pixels.
 
         Parameters
         ----------
-        CSV_file_path : str
-            The path to the CSV file to be refilled.
+        Pixels : np.ndarray
+            The pixels, of any shape.
+        Maximum : int
+            The largest value of the dtype, the upper end of the histogram.
+        Bins : int
+            Bins of the histogram (default is 16).
+        Percentiles : tuple
+            Percentiles of the intensity (default is (5, 25, 50, 75, 95)).
+
+        Returns
+        -------
+        dict
+            Mean, Std, Min, Max, P<percentile>, Entropy and Hist_<bin>, empty when there are no pixels.
         """
 
-        self.CSV_file_path = CSV_file_path;
-        self.logger = logging.getLogger(__name__);
-        logging.basicConfig(level=logging.INFO);
+        Values = Pixels.ravel();
+
+        if Values.size == 0:
+            return {}
 
-    def refill_dataframe(self):
+        # * Integer binning on the full range of the dtype, the histograms of every image line up
+        Histogram = np.bincount(np.minimum((Values.astype(np.int64) * Bins) // (int(Maximum) + 1), Bins - 1), minlength = Bins) / Values.size;
+        Nonzero = Histogram[Histogram > 0];
+
+        Features = {
+            'Mean': float(Values.mean()),
+            'Std': float(Values.std()),
+            'Min': float(Values.min()),
+            'Max': float(Values.max()),
+        };
+
+        Features.update({f'P{Percentile:g}': float(Value) for Percentile, Value in zip(Percentiles, np.percentile(Values, Percentiles))});
+        Features['Entropy'] = float(-(Nonzero * np.log2(Nonzero)).sum());
+        Features.update({f'Hist_{i}': float(Value) for i, Value in enumerate(Histogram)});
+
+        return Features
+
+    # ? Texture features.
+    @staticmethod
+    def texture(Image: np.ndarray, Maximum: int, Levels: int = 16) -> dict:
         """
-        Refill the DataFrame with 'None' values and save it to the CSV file.
+        Return the texture features of an image.
 
-        This method reads the specified CSV file, replaces NaN values with 'None',
-        and then saves the modified DataFrame back to the same CSV file.
+        Parameters
+        ----------
+        Image : np.ndarray
+            The grayscale image or crop.
+        Maximum : int
+            The largest value of the dtype.
+        Levels : int
+            Gray levels of the co-occurrence matrix (default is 16).
 
-        Raises
-        ------
-        FileNotFoundError
-            If the CSV file is not found.
-        Exception
-            If an error occurs during the operation.
+        Returns
+        -------
+        dict
+            Gradient, Contrast, Homogeneity, Energy and Correlation, empty when the image is smaller than 2x2.
+        """
+
+        if Image.shape[0] < 2 or Image.shape[1] < 2:
+            return {}
+
+        Quantized = np.minimum((Image.astype(np.int64) * Levels) // (int(Maximum) + 1), Levels - 1);
+
+        # * Co-occurrences of the horizontal and vertical neighbours, symmetric and normalized
+        Pairs = np.concatenate([
+            (Quantized[:, :-1] * Levels + Quantized[:, 1:]).ravel(),
+            (Quantized[:-1, :] * Levels + Quantized[1:, :]).ravel(),
+        ]);
+
+        Matrix = np.bincount(Pairs, minlength = Levels * Levels).reshape(Levels, Levels).astype(np.float64);
+        Matrix = Matrix + Matrix.T;
+        Matrix /= Matrix.sum();
+
+        I, J = np.indices((Levels, Levels));
+        Mean_i = (I * Matrix).sum();
+        Std_i = np.sqrt((((I - Mean_i) ** 2) * Matrix).sum());
+
+        Pixels = Image.astype(np.float64);
+        Gradient = (np.abs(np.diff(Pixels, axis = 0)).mean() + np.abs(np.diff(Pixels, axis = 1)).mean()) / 2;
+
+        return {
+            'Gradient': float(Gradient / Maximum),
+            'Contrast': float((((I - J) ** 2) * Matrix).sum()),
+            'Homogeneity': float((Matrix / (1.0 + (I - J) ** 2)).sum()),
+            'Energy': float((Matrix ** 2).sum()),
+            'Correlation': float((((I - Mean_i) * (J - Mean_i) * Matrix).sum()) / (Std_i ** 2)) if Std_i > 0 else 1.0,
+        }
+
+    # * Sum and count of the pixels of a box from the integral image
+    @staticmethod
+    def __box_sum(Integral: np.ndarray, Y0: int, Y1: int, X0: int, X1: int) -> tuple[float, int]:
+        return float(Integral[Y1, X1] - Integral[Y0, X1] - Integral[Y1, X0] + Integral[Y0, X0]), (Y1 - Y0) * (X1 - X0)
+
+    # ? Features of an image.
+    @staticmethod
+    def extract_image(Job: dict) -> dict:
+        """
+        Read an image and compute its features and the features of its boxes.
+
+        Parameters
+        ----------
+        Job : dict
+            'File', 'Folder', 'Flags', 'Rows' (row of the table, Y0, Y1, X0, X1, Has_box), 'Bins',
+            'Percentiles', 'Levels', 'Ring', 'Mask_side' and 'Cache' (ImageCache, or None).
+
+        Returns
+        -------
+        dict
+            'File', 'Success', 'Error', 'Time', 'Stages', 'Cache' (tier and evicted entries, with a cache),
+            'Image' (the image features) and 'Crops' (row of the table -> crop features).
         """
+
+        Result = {'File': Job['File'], 'Success': False, 'Error': None, 'Time': 0.0, 'Stages': {}, 'Cache': None, 'Image': {}, 'Crops': {}};
+        Stages = Result['Stages'];
+        Start_time = time.perf_counter();
+
         try:
+            with StageProfiler.stage(Stages, 'read'):
+                Raw = ImageReader.read_bytes(os.path.join(Job['Folder'], Job['File']));
+
+            with StageProfiler.stage(Stages, 'decode'):
+                if Job.get('Cache') is not None:
+                    Image, Tier, Evicted = Job['Cache'].decode(Raw, Job['Flags'], Job['File']);
+                    Result['Cache'] = (Tier, Evicted);
+                else:
+                    Image = ImageReader.decode(Raw, Job['Flags'], Job['File']);
+
+            Maximum = np.iinfo(Image.dtype).max if np.issubdtype(Image.dtype, np.integer) else float(Image.max());
+            Bins, Percentiles, Levels = Job['Bins'], Job['Percentiles'], Job['Levels'];
+
+            with StageProfiler.stage(Stages, 'features'):
+                Mask = TissueMask(Side = Job['Mask_side']).compute(Image);
+                Full_mask = TissueMask.full(Mask, Image.shape).astype(bool);
+                Tissue = Image[Full_mask];
+
+                Features = DataExtractor.statistics(Image, Maximum, Bins, Percentiles);
+                Features.update(DataExtractor.texture(Image, Maximum, Levels));
+                Features['Tissue_fraction'] = float(Full_mask.mean());
+                Features['Tissue_mean'] = float(Tissue.mean()) if Tissue.size > 0 else np.nan;
+                Features['Tissue_std'] = float(Tissue.std()) if Tissue.size > 0 else np.nan;
+
+                Result['Image'] = Features;
+
+                # * One integral image gives the mean of every ring
+                Integral = np.zeros((Image.shape[0] + 1, Image.shape[1] + 1), dtype = np.float64);
+                Integral[1:, 1:] = Image.astype(np.float64).cumsum(axis = 0).cumsum(axis = 1);
 
-            Dataframe = pd.read_csv(self.CSV_file_path);
+                Height, Width = Image.shape[:2];
 
-            # * Replace NaN with None
-            Dataframe.fillna(None, inplace=True);
-            Dataframe.to_csv(self.CSV_file_path, index=False);
-            self.logger.info("DataFrame refilled with None values and saved to the CSV file.");
-        
-        except FileNotFoundError:
-            self.logger.error(f"File '{self.CSV_file_path}' not found.");
+                for Row, Y0, Y1, X0, X1, Has_box in Job['Rows']:
+
+                    if not Has_box:
+                        continue;
+
+                    Y0, Y1, X0, X1 = min(Y0, Height), min(Y1, Height), min(X0, Width), min(X1, Width);
+                    Crop = Image[Y0:Y1, X0:X1];
+
+                    if Crop.size == 0:
+                        continue;
+
+                    Crop_features = DataExtractor.statistics(Crop, Maximum, Bins, Percentiles);
+                    Crop_features.update(DataExtractor.texture(Crop, Maximum, Levels));
+                    Crop_features['Tissue_fraction'] = TissueMask.fraction(Mask, (Y0, Y1, X0, X1), Image.shape);
+
+                    # * Ring around the box, clipped to the image
+                    Margin_y = int(round((Y1 - Y0) * Job['Ring']));
+                    Margin_x = int(round((X1 - X0) * Job['Ring']));
+
+                    Outer_sum, Outer_count = DataExtractor.__box_sum(Integral, max(Y0 - Margin_y, 0), min(Y1 + Margin_y, Height), max(X0 - Margin_x, 0), min(X1 + Margin_x, Width));
+                    Inner_sum, Inner_count = DataExtractor.__box_sum(Integral, Y0, Y1, X0, X1);
+
+                    Ring_mean = (Outer_sum - Inner_sum) / (Outer_count - Inner_count) if Outer_count > Inner_count else np.nan;
+
+                    Crop_features['Ring_mean'] = Ring_mean;
+                    Crop_features['Lesion_contrast'] = Crop_features['Mean'] - Ring_mean;
+                    Crop_features['Lesion_ratio'] = Crop_features['Mean'] / Ring_mean if Ring_mean and not np.isnan(Ring_mean) else np.nan;
+
+                    Result['Crops'][int(Row)] = Crop_features;
+
+            Result['Success'] = True;
 
         except Exception as e:
-            self.logger.error(f"An error occurred: {str(e)}");
+            Result['Error'] = str(e);
+
+        Result['Time'] = time.perf_counter() - Start_time;
+
+        return Result
+
+    # * Table of the annotations joined with the features of the results
+    def __table(self, Jobs: list[dict]) -> pd.DataFrame:
+
+        Columns = [Column for Column in self.Annotation_columns if Column in self.__Dataframe.columns];
+        Table = self.__Dataframe[Columns].copy();
+
+        Table['Number'] = self.__Plan['Number'].to_numpy();
+
+        for Column in ('Y0', 'Y1', 'X0', 'X1'):
+            Table[Column] = self.__Plan[Column].to_numpy();
+
+        Image_rows = [];
+        Crop_rows = [];
+
+        for Job, Result in zip(Jobs, self.__Results):
+            for Row, *_ in Job['Rows']:
+                Image_rows.append(dict({'Row': int(Row)}, **{f'Image_{Key}': Value for Key, Value in Result['Image'].items()}));
+
+            for Row, Features in Result['Crops'].items():
+                Crop_rows.append(dict({'Row': Row}, **{f'Crop_{Key}': Value for Key, Value in Features.items()}));
+
+        # * Annotations of images that were not found keep NaN features
+        for Rows in (Image_rows, Crop_rows):
+            if Rows:
+                Table = Table.join(pd.DataFrame(Rows).set_index('Row'));
+
+        return Table
+
+    # * Write the table under a temporary name and move it into place
+    def __write(self, Table: pd.DataFrame) -> None:
+
+        Temporary = self.Output + '.tmp';
+
+        if self.Output.lower().endswith('.parquet'):
+            Table.to_parquet(Temporary, index = False);
+        else:
+            Table.to_csv(Temporary, index = False);
+
+        os.replace(Temporary, self.Output);
+
+    # ? Method to extract the features of the Mini-MIAS images.
+    def extract(self) -> dict:
+        """
+        Extract the features of every annotated image of the folder and write the table.
+
+        Returns
+        -------
+        dict
+            Summary of the run with the keys 'Total', 'Extracted', 'Failed', 'Skipped', 'Rows', 'Time', 'Throughput' (images/s)
+            and, with an image cache, 'Cache' (memory hits, disk hits, misses and evictions).
+        """
+
+        self.__Profiler = StageProfiler(Data.Extract_features_name);
+        Run_stages = dict(self.__Plan_stages);
+
+        with StageProfiler.stage(Run_stages, 'list'):
+            Sorted_files, Total_images = ImageSorter(self.Folder_path, verbosity = self.Verbosity, events = self.Events).sort_images();
+
+        # * One job per image with every row of its REFNUM
+        with StageProfiler.stage(Run_stages, 'plan'):
+            Refnums = self.__Plan[CropPlanner.Refnum_column].astype(str);
+            Has_box = (self.__Plan['Valid'] & ~self.__Plan['Outside']).to_numpy();
+            Boxes = self.__Plan[['Y0', 'Y1', 'X0', 'X1']].to_numpy(dtype = np.int64);
+            Positions = Refnums.groupby(Refnums, sort = False).indices;
+
+            Jobs = [];
+
+            for File in Sorted_files:
+                Rows = Positions.get(os.path.splitext(File)[0]);
+
+                if Rows is None:
+                    continue;
+
+                Jobs.append({
+                    'File': File,
+                    'Folder': self.Folder_path,
+                    'Flags': self.Flags,
+                    'Rows': [(int(Row), *map(int, Boxes[Row]), bool(Has_box[Row])) for Row in Rows],
+                    'Bins': self.Bins,
+                    'Percentiles': self.Percentiles,
+                    'Levels': self.Levels,
+                    'Ring': self.Ring,
+                    'Mask_side': self.Mask_side,
+                    'Cache': self.Image_cache,
+                });
+
+        for Name, Seconds in Run_stages.items():
+            self.__Profiler.add_run_stage(Name, Seconds);
+
+        Reporter = EventReporter(Data.Extract_features_name, self.Verbosity, self.Events);
+        Reporter.start(len(Jobs));
+
+        Start_time = time.perf_counter();
+        self.__Results = [];
+
+        # * The jobs are small and independent, the pool scales with the cores
+        if self.Workers > 1 and len(Jobs) > 1:
+            with ProcessPoolExecutor(max_workers = self.Workers) as Executor:
+                Chunksize = max(1, len(Jobs) // (self.Workers * 4));
+
+                for Result in Executor.map(DataExtractor.extract_image, Jobs, chunksize = Chunksize):
+                    self.__Results.append(Result);
+                    Reporter.update(Result['File'], Result['Success'], Result['Time'], Result['Error']);
+                    self.__Profiler.add(Result['File'], Result['Stages']);
+        else:
+            for Result in map(DataExtractor.extract_image, Jobs):
+                self.__Results.append(Result);
+                Reporter.update(Result['File'], Result['Success'], Result['Time'], Result['Error']);
+                self.__Profiler.add(Result['File'], Result['Stages']);
+
+        self.__Features = self.__table(Jobs);
+
+        if self.Output is not None:
+            self.__write(self.__Features);
+
+        Elapsed_time = time.perf_counter() - Start_time;
+        Extracted = sum(1 for Result in self.__Results if Result['Success']);
+
+        Summary = {
+            'Total': Total_images,
+            'Extracted': Extracted,
+            'Failed': len(self.__Results) - Extracted,
+            'Skipped': Total_images - len(Jobs),
+            'Rows': len(self.__Features),
+            'Time': Elapsed_time,
+            'Throughput': len(Jobs) / Elapsed_time if Elapsed_time > 0 else 0.0,
+        };
+
+        if self.Image_cache is not None:
+            Summary['Cache'] = ImageCache.summary(self.__Results);
+
+        Reporter.close(Summary);
 
-'''# Example usage:
-csv_file_path = 'your_csv_file.csv'
+        if self.Profile_stages:
+            Reporter.message(self.__Profiler.table(), EventReporter.QUIET);
 
-refiller = DataFrameRefiller(csv_file_path)
-refiller.refill_dataframe()'''
\ No newline at end of file
+        return Summary
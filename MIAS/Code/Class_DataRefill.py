@@ -1,9 +1,29 @@
+
+import os
+import time
+import numpy as np
 import pandas as pd
 import logging
 
+from concurrent.futures import ProcessPoolExecutor
+
 class DataFrameRefiller:
     """
-    A class for refilling a Pandas DataFrame with 'None' values and saving it to a CSV file.
+    A class for refilling the missing values of a CSV file, streaming it in chunks.
+
+    The file is read 'chunksize' rows at a time, the fill rules are applied to every
+    chunk and the chunks are appended to a temporary file that replaces the output
+    once it is complete, so large exports never sit whole in memory and a crash
+    never leaves a half-written file.
+
+    Fill rules
+    ----------
+    value
+        Any scalar replaces the missing values of the column.
+    'ffill'
+        The last valid value above, carried across the chunks.
+    'mean'
+        The mean of the column, computed in a first streaming pass.
 
     Parameters
     ----------
@@ -14,29 +34,32 @@ class DataFrameRefiller:
     ----------
     CSV_file_path : str
         The path to the CSV file.
+    Output_path : str
+        The path of the refilled CSV file (the input file by default).
+    Fill : dict
+        The fill rule of every column.
+    Chunksize : int
+        The rows read at a time.
     logger : Logger
         A logger for logging messages.
 
     Methods
     -------
     refill_dataframe()
-        Refills the DataFrame with 'None' values and saves it to the CSV file.
-
-    Raises
-    ------
-    FileNotFoundError
-        If the CSV file is not found.
-    Exception
-        If an error occurs during the operation.
+        Refills the CSV file and returns the rows and the throughput.
+    refill_files(Paths, workers, **kwargs)
+        Refills several CSV files in parallel.
 
     Example
     -------
     CSV_file_path = 'your_csv_file.csv';
-    RF = DataFrameRefiller(CSV_file_path);
+    RF = DataFrameRefiller(CSV_file_path, fill = {'SEVERITY': 'N', 'X': 'mean'}, chunksize = 100000);
     RF.refill_dataframe();
     """
 
-    def __init__(self, CSV_file_path):
+    Rules = ('ffill', 'mean');
+
+    def __init__(self, CSV_file_path, **kwargs):
         """
         Initialize the DataFrameRefiller.
 
@@ -44,18 +67,78 @@ class DataFrameRefiller:
         ----------
         CSV_file_path : str
             The path to the CSV file to be refilled.
+        fill : dict or scalar
+            The fill rule of every column, or a single rule for every column (default is None, missing values stay blank).
+        chunksize : int
+            The rows read at a time (default is 100000).
+        dtype : dict
+            The dtypes of the columns, passed to pd.read_csv (default is None, inferred once for the whole file in a first streaming pass).
+        output : str
+            The path of the refilled CSV file (default is None, the input file is replaced).
         """
 
         self.CSV_file_path = CSV_file_path;
+        self.Output_path = kwargs.get('output', None) or CSV_file_path;
+        self.Fill = kwargs.get('fill', None);
+        self.Chunksize = kwargs.get('chunksize', 100000);
+        self.Dtype = kwargs.get('dtype', None);
+
         self.logger = logging.getLogger(__name__);
         logging.basicConfig(level=logging.INFO);
 
+    def __reader(self, dtype=None, **kwargs):
+        return pd.read_csv(self.CSV_file_path, chunksize=self.Chunksize, dtype=dtype if dtype is not None else self.Dtype, **kwargs);
+
+    @staticmethod
+    def __merge_dtypes(Dtypes):
+        """
+        Return the dtype of a column from the dtypes inferred for its chunks.
+        """
+
+        if all(Dtype == Dtypes[0] for Dtype in Dtypes):
+            return Dtypes[0];
+
+        # * An int chunk and a chunk with NaN give float, as a whole-file read does
+        if all(pd.api.types.is_numeric_dtype(Dtype) and not pd.api.types.is_bool_dtype(Dtype) for Dtype in Dtypes):
+            return np.result_type(*Dtypes);
+
+        return object;
+
+    def __scan(self, Columns, Mean_columns):
+        """
+        Compute the dtypes of the whole file and the mean of the columns in a first streaming pass.
+        """
+
+        Sums = dict.fromkeys(Mean_columns, 0.0);
+        Counts = dict.fromkeys(Mean_columns, 0);
+        Chunk_dtypes = {Column: [] for Column in Columns};
+
+        for Chunk in self.__reader():
+            for Column in Columns:
+                Chunk_dtypes[Column].append(Chunk[Column].dtype);
+
+            for Column in Mean_columns:
+                Values = pd.to_numeric(Chunk[Column], errors='coerce');
+                Sums[Column] += float(Values.sum());
+                Counts[Column] += int(Values.count());
+
+        Means = {Column: Sums[Column] / Counts[Column] if Counts[Column] > 0 else None for Column in Mean_columns};
+        Dtypes = {Column: self.__merge_dtypes(Chunk_dtypes[Column]) for Column in Columns if Chunk_dtypes[Column]};
+
+        return Means, Dtypes;
+
     def refill_dataframe(self):
         """
-        Refill the DataFrame with 'None' values and save it to the CSV file.
+        Refill the missing values of the CSV file, chunk by chunk.
 
-        This method reads the specified CSV file, replaces NaN values with 'None',
-        and then saves the modified DataFrame back to the same CSV file.
+        This method streams the specified CSV file, applies the fill rules to every
+        chunk and writes the chunks to a temporary file, renamed to the output path
+        when the last chunk is written.
+
+        Returns
+        -------
+        dict
+            'File', 'Rows', 'Time' (seconds), 'Throughput' (rows/s) and 'Error' (None on success).
 
         Raises
         ------
@@ -64,23 +147,151 @@ class DataFrameRefiller:
         Exception
             If an error occurs during the operation.
         """
+
+        Result = {'File': self.CSV_file_path, 'Rows': 0, 'Time': 0.0, 'Throughput': 0.0, 'Error': None};
+        Temporary_path = self.Output_path + '.tmp';
+        Start_time = time.perf_counter();
+
         try:
 
-            Dataframe = pd.read_csv(self.CSV_file_path);
+            Columns = list(pd.read_csv(self.CSV_file_path, nrows=0).columns);
+
+            # * A scalar fills every column
+            Fill = self.Fill if isinstance(self.Fill, dict) else ({Column: self.Fill for Column in Columns} if self.Fill is not None else {});
+            Fill = {Column: Rule for Column, Rule in Fill.items() if Column in Columns};
+
+            Mean_columns = [Column for Column, Rule in Fill.items() if isinstance(Rule, str) and Rule == 'mean'];
+            Ffill_columns = [Column for Column, Rule in Fill.items() if isinstance(Rule, str) and Rule == 'ffill'];
+            Values = {Column: Rule for Column, Rule in Fill.items() if not (isinstance(Rule, str) and Rule in self.Rules)};
+
+            # * Without a dtype for every column, each chunk would infer its own and the same
+            # * column would be written as '3' or '3.0' depending on where the missing values are
+            Dtype = self.Dtype;
+            Infer = Dtype is None or (isinstance(Dtype, dict) and not set(Columns) <= set(Dtype));
+
+            if Mean_columns or Infer:
+                Means, Dtypes = self.__scan(Columns, Mean_columns);
+                Values.update({Column: Mean for Column, Mean in Means.items() if Mean is not None});
+
+                if Infer:
+                    Dtype = {**Dtypes, **(Dtype or {})};
+
+            Last = {};
+
+            with open(Temporary_path, 'w', newline='') as File:
+
+                # * The header is written even when the file has no rows
+                pd.DataFrame(columns=Columns).to_csv(File, index=False);
+
+                for Chunk in self.__reader(dtype=Dtype):
+
+                    # * Forward fill across the chunks with the last valid value of the previous one
+                    for Column in Ffill_columns:
+                        Chunk[Column] = Chunk[Column].ffill();
+
+                        if Column in Last:
+                            Chunk[Column] = Chunk[Column].fillna(Last[Column]);
+
+                        Valid = Chunk[Column].dropna();
+
+                        if len(Valid) > 0:
+                            Last[Column] = Valid.iloc[-1];
+
+                    if Values:
+                        Chunk = Chunk.fillna(Values);
+
+                    Chunk.to_csv(File, header=False, index=False);
+                    Result['Rows'] += len(Chunk);
+
+            os.replace(Temporary_path, self.Output_path);
+
+            Result['Time'] = time.perf_counter() - Start_time;
+            Result['Throughput'] = Result['Rows'] / Result['Time'] if Result['Time'] > 0 else 0.0;
+
+            self.logger.info(f"{Result['Rows']} rows refilled into '{self.Output_path}' ({Result['Throughput']:.0f} rows/s).");
 
-            # * Replace NaN with None
-            Dataframe.fillna(None, inplace=True);
-            Dataframe.to_csv(self.CSV_file_path, index=False);
-            self.logger.info("DataFrame refilled with None values and saved to the CSV file.");
-        
         except FileNotFoundError:
-            self.logger.error(f"File '{self.CSV_file_path}' not found.");
+            Result['Error'] = f"File '{self.CSV_file_path}' not found.";
+            self.logger.error(Result['Error']);
 
         except Exception as e:
+            Result['Error'] = str(e);
             self.logger.error(f"An error occurred: {str(e)}");
 
+        finally:
+            if os.path.exists(Temporary_path):
+                os.remove(Temporary_path);
+
+        return Result;
+
+    @staticmethod
+    def refill_file(Job):
+        """
+        Refill one CSV file, the worker of refill_files.
+
+        Parameters
+        ----------
+        Job : dict
+            'CSV_file_path' and the keyword arguments of the DataFrameRefiller.
+
+        Returns
+        -------
+        dict
+            The result of refill_dataframe.
+        """
+
+        Job = dict(Job);
+
+        return DataFrameRefiller(Job.pop('CSV_file_path'), **Job).refill_dataframe();
+
+    @staticmethod
+    def refill_files(Paths, workers=4, **kwargs):
+        """
+        Refill several CSV files in parallel, one file per process.
+
+        Parameters
+        ----------
+        Paths : list[str]
+            The CSV files.
+        workers : int
+            The number of processes (default is 4).
+        kwargs
+            The keyword arguments of every DataFrameRefiller (fill, chunksize, dtype).
+
+        Returns
+        -------
+        dict
+            'Files' (the result of every file), 'Rows', 'Failed', 'Time' (seconds) and 'Throughput' (rows/s).
+        """
+
+        Start_time = time.perf_counter();
+        Jobs = [dict(kwargs, CSV_file_path=Path) for Path in Paths];
+
+        if workers > 1 and len(Jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(Jobs))) as Executor:
+                Results = list(Executor.map(DataFrameRefiller.refill_file, Jobs));
+        else:
+            Results = [DataFrameRefiller.refill_file(Job) for Job in Jobs];
+
+        Time = time.perf_counter() - Start_time;
+        Rows = sum(Result['Rows'] for Result in Results);
+
+        Summary = {
+            'Files': Results,
+            'Rows': Rows,
+            'Failed': sum(Result['Error'] is not None for Result in Results),
+            'Time': Time,
+            'Throughput': Rows / Time if Time > 0 else 0.0,
+        };
+
+        logging.getLogger(__name__).info(f"{len(Results)} files, {Rows} rows refilled ({Summary['Throughput']:.0f} rows/s).");
+
+        return Summary;
+
 '''# Example usage:
 csv_file_path = 'your_csv_file.csv'
 
-refiller = DataFrameRefiller(csv_file_path)
-refiller.refill_dataframe()'''
\ No newline at end of file
+refiller = DataFrameRefiller(csv_file_path, fill={'SEVERITY': 'N'}, chunksize=100000)
+refiller.refill_dataframe()
+
+DataFrameRefiller.refill_files(['a.csv', 'b.csv'], workers=2, fill={'X': 'mean'})'''
@@ -0,0 +1,184 @@
+# ? Class for splitting the Mini-MIAS images into train, validation and test sets.
+import zlib
+import numpy as np
+import pandas as pd
+
+from typing import Union
+
+from Class_CropWorker import CropWorker
+
+class DatasetSplitter:
+    """
+    A class used to assign every Mini-MIAS image to a split, before the crops are written.
+
+    The splits are assigned to groups of images, never to crops, so the lesions and
+    tiles of an image (or of a patient) always land in the same split. Each group is
+    stratified by its most severe label (Malignant, then Benign, then Normal), the
+    groups of every stratum are shuffled with the seed and cut at the fractions. The
+    assignment only reads the REFNUM and severity columns, it does not depend on the
+    order of the rows and the same seed always gives the same splits.
+
+    Groups
+    ------
+    refnum
+        Every image is a group.
+    patient
+        The two mammograms of a patient (mdb001 and mdb002, mdb003 and mdb004, ...) are a group.
+
+    Methods
+    -------
+    split(Dataframe)
+        Returns the split of every REFNUM.
+    shard(Refnum, Shards)
+        Returns the shard of a REFNUM.
+
+    Example
+    -------
+    Splitter = DatasetSplitter(Fractions = {'train': 0.7, 'val': 0.15, 'test': 0.15}, Seed = 0, Group = 'patient');
+    Splits = Splitter.split(Plan);
+    Train = Splits[Splits['Split'] == 'train']['REFNUM'];
+    """
+
+    Groups = ('refnum', 'patient');
+
+    # * Split names of the fractions given as a sequence
+    Names = {2: ('train', 'test'), 3: ('train', 'val', 'test')};
+
+    # * A group takes the stratum of its most severe label
+    Priority = {CropWorker.Malignant: 0, CropWorker.Benign: 1, CropWorker.Normal: 2};
+
+    # * Initializing (Constructor)
+    def __init__(self, Fractions: Union[dict, tuple] = (0.7, 0.15, 0.15), Seed: int = 0, Group: str = 'refnum') -> None:
+        """
+        Parameters
+        ----------
+        Fractions : dict or tuple
+            Split name -> fraction, or (train, test) or (train, val, test) fractions (default is (0.7, 0.15, 0.15)).
+            The fractions are normalized to sum to 1.
+        Seed : int
+            The seed of the shuffle (default is 0).
+        Group : str
+            'refnum' or 'patient' (default is 'refnum').
+
+        Raises
+        ------
+        ValueError
+            If the fractions or the group are not supported.
+        """
+
+        if not isinstance(Fractions, dict):
+            Fractions = tuple(Fractions);
+
+            if len(Fractions) not in self.Names:
+                raise ValueError(f"Fractions {Fractions} incompatible, give 2 or 3 fractions or a dict of split names");
+
+            Fractions = dict(zip(self.Names[len(Fractions)], Fractions));
+
+        Total = sum(Fractions.values());
+
+        if any(Fraction < 0 for Fraction in Fractions.values()) or Total <= 0:
+            raise ValueError(f"Fractions {Fractions} incompatible, they must be positive");
+
+        if Group not in self.Groups:
+            raise ValueError(f"Group {Group} incompatible, it must be: {self.Groups}");
+
+        self.Fractions: dict = {Name: Fraction / Total for Name, Fraction in Fractions.items()};
+        self.Seed = Seed;
+        self.Group = Group;
+
+    # * Class description
+    def __str__(self) -> str:
+        """
+        Return a string description of the DatasetSplitter object.
+
+        Returns:
+        ----------
+        str
+            A string description of the DatasetSplitter object.
+        """
+
+        return f'''{self.__class__.__name__}:{', '.join(f'{Name} {Fraction:.0%}' for Name, Fraction in self.Fractions.items())} by {self.Group}, seed {self.Seed}.''';
+
+    # * Group of every REFNUM
+    def __groups(self, Refnums: pd.Series) -> pd.Series:
+
+        if self.Group == 'refnum':
+            return Refnums
+
+        # * mdb001 and mdb002 are the left and right breast of the same patient
+        Numbers = pd.to_numeric(Refnums.str.extract(r'(\d+)', expand = False), errors = 'coerce');
+
+        return ('patient' + ((Numbers + 1) // 2).astype('Int64').astype(str)).where(Numbers.notna(), Refnums)
+
+    # ? Split of every image.
+    def split(self, Dataframe: pd.DataFrame, Refnum_column: str = 'REFNUM', Severity_column: str = 'Severity') -> pd.DataFrame:
+        """
+        Assign a split to every REFNUM of a crop plan or of the annotations.
+
+        Parameters
+        ----------
+        Dataframe : pd.DataFrame
+            One row per lesion with the REFNUM and the severity label (0 benign, 1 malignant, 2 normal).
+        Refnum_column : str
+            The REFNUM column (default is 'REFNUM').
+        Severity_column : str
+            The severity column (default is 'Severity', the column of CropPlanner.plan).
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per REFNUM with the columns REFNUM, Group, Stratum (label of the group) and Split.
+        """
+
+        Rows = pd.DataFrame({
+            'REFNUM': Dataframe[Refnum_column].astype(str).to_numpy(),
+            'Priority': Dataframe[Severity_column].map(self.Priority).fillna(self.Priority[CropWorker.Normal]).to_numpy(dtype = np.int8),
+        });
+
+        Rows['Group'] = self.__groups(Rows['REFNUM']).to_numpy();
+
+        # * One row per group with its most severe label, sorted so the row order does not matter
+        Groups = Rows.groupby('Group', sort = True)['Priority'].min();
+        Labels = {Priority: Label for Label, Priority in self.Priority.items()};
+
+        Rng = np.random.default_rng(self.Seed);
+        Names = list(self.Fractions);
+        Bounds = np.cumsum(list(self.Fractions.values()));
+        Assigned = {};
+
+        for Priority in sorted(Groups.unique()):
+            Members = Groups.index[Groups.to_numpy() == Priority].to_numpy();
+            Members = Members[Rng.permutation(len(Members))];
+
+            # * Cut points rounded on the cumulative fractions, the sizes add up to the stratum
+            Cuts = np.rint(Bounds * len(Members)).astype(np.int64);
+            Split_index = np.searchsorted(Cuts, np.arange(len(Members)), side = 'right');
+
+            Assigned.update(zip(Members, (Names[min(i, len(Names) - 1)] for i in Split_index)));
+
+        Splits = Rows.drop_duplicates('REFNUM')[['REFNUM', 'Group']].reset_index(drop = True);
+        Splits['Stratum'] = Splits['Group'].map(Groups).map(Labels).map(CropWorker.Label_names).to_numpy();
+        Splits['Split'] = Splits['Group'].map(Assigned).to_numpy();
+
+        return Splits
+
+    # ? Shard of an image.
+    @staticmethod
+    def shard(Refnum: str, Shards: int) -> int:
+        """
+        Return the shard of a REFNUM, stable across runs and processes.
+
+        Parameters
+        ----------
+        Refnum : str
+            The REFNUM.
+        Shards : int
+            The number of shards.
+
+        Returns
+        -------
+        int
+            The shard, from 0 to Shards - 1.
+        """
+
+        return zlib.crc32(Refnum.encode()) % Shards
@@ -0,0 +1,206 @@
+# ? Class for tuning the image encoders.
+import os
+import time
+import cv2
+import numpy as np
+import pandas as pd
+
+from typing import Optional
+
+from Class_ImageReader import ImageReader
+
+class EncodeProfile:
+    """
+    A class used to build the cv2.imwrite/cv2.imencode parameters of each output format.
+
+    Profiles
+    --------
+    fast
+        PNG level 1, uncompressed TIFF, plain JPEG. For scratch and intermediate outputs.
+    balanced
+        PNG level 3, LZW TIFF, optimized JPEG.
+    smallest
+        PNG level 9, Deflate TIFF, optimized progressive JPEG. For archive outputs.
+
+    The JPEG quality and the JPEG 2000 rate are the same in every profile (OpenCV defaults),
+    so the profiles only trade encode time for size. Explicit settings override the profile.
+    Without a profile and without settings no parameters are passed and OpenCV uses its defaults.
+
+    Methods
+    -------
+    params(Format)
+        Returns the encoder parameters of a format.
+    benchmark(Folder, Formats, Profiles, Limit)
+        Measures the size and encode time of each profile.
+
+    Example
+    -------
+    Profile = EncodeProfile('fast');
+    cv2.imwrite('mdb001.png', Image, Profile.params('.png'));
+
+    Profile = EncodeProfile('smallest', jpeg_quality = 90);
+    """
+
+    # * Settings of every named profile
+    Profiles = {
+        'fast': {'png_compression': 1, 'tiff_compression': 1, 'jpeg_optimize': False, 'jpeg_progressive': False},
+        'balanced': {'png_compression': 3, 'tiff_compression': 5, 'jpeg_optimize': True, 'jpeg_progressive': False},
+        'smallest': {'png_compression': 9, 'tiff_compression': 8, 'jpeg_optimize': True, 'jpeg_progressive': True},
+    };
+
+    # * Settings that can be given explicitly
+    Settings = ('png_compression', 'jpeg_quality', 'jpeg_progressive', 'jpeg_optimize', 'tiff_compression', 'jp2_rate');
+
+    # * Initializing (Constructor)
+    def __init__(self, Profile: Optional[str] = None, **kwargs) -> None:
+        """
+        Parameters
+        ----------
+        Profile : str, optional
+            One of 'fast', 'balanced' or 'smallest' (default is None, OpenCV defaults).
+        png_compression : int
+            PNG compression level from 0 to 9.
+        jpeg_quality : int
+            JPEG quality from 0 to 100.
+        jpeg_progressive : bool
+            Write progressive JPEG.
+        jpeg_optimize : bool
+            Optimize the JPEG Huffman tables.
+        tiff_compression : int
+            TIFF compression scheme (1 none, 5 LZW, 8 Deflate).
+        jp2_rate : int
+            JPEG 2000 compression rate x1000, from 0 to 1000.
+        """
+
+        if Profile is not None and Profile not in self.Profiles:
+            raise ValueError(f"Profile {Profile} incompatible, it must be: {tuple(self.Profiles)}");
+
+        Unknown = set(kwargs) - set(self.Settings);
+
+        if Unknown:
+            raise ValueError(f"Unknown encode settings {sorted(Unknown)}, they must be: {self.Settings}");
+
+        self.Profile = Profile;
+
+        # * The explicit settings override the profile
+        self.Values: dict = dict(self.Profiles.get(Profile, {}));
+        self.Values.update({Key: Value for Key, Value in kwargs.items() if Value is not None});
+
+    # * Class description
+    def __str__(self) -> str:
+        """
+        Return a string description of the EncodeProfile object.
+
+        Returns:
+        ----------
+        str
+            A string description of the EncodeProfile object.
+        """
+
+        return f'''{self.__class__.__name__}:{self.Profile} {self.Values}''';
+
+    # ? Parameters of a format.
+    def params(self, Format: str) -> list[int]:
+        """
+        Return the encoder parameters of a format.
+
+        Parameters
+        ----------
+        Format : str
+            The extension of the output format (e.g. '.png').
+
+        Returns
+        -------
+        list[int]
+            The flat list of parameters for cv2.imwrite or cv2.imencode.
+        """
+
+        Format = Format.lower();
+        Values = self.Values;
+        Params = [];
+
+        if Format == '.png':
+            if 'png_compression' in Values:
+                Params += [cv2.IMWRITE_PNG_COMPRESSION, int(Values['png_compression'])];
+
+        elif Format in ('.jpg', '.jpeg', '.jpe'):
+            if 'jpeg_quality' in Values:
+                Params += [cv2.IMWRITE_JPEG_QUALITY, int(Values['jpeg_quality'])];
+            if 'jpeg_progressive' in Values:
+                Params += [cv2.IMWRITE_JPEG_PROGRESSIVE, int(bool(Values['jpeg_progressive']))];
+            if 'jpeg_optimize' in Values:
+                Params += [cv2.IMWRITE_JPEG_OPTIMIZE, int(bool(Values['jpeg_optimize']))];
+
+        elif Format in ('.tif', '.tiff'):
+            if 'tiff_compression' in Values:
+                Params += [cv2.IMWRITE_TIFF_COMPRESSION, int(Values['tiff_compression'])];
+
+        elif Format == '.jp2':
+            if 'jp2_rate' in Values:
+                Params += [cv2.IMWRITE_JPEG2000_COMPRESSION_X1000, int(Values['jp2_rate'])];
+
+        return Params
+
+    # ? Benchmark the profiles.
+    @staticmethod
+    def benchmark(Folder: str, Formats: tuple = ('.png',), Profiles: tuple = ('fast', 'balanced', 'smallest'), Limit: Optional[int] = None) -> pd.DataFrame:
+        """
+        Encode the images of a folder with each profile and format, in memory, and report the size/time trade-off.
+
+        Parameters
+        ----------
+        Folder : str
+            The folder with the source images (e.g. the Mini-MIAS PGMs).
+        Formats : tuple
+            The output formats to measure (default is ('.png',)).
+        Profiles : tuple
+            The profiles to measure (default is every profile).
+        Limit : int, optional
+            Maximum number of images to use (default is every image).
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per profile and format with the columns Profile, Format, Images, Bytes,
+            Ratio (against the raw pixels), Encode_ms (mean per image) and Throughput (images/s).
+        """
+
+        Files = sorted(File for File in os.listdir(Folder) if os.path.splitext(File)[1].lower() in ImageReader.Extensions);
+
+        if Limit is not None:
+            Files = Files[:Limit];
+
+        Images = [ImageReader.read(os.path.join(Folder, File)) for File in Files];
+
+        Rows = [];
+
+        for Format in Formats:
+            for Profile in Profiles:
+
+                Params = EncodeProfile(Profile).params(Format);
+                Total_bytes = 0;
+                Raw_bytes = 0;
+
+                Start_time = time.perf_counter();
+
+                for Image in Images:
+                    Success, Buffer = cv2.imencode(Format, Image, Params);
+
+                    # * Only the encoded images count, a failed encode would inflate the ratio
+                    if Success:
+                        Total_bytes += Buffer.nbytes;
+                        Raw_bytes += Image.nbytes;
+
+                Elapsed_time = time.perf_counter() - Start_time;
+
+                Rows.append({
+                    'Profile': Profile,
+                    'Format': Format,
+                    'Images': len(Images),
+                    'Bytes': Total_bytes,
+                    'Ratio': Raw_bytes / Total_bytes if Total_bytes else np.nan,
+                    'Encode_ms': 1000 * Elapsed_time / len(Images) if Images else np.nan,
+                    'Throughput': len(Images) / Elapsed_time if Elapsed_time > 0 else np.nan,
+                });
+
+        return pd.DataFrame(Rows)
@@ -0,0 +1,285 @@
+# ? Class for reporting the progress of the pipeline.
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+import tqdm
+
+class EventReporter:
+    """
+    A class used to report the progress of a batch job with low overhead.
+
+    The console output depends on the verbosity level and never goes above one
+    line per file. Machine-readable events (one JSON object per line) are handed to
+    a QueueHandler and written to the events file by a background QueueListener,
+    so the hot loop never waits for the disk.
+
+    Verbosity levels
+    ----------------
+    QUIET (0)
+        Nothing is printed.
+    SUMMARY (1)
+        Messages, the final summary and a periodic summary every 'interval' seconds.
+    PROGRESS (2)
+        Messages, the final summary, a single aggregated progress bar and one line per failed file.
+    FILES (3)
+        Like PROGRESS, plus one line per processed file.
+
+    Methods
+    -------
+    start(Total)
+        Starts a run of Total items.
+    update(File, Success, Duration, Error, **Fields)
+        Reports a processed item.
+    message(Text)
+        Prints a message according to the verbosity.
+    event(Event, **Fields)
+        Writes a JSON-lines event.
+    close(Summary)
+        Ends the run and reports its summary.
+
+    Example
+    -------
+    with EventReporter('CropMIAS', verbosity = EventReporter.PROGRESS, events = 'crop.jsonl') as Reporter:
+        Reporter.start(len(Jobs));
+        for Result in Results:
+            Reporter.update(Result['File'], Result['Success'], Result['Time'], Result['Error']);
+        Reporter.close(Summary);
+    """
+
+    # * Verbosity levels
+    QUIET = 0;
+    SUMMARY = 1;
+    PROGRESS = 2;
+    FILES = 3;
+
+    # * One listener per events file, shared by every reporter of the process
+    _Listeners: dict = {};
+    _Listeners_lock = threading.Lock();
+
+    # * Initializing (Constructor)
+    def __init__(self, Name: str, verbosity: int = PROGRESS, events: Optional[str] = None, interval: float = 5.0) -> None:
+        """
+        Parameters
+        ----------
+        Name : str
+            The name of the job (e.g. 'CropMIAS').
+        verbosity : int
+            One of QUIET, SUMMARY, PROGRESS or FILES (default is PROGRESS).
+        events : str, optional
+            Path of the JSON-lines events file (default is None, no events).
+        interval : float
+            Seconds between two periodic summaries with the SUMMARY verbosity (default is 5.0).
+        """
+
+        self.Name = Name;
+        self.Verbosity = verbosity;
+        self.Interval = interval;
+
+        self.__Bar = None;
+        self.__Total = 0;
+        self.__Done = 0;
+        self.__Failed = 0;
+        self.__Start_time = time.perf_counter();
+        self.__Last_summary = self.__Start_time;
+
+        self.__Events_logger = self.__events_logger(events) if events is not None else None;
+
+    # * Class description
+    def __str__(self) -> str:
+        """
+        Return a string description of the EventReporter object.
+
+        Returns:
+        ----------
+        str
+            A string description of the EventReporter object.
+        """
+
+        return f'''{self.__class__.__name__}:{self.Name} {self.__Done} of {self.__Total} done.''';
+
+    def __enter__(self) -> 'EventReporter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close();
+
+    # * Queue-based logger writing the events file
+    @staticmethod
+    def __events_logger(Path: str) -> logging.Logger:
+
+        with EventReporter._Listeners_lock:
+
+            Logger = logging.getLogger(f"events.{Path}");
+
+            if Path not in EventReporter._Listeners:
+                File_handler = logging.FileHandler(Path);
+                File_handler.setFormatter(logging.Formatter('%(message)s'));
+
+                Events_queue = queue.SimpleQueue();
+                Listener = QueueListener(Events_queue, File_handler);
+                Listener.start();
+
+                Queue_handler = QueueHandler(Events_queue);
+
+                Logger.setLevel(logging.INFO);
+                Logger.propagate = False;
+                Logger.addHandler(Queue_handler);
+
+                EventReporter._Listeners[Path] = (Listener, File_handler, Queue_handler);
+
+        return Logger
+
+    # ? Flush every events file.
+    @staticmethod
+    def shutdown() -> None:
+        """
+        Stop the background listeners, writing every pending event. Called at exit.
+        """
+
+        with EventReporter._Listeners_lock:
+            for Path, (Listener, File_handler, Queue_handler) in EventReporter._Listeners.items():
+                Listener.stop();
+                File_handler.close();
+
+                # * A later reporter for the same file attaches a new handler to a new queue
+                logging.getLogger(f"events.{Path}").removeHandler(Queue_handler);
+
+            EventReporter._Listeners.clear();
+
+    # ? Write an event.
+    def event(self, Event: str, **Fields) -> None:
+        """
+        Write a JSON-lines event, if an events file was given.
+
+        Parameters
+        ----------
+        Event : str
+            The kind of event (e.g. 'start', 'file', 'summary').
+        Fields
+            The fields of the event, JSON serializable.
+        """
+
+        if self.__Events_logger is None:
+            return;
+
+        Record = {'time': time.time(), 'job': self.Name, 'event': Event};
+        Record.update(Fields);
+
+        self.__Events_logger.info(json.dumps(Record, default = str));
+
+    # ? Print a message.
+    def message(self, Text: str, Level: int = SUMMARY) -> None:
+        """
+        Print a message if the verbosity is at least the given level.
+
+        Parameters
+        ----------
+        Text : str
+            The message.
+        Level : int
+            The minimum verbosity (default is SUMMARY).
+        """
+
+        if self.Verbosity < Level:
+            return;
+
+        if self.__Bar is not None:
+            self.__Bar.write(Text);
+        else:
+            print(Text);
+
+    # ? Start a run.
+    def start(self, Total: int) -> None:
+        """
+        Start a run of Total items.
+
+        Parameters
+        ----------
+        Total : int
+            The number of items of the run.
+        """
+
+        self.__Total = Total;
+        self.__Done = 0;
+        self.__Failed = 0;
+        self.__Start_time = time.perf_counter();
+        self.__Last_summary = self.__Start_time;
+
+        if self.Verbosity >= self.PROGRESS and Total > 0:
+            self.__Bar = tqdm.tqdm(total = Total, desc = self.Name, unit = 'img');
+
+        self.event('start', total = Total);
+
+    # ? Report an item.
+    def update(self, File: str, Success: bool = True, Duration: Optional[float] = None, Error: Optional[str] = None, **Fields) -> None:
+        """
+        Report a processed item.
+
+        Parameters
+        ----------
+        File : str
+            The file of the item.
+        Success : bool
+            Whether the item was processed (default is True).
+        Duration : float, optional
+            Seconds spent on the item.
+        Error : str, optional
+            The error of a failed item.
+        Fields
+            Extra fields of the event.
+        """
+
+        self.__Done += 1;
+
+        if not Success:
+            self.__Failed += 1;
+
+        self.event('file', file = File, status = 'ok' if Success else 'error', duration = Duration, error = Error, **Fields);
+
+        if self.__Bar is not None:
+            self.__Bar.update(1);
+
+        # * Errors are printed with the progress bar, the successes only file by file
+        if not Success:
+            self.message(f"Cannot process {File} ❌, {Error}", self.PROGRESS);
+        else:
+            self.message(f"{File} ✅", self.FILES);
+
+        # * Periodic summary, at most once per interval
+        if self.Verbosity == self.SUMMARY:
+            Now = time.perf_counter();
+
+            if Now - self.__Last_summary >= self.Interval:
+                self.__Last_summary = Now;
+                Rate = self.__Done / (Now - self.__Start_time);
+                print(f"{self.Name}: {self.__Done} of {self.__Total} done, {self.__Failed} failed, {Rate:.2f} images/s.");
+
+    # ? End the run.
+    def close(self, Summary: Optional[dict] = None) -> None:
+        """
+        End the run, close the progress bar and report its summary.
+
+        Parameters
+        ----------
+        Summary : dict, optional
+            The summary of the run, printed and written as a 'summary' event.
+        """
+
+        if self.__Bar is not None:
+            self.__Bar.close();
+            self.__Bar = None;
+
+        if Summary is None:
+            return;
+
+        self.event('summary', **Summary);
+        self.message(f"{self.Name}: " + ", ".join(f"{Key} {Value:.4f}" if isinstance(Value, float) else f"{Key} {Value}" for Key, Value in Summary.items()));
+
+atexit.register(EventReporter.shutdown);
@@ -0,0 +1,290 @@
+# ? Class for caching decoded images by content.
+import os
+import hashlib
+import threading
+import numpy as np
+
+from collections import OrderedDict
+from typing import Optional
+
+from Class_ImageReader import ImageReader
+
+class ImageCache:
+    """
+    A class used to decode every image content once across jobs, processes and runs.
+
+    The decoded images are addressed by the SHA-1 of the encoded bytes and the decode
+    flags, so a renamed or copied file still hits and a changed file misses. There
+    are two tiers:
+
+    memory
+        A least-recently-used dictionary of the process bounded by 'max_bytes'. It is
+        shared by every cache object of the process, so the jobs of a pool worker
+        reuse the images decoded by the previous jobs of the same worker.
+    disk
+        One uncompressed '.npy' file per image in 'folder', loaded memory-mapped, so
+        a second run (e.g. a sweep over the crop settings) reads the pixels straight
+        from the page cache instead of decoding them. The files are written under a
+        temporary name and renamed, several processes can share the folder.
+
+    The cached images are read-only, the jobs crop views of them or copy them.
+
+    Methods
+    -------
+    key(Data, Flags)
+        Returns the content key of encoded bytes.
+    decode(Data, Flags, Path_file)
+        Returns the decoded image, the tier that served it and the evicted entries.
+    read(Path_file, Flags)
+        Reads and decodes an image file through the cache.
+    stats()
+        Returns the counters of the process.
+    summary(Results)
+        Returns the cache counters of the results of a run.
+    clear()
+        Empties the memory tier of the process.
+
+    Example
+    -------
+    Cache = ImageCache(folder = 'Decoded', max_bytes = 1 << 30);
+    Image, Tier, Evicted = Cache.decode(ImageReader.read_bytes('mdb001.pgm'), Flags, 'mdb001.pgm');
+    print(ImageCache.stats());
+    """
+
+    # * Tiers reported by decode
+    Tiers = ('memory', 'disk', 'decode');
+
+    # * Decoded images of the process: key -> image, least recently used first
+    _Cache: OrderedDict = OrderedDict();
+    _Cache_lock = threading.Lock();
+    _Bytes = 0;
+    _Counters = {'Memory_hits': 0, 'Disk_hits': 0, 'Misses': 0, 'Evictions': 0};
+
+    # * Initializing (Constructor)
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters
+        ----------
+        folder : str
+            Folder of the '.npy' files (default is None, memory tier only).
+        max_bytes : int
+            Bound of the memory tier of each process (default is 512 MiB, 0 disables the memory tier).
+        """
+
+        self.Folder: Optional[str] = kwargs.get('folder', None);
+        self.Max_bytes: int = kwargs.get('max_bytes', 512 << 20);
+
+        if self.Folder is not None:
+            os.makedirs(self.Folder, exist_ok = True);
+
+    # * Class description
+    def __str__(self) -> str:
+        """
+        Return a string description of the ImageCache object.
+
+        Returns:
+        ----------
+        str
+            A string description of the ImageCache object.
+        """
+
+        return f'''{self.__class__.__name__}:{self.Max_bytes >> 20} MiB in memory, {self.Folder if self.Folder is not None else 'no'} disk tier.''';
+
+    # ? Content key of an image.
+    @staticmethod
+    def key(Data: bytes, Flags: int) -> str:
+        """
+        Return the key of encoded bytes decoded with the given flags.
+
+        Parameters
+        ----------
+        Data : bytes
+            The content of the image file.
+        Flags : int
+            The cv2.imdecode flags.
+
+        Returns
+        -------
+        str
+            The SHA-1 of the bytes followed by the flags.
+        """
+
+        return f"{hashlib.sha1(Data).hexdigest()}_{Flags}"
+
+    # * Count an event of the process
+    @staticmethod
+    def __count(Name: str, Amount: int = 1) -> None:
+        with ImageCache._Cache_lock:
+            ImageCache._Counters[Name] += Amount;
+
+    # * Insert into the memory tier, evicting the least recently used images
+    def __remember(self, Key: str, Image: np.ndarray) -> int:
+
+        if Image.nbytes > self.Max_bytes:
+            return 0
+
+        Evicted = 0;
+
+        with ImageCache._Cache_lock:
+            if Key in ImageCache._Cache:
+                return 0
+
+            ImageCache._Cache[Key] = Image;
+            ImageCache._Bytes += Image.nbytes;
+
+            while ImageCache._Bytes > self.Max_bytes:
+                _, Oldest = ImageCache._Cache.popitem(last = False);
+                ImageCache._Bytes -= Oldest.nbytes;
+                Evicted += 1;
+
+            ImageCache._Counters['Evictions'] += Evicted;
+
+        return Evicted
+
+    # * Path of the '.npy' file of a key, split in subfolders to keep the folders small
+    def __path(self, Key: str) -> str:
+        return os.path.join(self.Folder, Key[:2], f"{Key}.npy")
+
+    # ? Decode through the cache.
+    def decode(self, Data: bytes, Flags: int, Path_file: str = '<bytes>') -> tuple[np.ndarray, str, int]:
+        """
+        Return the decoded image of encoded bytes, decoding them only when no tier has it.
+
+        Parameters
+        ----------
+        Data : bytes
+            The content of the image file.
+        Flags : int
+            The cv2.imdecode flags.
+        Path_file : str
+            The path of the image, used in the error message.
+
+        Returns
+        -------
+        tuple[np.ndarray, str, int]
+            The read-only image, the tier that served it ('memory', 'disk' or 'decode')
+            and the number of images evicted from the memory tier.
+
+        Raises
+        ------
+        OSError
+            If the image cannot be decoded.
+        """
+
+        Key = self.key(Data, Flags);
+
+        with ImageCache._Cache_lock:
+            Image = ImageCache._Cache.get(Key);
+
+            if Image is not None:
+                ImageCache._Cache.move_to_end(Key);
+                ImageCache._Counters['Memory_hits'] += 1;
+                return Image, 'memory', 0
+
+        Tier = 'decode';
+
+        if self.Folder is not None and os.path.isfile(self.__path(Key)):
+            try:
+                Image = np.load(self.__path(Key), mmap_mode = 'r');
+                Tier = 'disk';
+            except (OSError, ValueError):
+                Image = None;
+
+        if Image is None:
+            Image = ImageReader.decode(Data, Flags, Path_file);
+            Image.flags.writeable = False;
+
+            if self.Folder is not None:
+                Path_cache = self.__path(Key);
+                os.makedirs(os.path.dirname(Path_cache), exist_ok = True);
+
+                # * Unique temporary name, the workers may decode the same content at once
+                Temporary = f"{Path_cache}.{os.getpid()}.{threading.get_ident()}.tmp";
+
+                with open(Temporary, 'wb') as File:
+                    np.save(File, Image);
+
+                os.replace(Temporary, Path_cache);
+
+        self.__count('Disk_hits' if Tier == 'disk' else 'Misses');
+
+        return Image, Tier, self.__remember(Key, Image) if self.Max_bytes > 0 else 0
+
+    # ? Read an image file through the cache.
+    def read(self, Path_file: str, Flags: int) -> np.ndarray:
+        """
+        Read the bytes of an image file and decode them through the cache.
+
+        Parameters
+        ----------
+        Path_file : str
+            The path of the image.
+        Flags : int
+            The cv2.imdecode flags.
+
+        Returns
+        -------
+        np.ndarray
+            The read-only image.
+        """
+
+        Image, _, _ = self.decode(ImageReader.read_bytes(Path_file), Flags, Path_file);
+
+        return Image
+
+    # ? Counters of the process.
+    @staticmethod
+    def stats() -> dict:
+        """
+        Return the counters of the current process.
+
+        Returns
+        -------
+        dict
+            'Memory_hits', 'Disk_hits', 'Misses', 'Evictions', 'Entries' and 'Bytes' of the memory tier.
+        """
+
+        with ImageCache._Cache_lock:
+            return dict(ImageCache._Counters, Entries = len(ImageCache._Cache), Bytes = ImageCache._Bytes)
+
+    # ? Counters of a run.
+    @staticmethod
+    def summary(Results: list[dict]) -> dict:
+        """
+        Return the cache counters of the results of a run, gathered from every process.
+
+        Parameters
+        ----------
+        Results : list[dict]
+            The results of the jobs, whose 'Cache' is (tier, evicted) or None.
+
+        Returns
+        -------
+        dict
+            'Memory_hits', 'Disk_hits', 'Misses' and 'Evictions'.
+        """
+
+        Summary = {'Memory_hits': 0, 'Disk_hits': 0, 'Misses': 0, 'Evictions': 0};
+        Names = {'memory': 'Memory_hits', 'disk': 'Disk_hits', 'decode': 'Misses'};
+
+        for Result in Results:
+            if Result.get('Cache') is None:
+                continue;
+
+            Tier, Evicted = Result['Cache'];
+            Summary[Names[Tier]] += 1;
+            Summary['Evictions'] += Evicted;
+
+        return Summary
+
+    # ? Empty the memory tier.
+    @staticmethod
+    def clear() -> None:
+        """
+        Empty the memory tier of the current process and reset its counters.
+        """
+
+        with ImageCache._Cache_lock:
+            ImageCache._Cache.clear();
+            ImageCache._Bytes = 0;
+            ImageCache._Counters = dict.fromkeys(ImageCache._Counters, 0);
@@ -0,0 +1,164 @@
+# ? Class for decoding images.
+import cv2
+import numpy as np
+
+class ImageReader:
+    """
+    A class used to decode images with a configurable channel layout and depth.
+
+    Decode modes
+    ------------
+    unchanged
+        Keeps the channels and depth of the source (a Mini-MIAS PGM stays 1-channel, 8 bits).
+    grayscale
+        Decodes into a single channel.
+    color
+        Decodes into 3-channel BGR (the default of cv2.imread).
+
+    With ``anydepth`` the 'grayscale' and 'color' modes keep 16-bit sources in 16 bits
+    (cv2.IMREAD_ANYDEPTH) instead of converting them to 8 bits.
+
+    Methods
+    -------
+    flags(Mode, Anydepth)
+        Returns the cv2.imread flags of a decode mode.
+    read(Path_file, Flags)
+        Decodes an image from disk.
+    read_bytes(Path_file)
+        Reads the raw bytes of an image.
+    decode(Data, Flags, Path_file)
+        Decodes the raw bytes of an image.
+
+    Example
+    -------
+    Flags = ImageReader.flags('grayscale', Anydepth = True);
+    Image = ImageReader.read('mdb001.pgm', Flags);
+    """
+
+    # * List of Image Formats Supported by OpenCV
+    Extensions = ('.bmp', '.pbm', '.pgm', '.ppm', '.sr', '.ras', '.jpeg', '.jpg', '.jpe', '.jp2', '.tiff', '.tif', '.png');
+
+    Decode_modes = {
+        'unchanged': cv2.IMREAD_UNCHANGED,
+        'grayscale': cv2.IMREAD_GRAYSCALE,
+        'color': cv2.IMREAD_COLOR,
+    };
+
+    # ? Flags of a decode mode.
+    @staticmethod
+    def flags(Mode: str = 'unchanged', Anydepth: bool = False) -> int:
+        """
+        Return the cv2.imread flags of a decode mode.
+
+        Parameters
+        ----------
+        Mode : str
+            One of 'unchanged', 'grayscale' or 'color' (default is 'unchanged').
+        Anydepth : bool
+            Keep 16-bit sources in 16 bits for the 'grayscale' and 'color' modes (default is False).
+
+        Returns
+        -------
+        int
+            The flags for cv2.imread.
+
+        Raises
+        ------
+        ValueError
+            If the decode mode is not supported.
+        """
+
+        if Mode not in ImageReader.Decode_modes:
+            raise ValueError(f"Decode mode {Mode} incompatible, it must be: {tuple(ImageReader.Decode_modes)}");
+
+        Flags = ImageReader.Decode_modes[Mode];
+
+        # * IMREAD_UNCHANGED already keeps the depth of the source
+        if Anydepth and Mode != 'unchanged':
+            Flags |= cv2.IMREAD_ANYDEPTH;
+
+        return Flags
+
+    # ? Read an image.
+    @staticmethod
+    def read(Path_file: str, Flags: int = cv2.IMREAD_UNCHANGED) -> np.ndarray:
+        """
+        Decode an image from disk.
+
+        Parameters
+        ----------
+        Path_file : str
+            The path of the image.
+        Flags : int
+            The cv2.imread flags (default is cv2.IMREAD_UNCHANGED).
+
+        Returns
+        -------
+        np.ndarray
+            The decoded image.
+
+        Raises
+        ------
+        OSError
+            If the image cannot be read.
+        """
+
+        Image = cv2.imread(Path_file, Flags);
+
+        if Image is None:
+            raise OSError(f"Cannot read {Path_file}");
+
+        return Image
+
+    # ? Read the raw bytes of an image.
+    @staticmethod
+    def read_bytes(Path_file: str) -> bytes:
+        """
+        Read the raw (encoded) bytes of an image, so reading and decoding can be timed or run apart.
+
+        Parameters
+        ----------
+        Path_file : str
+            The path of the image.
+
+        Returns
+        -------
+        bytes
+            The content of the file.
+        """
+
+        with open(Path_file, 'rb') as File:
+            return File.read()
+
+    # ? Decode the raw bytes of an image.
+    @staticmethod
+    def decode(Data: bytes, Flags: int = cv2.IMREAD_UNCHANGED, Path_file: str = '<bytes>') -> np.ndarray:
+        """
+        Decode the raw bytes of an image.
+
+        Parameters
+        ----------
+        Data : bytes
+            The content of the image file.
+        Flags : int
+            The cv2.imdecode flags (default is cv2.IMREAD_UNCHANGED).
+        Path_file : str
+            The path of the image, used in the error message.
+
+        Returns
+        -------
+        np.ndarray
+            The decoded image.
+
+        Raises
+        ------
+        OSError
+            If the image cannot be decoded.
+        """
+
+        Image = cv2.imdecode(np.frombuffer(Data, dtype = np.uint8), Flags);
+
+        if Image is None:
+            raise OSError(f"Cannot read {Path_file}");
+
+        return Image
@@ -1,14 +1,45 @@
 import os
+import re
 import logging
+import time
+import threading
 
-import tqdm
+from typing import Optional, NamedTuple
 
-from typing import Optional
+from Class_ImageReader import ImageReader
+from Class_EventReporter import EventReporter
+from Class_Data import Data
+
+class ImageEntry(NamedTuple):
+  """
+  A lightweight entry of a scanned image.
+
+  Attributes
+  ----------
+  name : str
+    The file name, relative to the scanned folder (e.g. 'mdb001.pgm' or 'sub/mdb001.pgm').
+  path : str
+    The full path of the file.
+  size : int
+    The size of the file in bytes.
+  mtime : int
+    The modification time of the file in nanoseconds.
+  """
+
+  name: str
+  path: str
+  size: int
+  mtime: int
 
 class ImageSorter:
   """
   A class for sorting and displaying image files within a folder.
 
+  The folder is read with a single os.scandir pass that keeps only the files with a supported
+  image extension. Listings are cached per folder and reused while the modification time of
+  the scanned directories does not change, so repeated calls (e.g. from ChangeFormat and
+  CropImages) do not touch the folder again.
+
   Attributes
   ----------
   Folder_path : str
@@ -16,13 +47,21 @@ class ImageSorter:
 
   Methods
   -------
+  scan()
+    Returns the image entries of the folder.
   sort_images()
     Sorts the image files in the folder and displays their details.
+  clear_cache()
+    Forgets every cached listing.
 
   """
 
+  # * Cached listings: key -> (directory mtimes, entries)
+  _Cache: dict = {};
+  _Cache_lock = threading.Lock();
+
   # * Initializing (Constructor)
-  def __init__(self, Folder_path: str) -> None:
+  def __init__(self, Folder_path: str, **kwargs) -> None:
     """
     Initialize the ImageSorter class.
 
@@ -30,16 +69,135 @@ class ImageSorter:
     ----------
     folder_path : str
         The path to the folder containing image files.
+    extensions : tuple[str]
+        The extensions kept by the scan (default is every format supported by OpenCV).
+    natural : bool
+        Sort numbers by value, so mdb2 comes before mdb10 (default is True).
+    recursive : bool
+        Scan the subfolders too (default is False).
+    cache : bool
+        Reuse the listing while the folder does not change (default is True).
+    verbosity : int
+        Console output, see EventReporter (default is EventReporter.PROGRESS).
+    events : str
+        Path of a JSON-lines file receiving the scan event (default is None).
     """
 
     logging.info("Initializing ImageSorter class...");
     self.__Folder_path = Folder_path;
 
+    self.__Extensions = tuple(Extension.lower() for Extension in kwargs.get('extensions', ImageReader.Extensions));
+    self.__Natural = kwargs.get('natural', True);
+    self.__Recursive = kwargs.get('recursive', False);
+    self.__Cache = kwargs.get('cache', True);
+
+    self.__Verbosity = kwargs.get('verbosity', EventReporter.PROGRESS);
+    self.__Events = kwargs.get('events', None);
+
+  # * Natural sort key, 'mdb2' < 'mdb10'
+  @staticmethod
+  def natural_key(Name: str) -> list:
+    return [int(Part) if Part.isdigit() else Part for Part in re.split(r'(\d+)', Name)]
+
+  #? Forget the cached listings.
+  @staticmethod
+  def clear_cache() -> None:
+    """
+    Forget every cached listing.
+    """
+
+    with ImageSorter._Cache_lock:
+      ImageSorter._Cache.clear();
+
+  # * Single scandir pass over a folder (and its subfolders)
+  def __scan_folder(self) -> tuple[dict, list[ImageEntry]]:
+
+    Directory_mtimes = {};
+    Entries = [];
+    Pending = [(self.__Folder_path, '')];
+
+    while Pending:
+      Directory, Prefix = Pending.pop();
+      Directory_mtimes[Directory] = os.stat(Directory).st_mtime_ns;
+
+      with os.scandir(Directory) as Iterator:
+        for Entry in Iterator:
+
+          if Entry.is_dir():
+            if self.__Recursive:
+              Pending.append((Entry.path, Prefix + Entry.name + os.sep));
+            continue;
+
+          if os.path.splitext(Entry.name)[1].lower() not in self.__Extensions or not Entry.is_file():
+            continue;
+
+          Stat = Entry.stat();
+          Entries.append(ImageEntry(Prefix + Entry.name, Entry.path, Stat.st_size, Stat.st_mtime_ns));
+
+    Entries.sort(key = (lambda Entry: self.natural_key(Entry.name)) if self.__Natural else (lambda Entry: Entry.name));
+
+    return Directory_mtimes, Entries
+
+  #? Scan the image files of the folder.
+  def scan(self) -> list[ImageEntry]:
+    """
+    Return the sorted image entries of the folder.
+
+    Returns
+    -------
+    list[ImageEntry]
+        The name, path, size and modification time of every image file.
+
+    Raises
+    ------
+    ValueError
+        If the folder is None.
+    TypeError
+        If the folder is not a string.
+    """
+
+    # * Check if folder_path is None
+    if self.__Folder_path is None:
+        raise ValueError("Folder does not exist");
+
+    # * Check if folder_path is a string
+    if not isinstance(self.__Folder_path, str):
+        raise TypeError("Folder must be a string");
+
+    Key = (os.path.abspath(self.__Folder_path), self.__Extensions, self.__Natural, self.__Recursive);
+
+    # * A cached listing is valid while none of its directories changed
+    if self.__Cache:
+      with ImageSorter._Cache_lock:
+        Cached = ImageSorter._Cache.get(Key);
+
+      if Cached is not None:
+        Directory_mtimes, Entries = Cached;
+
+        try:
+          if all(os.stat(Directory).st_mtime_ns == Mtime for Directory, Mtime in Directory_mtimes.items()):
+            return list(Entries)
+        except OSError:
+          pass;
+
+    Directory_mtimes, Entries = self.__scan_folder();
+
+    if self.__Cache:
+      with ImageSorter._Cache_lock:
+        ImageSorter._Cache[Key] = (Directory_mtimes, Entries);
+
+    return list(Entries)
+
   #? Sort the image files in the folder and display their details.
   def sort_images(self, log_folder: Optional[str] = None) -> tuple[list[str], int]:
     """
     Sort the image files in the folder and display their details.
 
+    Parameters
+    ----------
+    log_folder : str, optional
+        Folder receiving a 'sort_images.jsonl' events file, when no events file was given to the constructor.
+
     Returns
     -------
     Sorted_files : list[str]
@@ -48,64 +206,28 @@ class ImageSorter:
         The number of image files in the folder.
     """
 
-    Asterisks = 60;
+    Events = self.__Events;
+
+    if Events is None and log_folder is not None:
+      Events = os.path.join(log_folder, 'sort_images.jsonl');
 
-    logging.info(f"Sorting image files in folder: {self.__Folder_path}");
+    Reporter = EventReporter(Data.Sort_images_name, self.__Verbosity, Events);
 
     # * Try to sort the images and display the results.
     try:
-        # * Check if folder_path is None
-        if self.__Folder_path is None:
-            raise ValueError("Folder does not exist");
-
-        # * Check if folder_path is a string
-        if not isinstance(self.__Folder_path, str):
-            raise TypeError("Folder must be a string");
-
-        # * Create a logging handler for the file.
-        if log_folder is not None:
-            log_file_path = os.path.join(log_folder, 'sort_images.log')
-        else:
-            log_file_path = 'sort_images.log'
-
-        file_handler = logging.FileHandler(log_file_path);
-        file_handler.setLevel(logging.DEBUG);
+        Start_time = time.perf_counter();
 
-        # * Add the handler to the logger.
-        logging.getLogger('sort_images').addHandler(file_handler);
+        # * Get the sorted list of images in the folder
+        Sorted_files = [Entry.name for Entry in self.scan()];
+        Number_images = len(Sorted_files);
 
-        # * Get the number of images in the folder
-        Number_images = len(os.listdir(self.__Folder_path));
-        logging.debug(f"Number of images: {Number_images}");
+        Reporter.event('scan', folder = self.__Folder_path, images = Number_images, duration = time.perf_counter() - Start_time);
 
         # * Print the number of images
-        print("\n");
-        print("*" * Asterisks);
-        print(f'Images: {Number_images}');
-        print("*" * Asterisks);
-
-        # * Get the list of files in the folder
-        files = os.listdir(self.__Folder_path);
-        logging.debug(f"Files in folder: {files}");
-
-        # * Sort the list of files
-        Sorted_files = sorted(files);
-        logging.debug(f"Sorted files: {Sorted_files}");
-
-        # * Print the sorted files
-        print("\n")
-        for index, sort_file in enumerate(tqdm.tqdm(Sorted_files, total=Number_images)):
-            print(f"Index: {index} ----- {sort_file} ✅");
-
-        print("\n")
+        Reporter.message(f'Images: {Number_images}');
 
         return Sorted_files, Number_images
     except Exception as e:
         logging.error(f"Failed to sort images: {e}")
+        Reporter.event('error', folder = self.__Folder_path, error = str(e));
         raise e
-
-    finally:
-        logging.info("Finished sorting images.")
-
-        # * Remove the file handler.
-        logging.getLogger('sort_images').removeHandler(file_handler);
\ No newline at end of file
@@ -0,0 +1,216 @@
+# ? Class for writing images into several folders.
+import os
+import cv2
+import numpy as np
+
+from typing import Optional
+
+from Class_StageProfiler import StageProfiler
+
+class ImageWriter:
+    """
+    A class used to encode an image once and place it into one or more files.
+
+    Link modes
+    ----------
+    encode
+        Calls cv2.imwrite for every path (one encode per path).
+    copy
+        Encodes once and writes the same bytes into every path.
+    hardlink
+        Encodes once, writes the first path and hardlinks the others to it.
+    symlink
+        Encodes once, writes the first path and symlinks the others to it.
+
+    Hardlinks and symlinks fall back to a copy of the encoded bytes when the
+    link cannot be created (e.g. across filesystems).
+
+    Methods
+    -------
+    encode(Image, Format, Params)
+        Encodes an image into the bytes of the given format.
+    write(Image, Paths, Link_mode, Params)
+        Writes an image into every path.
+    place(Data, Paths, Link_mode)
+        Writes encoded bytes into every path.
+
+    Example
+    -------
+    ImageWriter.write(Image, ['Benign/mdb001.png', 'Tumor/mdb001.png'], 'hardlink');
+    """
+
+    Link_modes = ('encode', 'copy', 'hardlink', 'symlink');
+
+    # ? Encode an image.
+    @staticmethod
+    def encode(Image: np.ndarray, Format: str, Params: Optional[list[int]] = None) -> bytes:
+        """
+        Encode an image into the bytes of the given format.
+
+        Parameters
+        ----------
+        Image : np.ndarray
+            The image to encode.
+        Format : str
+            The extension of the format (e.g. '.png').
+        Params : list[int], optional
+            The encoder parameters (see EncodeProfile).
+
+        Returns
+        -------
+        bytes
+            The encoded image.
+
+        Raises
+        ------
+        OSError
+            If OpenCV cannot encode the image.
+        """
+
+        Success, Buffer = cv2.imencode(Format, Image, Params or []);
+
+        if not Success:
+            raise OSError(f"Cannot encode image as {Format}");
+
+        return Buffer.tobytes()
+
+    # ? Write the bytes of an image.
+    @staticmethod
+    def write_bytes(Data: bytes, Path: str) -> None:
+        """
+        Write the encoded bytes of an image into a file.
+
+        Parameters
+        ----------
+        Data : bytes
+            The encoded image.
+        Path : str
+            The path of the file.
+        """
+
+        with open(Path, 'wb') as File:
+            File.write(Data);
+
+    # ? Link a file into another path.
+    @staticmethod
+    def link(Source: str, Path: str, Data: bytes, Link_mode: str) -> None:
+        """
+        Link a written file into another path, or copy its bytes if linking fails.
+
+        Parameters
+        ----------
+        Source : str
+            The path of the written file.
+        Path : str
+            The path of the link.
+        Data : bytes
+            The encoded image, used when the link cannot be created.
+        Link_mode : str
+            'hardlink' or 'symlink'.
+        """
+
+        # * A stale file or link would make os.link/os.symlink fail
+        if os.path.lexists(Path):
+            os.remove(Path);
+
+        try:
+            if Link_mode == 'hardlink':
+                os.link(Source, Path);
+            else:
+                os.symlink(os.path.abspath(Source), Path);
+
+        except OSError:
+            ImageWriter.write_bytes(Data, Path);
+
+    # ? Write encoded bytes into several paths.
+    @staticmethod
+    def place(Data: bytes, Paths: list[str], Link_mode: str = 'copy') -> list[str]:
+        """
+        Write the encoded bytes of an image into the first path and copy or link them into the others.
+
+        Parameters
+        ----------
+        Data : bytes
+            The encoded image.
+        Paths : list[str]
+            The paths of the files.
+        Link_mode : str
+            One of 'copy', 'hardlink' or 'symlink' (default is 'copy').
+
+        Returns
+        -------
+        list[str]
+            The written paths.
+        """
+
+        if not Paths:
+            return []
+
+        # * Remove a previous link so the write does not go through it
+        if os.path.islink(Paths[0]):
+            os.remove(Paths[0]);
+
+        ImageWriter.write_bytes(Data, Paths[0]);
+
+        for Path in Paths[1:]:
+            if Link_mode in ('copy', 'encode'):
+                ImageWriter.write_bytes(Data, Path);
+            else:
+                ImageWriter.link(Paths[0], Path, Data, Link_mode);
+
+        return list(Paths)
+
+    # ? Write an image into several paths.
+    @staticmethod
+    def write(Image: np.ndarray, Paths: list[str], Link_mode: str = 'copy', Params: Optional[list[int]] = None, Stages: Optional[dict] = None) -> list[str]:
+        """
+        Write an image into every path using the selected link mode.
+
+        Parameters
+        ----------
+        Image : np.ndarray
+            The image to write.
+        Paths : list[str]
+            The paths of the files, all of them with the same extension.
+        Link_mode : str
+            One of 'encode', 'copy', 'hardlink' or 'symlink' (default is 'copy').
+        Params : list[int], optional
+            The encoder parameters (see EncodeProfile).
+        Stages : dict, optional
+            Stage name -> seconds, the 'encode' and 'write' times are added to it (see StageProfiler).
+            With the 'encode' link mode cv2.imwrite does both and is counted as 'encode'.
+
+        Returns
+        -------
+        list[str]
+            The written paths.
+
+        Raises
+        ------
+        ValueError
+            If the link mode is not supported.
+        OSError
+            If the image cannot be encoded or written.
+        """
+
+        if Link_mode not in ImageWriter.Link_modes:
+            raise ValueError(f"Link mode {Link_mode} incompatible, it must be: {ImageWriter.Link_modes}");
+
+        if not Paths:
+            return []
+
+        if Link_mode == 'encode':
+            with StageProfiler.stage(Stages, 'encode'):
+                for Path in Paths:
+                    if not cv2.imwrite(Path, Image, Params or []):
+                        raise OSError(f"Cannot write {Path}");
+
+            return list(Paths)
+
+        _, Format = os.path.splitext(Paths[0]);
+
+        with StageProfiler.stage(Stages, 'encode'):
+            Data = ImageWriter.encode(Image, Format, Params);
+
+        with StageProfiler.stage(Stages, 'write'):
+            return ImageWriter.place(Data, Paths, Link_mode)
@@ -0,0 +1,116 @@
+# ? Lookup index of the Mini-MIAS lesions.
+import numpy as np
+import pandas as pd
+
+class LesionIndex:
+    """
+    A class used to index the crop plan of the Mini-MIAS annotations by REFNUM.
+
+    The plan is read once and each REFNUM is mapped to a compact NumPy array
+    with one row per crop, so images with several lesions (e.g. mdb005) are
+    handled without relying on the position of the rows. Only the valid boxes
+    that are at least partially inside the image are indexed.
+
+    Methods
+    -------
+    get(Refnum)
+        Returns the crop records of an image.
+    refnums()
+        Returns the indexed REFNUMs in the order of the plan.
+
+    Attributes
+    ----------
+    Severity : int
+        Column of the severity label in the records.
+    Number : int
+        Column of the lesion number inside the image.
+    Y0, Y1, X0, X1 : int
+        Columns of the crop rectangle (end exclusive).
+
+    Example
+    -------
+    Index = LesionIndex(CropPlanner(Shapes = 50, Xmean = 200, Ymean = 400).plan(Dataframe));
+    Records = Index.get('mdb005');
+    """
+
+    # * Column of the plan
+    Refnum_column = 'REFNUM';
+
+    # * Columns of the records
+    Columns = ('Severity', 'Number', 'Y0', 'Y1', 'X0', 'X1');
+
+    Severity = 0;
+    Number = 1;
+    Y0 = 2;
+    Y1 = 3;
+    X0 = 4;
+    X1 = 5;
+
+    # * Initializing (Constructor)
+    def __init__(self, Plan: pd.DataFrame) -> None:
+        """
+        Parameters
+        ----------
+        Plan : pd.DataFrame
+            The crop plan returned by CropPlanner.plan.
+        """
+
+        Plan = Plan[Plan['Valid'] & ~Plan['Outside']];
+
+        Values = Plan[list(self.Columns)].to_numpy(dtype = np.int32);
+
+        # * Group every row position by REFNUM once
+        Positions = Plan.groupby(self.Refnum_column, sort = False).indices;
+
+        self.__Index: dict[str, np.ndarray] = {str(Refnum): Values[Rows] for Refnum, Rows in Positions.items()};
+
+    # * Class description
+    def __str__(self) -> str:
+        """
+        Return a string description of the LesionIndex object.
+
+        Returns:
+        ----------
+        str
+            A string description of the LesionIndex object.
+        """
+
+        return f'''{self.__class__.__name__}:A class used to index the Mini-MIAS lesions by REFNUM ({len(self.__Index)} images).''';
+
+    def __len__(self) -> int:
+        return len(self.__Index)
+
+    def __contains__(self, Refnum: str) -> bool:
+        return Refnum in self.__Index
+
+    # ? Records of an image.
+    def get(self, Refnum: str) -> np.ndarray:
+        """
+        Return the crop records of an image.
+
+        Parameters
+        ----------
+        Refnum : str
+            The REFNUM of the image (file name without extension).
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (crops, 6) with the severity, lesion number and Y0, Y1, X0, X1 box of each crop,
+            or an empty array if the REFNUM is not indexed.
+        """
+
+        return self.__Index.get(Refnum, np.empty((0, len(self.Columns)), dtype = np.int32))
+
+    # ? Indexed REFNUMs.
+    def refnums(self) -> list[str]:
+        """
+        Return the indexed REFNUMs in the order of the plan.
+
+        Returns
+        -------
+        list[str]
+            The REFNUMs.
+        """
+
+        return list(self.__Index.keys())
@@ -0,0 +1,200 @@
+# ? Class for tracking processed files.
+import os
+import json
+import hashlib
+import logging
+
+class Manifest:
+    """
+    A class used to remember which inputs were already processed and with which parameters.
+
+    Each entry is keyed by the source path and stores its size, modification time,
+    optional content hash, the parameters used and the output paths. A source is up to
+    date when its fingerprint and parameters did not change and all its outputs still
+    exist. The manifest is a JSON file written atomically.
+
+    Methods
+    -------
+    is_up_to_date(Source, Params)
+        Returns True if the source does not need to be processed again.
+    update(Source, Params, Outputs)
+        Records a processed source.
+    save()
+        Writes the manifest to disk.
+
+    Example
+    -------
+    Manifest_file = Manifest(os.path.join(New_folder, Manifest.Default_name));
+    if not Manifest_file.is_up_to_date(Path_file, Params):
+        ...
+        Manifest_file.update(Path_file, Params, [Output]);
+    Manifest_file.save();
+    """
+
+    Default_name = '.manifest.json';
+
+    # * Initializing (Constructor)
+    def __init__(self, Path: str, Use_hash: bool = False) -> None:
+        """
+        Parameters
+        ----------
+        Path : str
+            The path of the manifest file.
+        Use_hash : bool
+            Compare the content hash of the sources when their size or modification time changed (default is False).
+        """
+
+        self.logger = logging.getLogger(__name__);
+
+        self.Path = Path;
+        self.Use_hash = Use_hash;
+
+        self.__Entries: dict[str, dict] = {};
+
+        if os.path.isfile(self.Path):
+            try:
+                with open(self.Path, 'r') as File:
+                    self.__Entries = json.load(File);
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Ignoring unreadable manifest {self.Path}: {str(e)}");
+
+    # * Class description
+    def __str__(self) -> str:
+        """
+        Return a string description of the Manifest object.
+
+        Returns:
+        ----------
+        str
+            A string description of the Manifest object.
+        """
+
+        return f'''{self.__class__.__name__}:A class used to track processed files ({len(self.__Entries)} entries).''';
+
+    def __len__(self) -> int:
+        return len(self.__Entries)
+
+    # ? Content hash of a file.
+    @staticmethod
+    def hash_file(Path: str, Chunk_size: int = 1 << 20) -> str:
+        """
+        Return the SHA-1 of a file.
+
+        Parameters
+        ----------
+        Path : str
+            The path of the file.
+        Chunk_size : int
+            Number of bytes read at once (default is 1 MiB).
+
+        Returns
+        -------
+        str
+            The hexadecimal digest.
+        """
+
+        Digest = hashlib.sha1();
+
+        with open(Path, 'rb') as File:
+            for Chunk in iter(lambda: File.read(Chunk_size), b''):
+                Digest.update(Chunk);
+
+        return Digest.hexdigest()
+
+    # * Parameters as a canonical string
+    @staticmethod
+    def __params_key(Params: dict) -> str:
+        return json.dumps(Params, sort_keys = True, default = str)
+
+    # ? Check if a source needs to be processed.
+    def is_up_to_date(self, Source: str, Params: dict) -> bool:
+        """
+        Return True if the source was processed with the same parameters and did not change.
+
+        Parameters
+        ----------
+        Source : str
+            The path of the source file.
+        Params : dict
+            The parameters that affect the outputs of the source (JSON serializable).
+
+        Returns
+        -------
+        bool
+            True if the source does not need to be processed again.
+        """
+
+        Entry = self.__Entries.get(Source);
+
+        if Entry is None or Entry['Params'] != self.__params_key(Params):
+            return False
+
+        try:
+            Stat = os.stat(Source);
+        except OSError:
+            return False
+
+        if not all(os.path.exists(Output) for Output in Entry['Outputs']):
+            return False
+
+        if Stat.st_size == Entry['Size'] and Stat.st_mtime_ns == Entry['Mtime']:
+            return True
+
+        # * The file was touched or rewritten, the content decides
+        if self.Use_hash and Entry.get('Hash') is not None and Stat.st_size == Entry['Size']:
+            if self.hash_file(Source) == Entry['Hash']:
+                Entry['Mtime'] = Stat.st_mtime_ns;
+                return True
+
+        return False
+
+    # ? Record a processed source.
+    def update(self, Source: str, Params: dict, Outputs: list[str]) -> None:
+        """
+        Record a processed source with its parameters and outputs.
+
+        Parameters
+        ----------
+        Source : str
+            The path of the source file.
+        Params : dict
+            The parameters used to process the source (JSON serializable).
+        Outputs : list[str]
+            The paths written for the source.
+        """
+
+        Stat = os.stat(Source);
+
+        self.__Entries[Source] = {
+            'Size': Stat.st_size,
+            'Mtime': Stat.st_mtime_ns,
+            'Hash': self.hash_file(Source) if self.Use_hash else None,
+            'Params': self.__params_key(Params),
+            'Outputs': list(Outputs),
+        };
+
+    # ? Forget a source.
+    def remove(self, Source: str) -> None:
+        """
+        Remove the entry of a source, e.g. after it failed.
+
+        Parameters
+        ----------
+        Source : str
+            The path of the source file.
+        """
+
+        self.__Entries.pop(Source, None);
+
+    # ? Write the manifest.
+    def save(self) -> None:
+        """
+        Write the manifest to disk through a temporary file, so a crash never leaves it half-written.
+        """
+
+        Temporary_path = self.Path + '.tmp';
+
+        with open(Temporary_path, 'w') as File:
+            json.dump(self.__Entries, File);
+
+        os.replace(Temporary_path, self.Path);
@@ -0,0 +1,165 @@
+# ? Class for bringing crops to a fixed size.
+import cv2
+import numpy as np
+
+class PatchNormalizer:
+    """
+    A class used to turn the crops of arbitrary size into patches of a fixed side.
+
+    Policies
+    --------
+    center
+        Crops a window of the target side centered on the box, moved inside the image
+        when the box is near a border. Keeps the original resolution.
+    resize
+        Resizes the crop of the box to the target side (area interpolation when
+        shrinking, cubic when enlarging).
+    pad
+        Pads smaller crops up to the target side with the border mode ('reflect' or
+        'constant'), center-crops larger ones.
+
+    The normalization runs on the decoded image inside the crop pass, so each
+    image is decoded once and no second resize pass is needed.
+
+    Methods
+    -------
+    normalize(Image, Box, Crop)
+        Returns the normalized box and patch.
+
+    Example
+    -------
+    Normalizer = PatchNormalizer(Size = 224, Policy = 'pad', Pad_mode = 'reflect');
+    Box, Patch = Normalizer.normalize(Image, (Y0, Y1, X0, X1), Image[Y0:Y1, X0:X1]);
+    """
+
+    Policies = ('center', 'resize', 'pad');
+    Pad_modes = {'reflect': cv2.BORDER_REFLECT_101, 'constant': cv2.BORDER_CONSTANT};
+
+    # * Initializing (Constructor)
+    def __init__(self, Size: int, Policy: str = 'resize', Pad_mode: str = 'constant', Pad_value: int = 0) -> None:
+        """
+        Parameters
+        ----------
+        Size : int
+            The side of the patches.
+        Policy : str
+            One of 'center', 'resize' or 'pad' (default is 'resize').
+        Pad_mode : str
+            Border of the 'pad' policy, 'reflect' or 'constant' (default is 'constant').
+        Pad_value : int
+            Value of the 'constant' border (default is 0).
+
+        Raises
+        ------
+        ValueError
+            If the size, the policy or the pad mode is not supported.
+        """
+
+        if Size is None or Size <= 0:
+            raise ValueError(f"Size {Size} incompatible, it must be a positive integer");
+
+        if Policy not in self.Policies:
+            raise ValueError(f"Policy {Policy} incompatible, it must be: {self.Policies}");
+
+        if Pad_mode not in self.Pad_modes:
+            raise ValueError(f"Pad mode {Pad_mode} incompatible, it must be: {tuple(self.Pad_modes)}");
+
+        self.Size = int(Size);
+        self.Policy = Policy;
+        self.Pad_mode = Pad_mode;
+        self.Pad_value = Pad_value;
+
+    # * Class description
+    def __str__(self) -> str:
+        """
+        Return a string description of the PatchNormalizer object.
+
+        Returns:
+        ----------
+        str
+            A string description of the PatchNormalizer object.
+        """
+
+        return f'''{self.__class__.__name__}:{self.Size}x{self.Size} patches, {self.Policy} policy.''';
+
+    # * Window of the target side centered on the box, kept inside the image
+    def __center_box(self, Image: np.ndarray, Box: tuple[int, int, int, int]) -> tuple[int, int, int, int]:
+
+        Height, Width = Image.shape[:2];
+        Y0, Y1, X0, X1 = Box;
+
+        Y0 = min(max((Y0 + Y1 - self.Size) // 2, 0), max(Height - self.Size, 0));
+        X0 = min(max((X0 + X1 - self.Size) // 2, 0), max(Width - self.Size, 0));
+
+        return Y0, min(Y0 + self.Size, Height), X0, min(X0 + self.Size, Width)
+
+    # * Pad a crop up to the target side, centered
+    def __pad(self, Crop: np.ndarray) -> np.ndarray:
+
+        Height, Width = Crop.shape[:2];
+        Top = (self.Size - Height) // 2 if Height < self.Size else 0;
+        Left = (self.Size - Width) // 2 if Width < self.Size else 0;
+        Bottom = self.Size - Height - Top if Height < self.Size else 0;
+        Right = self.Size - Width - Left if Width < self.Size else 0;
+
+        if Top == Bottom == Left == Right == 0:
+            return Crop
+
+        # * Reflection needs at least two pixels on the padded axis
+        Border = self.Pad_modes[self.Pad_mode] if min(Height, Width) > 1 else cv2.BORDER_CONSTANT;
+
+        return cv2.copyMakeBorder(Crop, Top, Bottom, Left, Right, Border, value = self.Pad_value)
+
+    # ? Normalize a crop.
+    def normalize(self, Image: np.ndarray, Box: tuple[int, int, int, int], Crop: np.ndarray) -> tuple[tuple[int, int, int, int], np.ndarray]:
+        """
+        Return the patch of the target side for the box of an image.
+
+        Parameters
+        ----------
+        Image : np.ndarray
+            The decoded image.
+        Box : tuple[int, int, int, int]
+            The box (Y0, Y1, X0, X1) of the crop in the image.
+        Crop : np.ndarray
+            The crop of the box.
+
+        Returns
+        -------
+        tuple[tuple[int, int, int, int], np.ndarray]
+            The box the patch was taken from and the (Size, Size) patch. 'center' and 'pad' may
+            return a view of the image, empty crops are returned unchanged.
+        """
+
+        if Crop.size == 0:
+            return Box, Crop
+
+        if self.Policy == 'resize':
+            Height, Width = Crop.shape[:2];
+
+            if Height == Width == self.Size:
+                return Box, Crop
+
+            Interpolation = cv2.INTER_AREA if Height * Width > self.Size * self.Size else cv2.INTER_CUBIC;
+
+            return Box, cv2.resize(Crop, (self.Size, self.Size), interpolation = Interpolation)
+
+        if self.Policy == 'center':
+            Box = self.__center_box(Image, Box);
+            Y0, Y1, X0, X1 = Box;
+
+            # * Images smaller than the target side are padded
+            return Box, self.__pad(Image[Y0:Y1, X0:X1])
+
+        # * Larger crops keep their central window, smaller ones are padded
+        Height, Width = Crop.shape[:2];
+
+        if Height > self.Size or Width > self.Size:
+            Y0, Y1, X0, X1 = Box;
+            Top = max((Height - self.Size) // 2, 0);
+            Left = max((Width - self.Size) // 2, 0);
+
+            Crop = Crop[Top:Top + self.Size, Left:Left + self.Size];
+            Box = (Y0 + Top, Y0 + Top + Crop.shape[0], X0 + Left, X0 + Left + Crop.shape[1]);
+
+        return Box, self.__pad(Crop)
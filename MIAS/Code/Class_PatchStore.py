@@ -0,0 +1,304 @@
+# ? Class for packing cropped patches into a single memory-mapped file.
+import os
+import json
+import numpy as np
+import pandas as pd
+
+from typing import Optional
+
+class PatchStore:
+    """
+    A class used to pack image patches into a single binary file readable with np.memmap.
+
+    A store is a folder with three files:
+
+    patches.bin
+        The raw pixels of every patch, C order, one after the other.
+    metadata.csv
+        One row per patch with its fields (e.g. REFNUM, Label, source box), its
+        shape and its Offset in elements inside patches.bin.
+    header.json
+        The dtype, the number of patches and, for fixed-size stores, the patch shape.
+
+    Fixed-size stores (every patch with the same shape) are exposed as a single
+    (Count, Height, Width[, Channels]) array. Variable-size stores are read through
+    the offsets. Both give zero-copy views of the memory-mapped file. The files are
+    written under temporary names and renamed when the store is closed, so readers
+    never see a half-written store.
+
+    Methods
+    -------
+    add(Patch, **Fields)
+        Appends a patch and its metadata (write mode).
+    close()
+        Writes the metadata and the header (write mode).
+    abort()
+        Discards the temporary files, the previous store is left untouched (write mode).
+    array()
+        Returns the memory-mapped (Count, Height, Width[, Channels]) array of a fixed-size store (read mode).
+    metadata()
+        Returns the metadata table (read mode).
+
+    Example
+    -------
+    with PatchStore('Patches', mode = 'w') as Store:
+        Store.add(Patch, REFNUM = 'mdb001', Label = 'Benign');
+
+    Store = PatchStore('Patches');
+    Patch = Store[0];
+    Batch = Store.array()[Store.metadata()['Label'] == 'Benign'];
+    """
+
+    Data_name = 'patches.bin';
+    Metadata_name = 'metadata.csv';
+    Header_name = 'header.json';
+
+    # * Initializing (Constructor)
+    def __init__(self, Folder: str, mode: str = 'r', dtype: Optional[np.dtype] = None) -> None:
+        """
+        Parameters
+        ----------
+        Folder : str
+            The folder of the store.
+        mode : str
+            'w' creates (or replaces) the store, 'r' opens it for reading (default is 'r').
+        dtype : np.dtype, optional
+            The dtype of the patches in write mode (default is the dtype of the first patch).
+
+        Raises
+        ------
+        ValueError
+            If the mode is not supported.
+        OSError
+            If the store cannot be opened.
+        """
+
+        if mode not in ('r', 'w'):
+            raise ValueError(f"Mode {mode} incompatible, it must be: ('r', 'w')");
+
+        self.Folder = Folder;
+        self.Mode = mode;
+
+        self.__Dtype = np.dtype(dtype) if dtype is not None else None;
+        self.__Rows: list[dict] = [];
+        self.__Offset = 0;
+        self.__File = None;
+        self.__Data = None;
+        self.__Header: dict = {};
+        self.__Metadata: Optional[pd.DataFrame] = None;
+
+        if mode == 'w':
+            os.makedirs(Folder, exist_ok = True);
+            self.__File = open(self.__path(self.Data_name) + '.tmp', 'wb');
+        else:
+            self.__open();
+
+    # * Class description
+    def __str__(self) -> str:
+        """
+        Return a string description of the PatchStore object.
+
+        Returns:
+        ----------
+        str
+            A string description of the PatchStore object.
+        """
+
+        return f'''{self.__class__.__name__}:{len(self)} patches in {self.Folder}.''';
+
+    def __enter__(self) -> 'PatchStore':
+        return self
+
+    def __exit__(self, Type, *args) -> None:
+        if Type is None:
+            self.close();
+        else:
+            self.abort();
+
+    def __len__(self) -> int:
+        return len(self.__Rows) if self.Mode == 'w' else self.__Header['Count']
+
+    def __path(self, Name: str) -> str:
+        return os.path.join(self.Folder, Name)
+
+    # * Header, metadata and memory map of an existing store
+    def __open(self) -> None:
+
+        with open(self.__path(self.Header_name), 'r') as File:
+            self.__Header = json.load(File);
+
+        self.__Dtype = np.dtype(self.__Header['Dtype']);
+
+        # * np.memmap cannot map an empty file
+        if self.__Header['Count'] > 0:
+            self.__Metadata = pd.read_csv(self.__path(self.Metadata_name), keep_default_na = False);
+            self.__Data = np.memmap(self.__path(self.Data_name), dtype = self.__Dtype, mode = 'r');
+        else:
+            self.__Metadata = pd.DataFrame();
+            self.__Data = np.empty(0, dtype = self.__Dtype);
+
+    # ? Append a patch.
+    def add(self, Patch: np.ndarray, **Fields) -> int:
+        """
+        Append a patch and its metadata to the store.
+
+        Parameters
+        ----------
+        Patch : np.ndarray
+            The patch, (Height, Width) or (Height, Width, Channels).
+        Fields
+            The metadata of the patch (e.g. REFNUM, Label, Y0, Y1, X0, X1).
+
+        Returns
+        -------
+        int
+            The index of the patch.
+
+        Raises
+        ------
+        ValueError
+            If the store is not in write mode or the dtype of the patch differs from the store.
+        """
+
+        if self.Mode != 'w' or self.__File is None:
+            raise ValueError("Store is not open for writing");
+
+        if self.__Dtype is None:
+            self.__Dtype = Patch.dtype;
+
+        if Patch.dtype != self.__Dtype:
+            raise ValueError(f"Patch dtype {Patch.dtype} incompatible, the store holds {self.__Dtype}");
+
+        Patch = np.ascontiguousarray(Patch);
+        self.__File.write(Patch.tobytes());
+
+        Row = dict(Fields);
+        Row['Height'] = Patch.shape[0];
+        Row['Width'] = Patch.shape[1];
+        Row['Channels'] = Patch.shape[2] if Patch.ndim == 3 else 1;
+        Row['Offset'] = self.__Offset;
+
+        self.__Rows.append(Row);
+        self.__Offset += Patch.size;
+
+        return len(self.__Rows) - 1
+
+    # ? Close the store.
+    def close(self) -> None:
+        """
+        Write the metadata and the header and move the files into place. Does nothing in read mode.
+        """
+
+        if self.Mode != 'w' or self.__File is None:
+            return;
+
+        self.__File.close();
+        self.__File = None;
+
+        Metadata = pd.DataFrame(self.__Rows);
+        Shapes = {(Row['Height'], Row['Width'], Row['Channels']) for Row in self.__Rows};
+
+        # * A single shape makes the store addressable as one array
+        Shape = None;
+
+        if len(Shapes) == 1:
+            Height, Width, Channels = Shapes.pop();
+            Shape = [Height, Width] if Channels == 1 else [Height, Width, Channels];
+
+        Header = {
+            'Count': len(self.__Rows),
+            'Dtype': (self.__Dtype or np.dtype(np.uint8)).str,
+            'Shape': Shape,
+        };
+
+        Metadata.to_csv(self.__path(self.Metadata_name) + '.tmp', index = False);
+
+        with open(self.__path(self.Header_name) + '.tmp', 'w') as File:
+            json.dump(Header, File, indent = 2);
+
+        # * The header goes last, a store without it is incomplete
+        if os.path.exists(self.__path(self.Header_name)):
+            os.remove(self.__path(self.Header_name));
+
+        os.replace(self.__path(self.Data_name) + '.tmp', self.__path(self.Data_name));
+        os.replace(self.__path(self.Metadata_name) + '.tmp', self.__path(self.Metadata_name));
+        os.replace(self.__path(self.Header_name) + '.tmp', self.__path(self.Header_name));
+
+    # ? Discard the store.
+    def abort(self) -> None:
+        """
+        Close the data file and remove the temporary files, so a failed run never replaces the
+        previous store with a partial one. Does nothing in read mode.
+        """
+
+        if self.Mode != 'w' or self.__File is None:
+            return;
+
+        self.__File.close();
+        self.__File = None;
+        self.__Data = None;
+
+        for Name in (self.Data_name, self.Metadata_name, self.Header_name):
+            if os.path.exists(self.__path(Name) + '.tmp'):
+                os.remove(self.__path(Name) + '.tmp');
+
+    # ? Read a patch.
+    def __getitem__(self, Index: int) -> np.ndarray:
+        """
+        Return a patch as a read-only view of the memory-mapped file.
+
+        Parameters
+        ----------
+        Index : int
+            The index of the patch.
+
+        Returns
+        -------
+        np.ndarray
+            The patch, (Height, Width) or (Height, Width, Channels).
+        """
+
+        if self.Mode != 'r':
+            raise ValueError("Store is not open for reading");
+
+        Row = self.__Metadata.iloc[Index];
+        Height, Width, Channels = int(Row['Height']), int(Row['Width']), int(Row['Channels']);
+        Offset = int(Row['Offset']);
+
+        Shape = (Height, Width) if Channels == 1 else (Height, Width, Channels);
+
+        return self.__Data[Offset:Offset + Height * Width * Channels].reshape(Shape)
+
+    # ? Patches of a fixed-size store.
+    def array(self) -> np.ndarray:
+        """
+        Return every patch of a fixed-size store as a single memory-mapped array.
+
+        Returns
+        -------
+        np.ndarray
+            The (Count, Height, Width[, Channels]) array, read-only.
+
+        Raises
+        ------
+        ValueError
+            If the patches of the store do not share a single shape.
+        """
+
+        if self.__Header.get('Shape') is None:
+            raise ValueError("Store has patches of different shapes, read them by index");
+
+        return self.__Data.reshape((self.__Header['Count'], *self.__Header['Shape']))
+
+    # ? Metadata of the patches.
+    def metadata(self) -> pd.DataFrame:
+        """
+        Return the metadata of the patches.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per patch with its fields, Height, Width, Channels and Offset.
+        """
+
+        return self.__Metadata if self.Mode == 'r' else pd.DataFrame(self.__Rows)
@@ -0,0 +1,209 @@
+# ? Class for extracting many patches from an image.
+import zlib
+import cv2
+import numpy as np
+
+from typing import Optional
+from numpy.lib.stride_tricks import sliding_window_view
+
+from Class_TissueMask import TissueMask
+
+class PatchTiler:
+    """
+    A class used to extract several square patches from a single decoded image.
+
+    Modes
+    -----
+    grid
+        Every window of a regular grid with the given stride.
+    random
+        'Count' windows at random positions, seeded per image so runs are reproducible.
+    tissue
+        Up to 'Count' windows of the grid, picked at random among the windows whose
+        tissue fraction reaches 'Min_tissue', so the background is skipped.
+
+    The patches are views of np.lib.stride_tricks.sliding_window_view over the image,
+    no pixel is copied until a patch is written.
+
+    Methods
+    -------
+    tissue_mask(Image)
+        Returns the tissue mask used by the 'tissue' mode.
+    positions(Image, Key)
+        Returns the top-left corner of every selected window.
+    tile(Image, Key)
+        Returns the box and the view of every selected window.
+
+    Example
+    -------
+    Tiler = PatchTiler(Size = 64, Stride = 32, Mode = 'tissue', Count = 20);
+    for (Y0, Y1, X0, X1), Patch in Tiler.tile(Image, 'mdb001'):
+        ...
+    """
+
+    Modes = ('grid', 'random', 'tissue');
+
+    # * Initializing (Constructor)
+    def __init__(self, Size: int, Stride: Optional[int] = None, Mode: str = 'grid', Count: int = 16, Seed: int = 0, Min_tissue: float = 0.5) -> None:
+        """
+        Parameters
+        ----------
+        Size : int
+            The side of the patches.
+        Stride : int
+            The step between two windows of the grid (default is Size, no overlap).
+        Mode : str
+            One of 'grid', 'random' or 'tissue' (default is 'grid').
+        Count : int
+            Patches per image of the 'random' and 'tissue' modes (default is 16).
+        Seed : int
+            Seed of the random selection, combined with the key of each image (default is 0).
+        Min_tissue : float
+            Minimum tissue fraction of a window in the 'tissue' mode (default is 0.5).
+
+        Raises
+        ------
+        ValueError
+            If the size, the stride or the mode is not supported.
+        """
+
+        if Size is None or Size <= 0:
+            raise ValueError(f"Size {Size} incompatible, it must be a positive integer");
+
+        if Mode not in self.Modes:
+            raise ValueError(f"Mode {Mode} incompatible, it must be: {self.Modes}");
+
+        self.Size = int(Size);
+        self.Stride = int(Stride) if Stride is not None else self.Size;
+        self.Mode = Mode;
+        self.Count = Count;
+        self.Seed = Seed;
+        self.Min_tissue = Min_tissue;
+
+        if self.Stride <= 0:
+            raise ValueError(f"Stride {self.Stride} incompatible, it must be a positive integer");
+
+    # * Class description
+    def __str__(self) -> str:
+        """
+        Return a string description of the PatchTiler object.
+
+        Returns:
+        ----------
+        str
+            A string description of the PatchTiler object.
+        """
+
+        return f'''{self.__class__.__name__}:{self.Mode} {self.Size}x{self.Size} patches, stride {self.Stride}.''';
+
+    # ? Tissue mask of an image.
+    @staticmethod
+    def tissue_mask(Image: np.ndarray) -> np.ndarray:
+        """
+        Return the tissue mask of an image at its full size (see TissueMask).
+
+        Parameters
+        ----------
+        Image : np.ndarray
+            The decoded image.
+
+        Returns
+        -------
+        np.ndarray
+            A uint8 mask of the image size, 1 on tissue.
+        """
+
+        return TissueMask.full(TissueMask().compute(Image), Image.shape)
+
+    # * Tissue fraction of the windows at the given corners, from the integral image of the mask
+    def __tissue_fraction(self, Mask: np.ndarray, Y: np.ndarray, X: np.ndarray) -> np.ndarray:
+
+        Integral = cv2.integral(Mask);
+        Size = self.Size;
+
+        Sum = Integral[Y + Size, X + Size] - Integral[Y, X + Size] - Integral[Y + Size, X] + Integral[Y, X];
+
+        return Sum / (Size * Size)
+
+    # ? Corners of the selected windows.
+    def positions(self, Image: np.ndarray, Key: str = '', Mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Return the top-left corner of every selected window.
+
+        Parameters
+        ----------
+        Image : np.ndarray
+            The decoded image.
+        Key : str
+            Identifies the image in the seed of the random selection (e.g. the REFNUM).
+        Mask : np.ndarray, optional
+            The tissue mask of the 'tissue' mode (default is PatchTiler.tissue_mask of the image).
+
+        Returns
+        -------
+        np.ndarray
+            A (N, 2) int array with the Y and X of every corner, empty if the image is smaller than a patch.
+        """
+
+        Height, Width = Image.shape[:2];
+
+        if Height < self.Size or Width < self.Size:
+            return np.empty((0, 2), dtype = np.int64)
+
+        # * Seeded by image, so every process selects the same windows
+        Rng = np.random.default_rng([self.Seed, zlib.crc32(Key.encode())]);
+
+        if self.Mode == 'random':
+            Y = Rng.integers(0, Height - self.Size + 1, size = self.Count);
+            X = Rng.integers(0, Width - self.Size + 1, size = self.Count);
+
+            return np.stack([Y, X], axis = 1)
+
+        Y, X = np.meshgrid(np.arange(0, Height - self.Size + 1, self.Stride), np.arange(0, Width - self.Size + 1, self.Stride), indexing = 'ij');
+        Corners = np.stack([Y.ravel(), X.ravel()], axis = 1);
+
+        if self.Mode == 'grid':
+            return Corners
+
+        if Mask is None:
+            Mask = self.tissue_mask(Image);
+
+        Corners = Corners[self.__tissue_fraction(Mask, Corners[:, 0], Corners[:, 1]) >= self.Min_tissue];
+
+        if self.Count is not None and len(Corners) > self.Count:
+            Corners = Corners[np.sort(Rng.choice(len(Corners), self.Count, replace = False))];
+
+        return Corners
+
+    # ? Patches of an image.
+    def tile(self, Image: np.ndarray, Key: str = '', Mask: Optional[np.ndarray] = None) -> list[tuple[tuple[int, int, int, int], np.ndarray]]:
+        """
+        Return the box and the patch of every selected window.
+
+        Parameters
+        ----------
+        Image : np.ndarray
+            The decoded image.
+        Key : str
+            Identifies the image in the seed of the random selection (e.g. the REFNUM).
+        Mask : np.ndarray, optional
+            The tissue mask of the 'tissue' mode.
+
+        Returns
+        -------
+        list[tuple[tuple[int, int, int, int], np.ndarray]]
+            The box (Y0, Y1, X0, X1) and the patch (a view of the image) of every window.
+        """
+
+        Corners = self.positions(Image, Key, Mask);
+
+        if len(Corners) == 0:
+            return []
+
+        Windows = sliding_window_view(Image, (self.Size, self.Size), axis = (0, 1));
+
+        # * Color windows come as (Channels, Size, Size)
+        if Image.ndim == 3:
+            Windows = np.moveaxis(Windows, 2, -1);
+
+        return [((int(Y), int(Y) + self.Size, int(X), int(X) + self.Size), Windows[Y, X]) for Y, X in Corners]
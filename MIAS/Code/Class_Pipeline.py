@@ -0,0 +1,307 @@
+# ? Class for overlapping the reads, the compute and the writes of a batch job.
+import time
+import queue
+import threading
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Iterator
+
+from Class_ImageReader import ImageReader
+from Class_ImageWriter import ImageWriter
+
+class Pipeline:
+    """
+    A class used to run a batch job as three overlapping stages joined by bounded queues.
+
+    Stages
+    ------
+    read
+        'readers' threads read the raw bytes of the sources ahead of the compute stage.
+    compute
+        A pool of 'workers' processes (or threads) decodes, crops and encodes, and returns
+        the encoded outputs instead of writing them.
+    write
+        'writers' threads write the encoded outputs.
+
+    The queues between the stages hold at most 'queue_size' items and at most
+    'queue_size' jobs are in the compute pool, so a slow stage makes the previous
+    ones wait (backpressure) and the memory stays bounded. The compute function
+    receives every job with the keys 'Data' (the raw bytes, or the exception raised
+    while reading) and 'Deferred' (True), and must return a result with the keys
+    'Success', 'Error', 'Time', 'Stages' and 'Writes' (a list of (Paths, Bytes, Link_mode)).
+    The 'read' and 'write' stages of the result are filled by the pipeline.
+
+    Methods
+    -------
+    run(Jobs, Source, Compute, Ordered)
+        Yields the index and result of every job, in completion or job order.
+    utilization()
+        Returns the busy time and utilization of every stage of the last run.
+
+    Example
+    -------
+    Runner = Pipeline(readers = 4, workers = 8, writers = 4, queue_size = 16);
+    for Index, Result in Runner.run(Jobs, lambda Job: Job['Source'], CropWorker.crop_image):
+        ...
+    print(Runner.utilization());
+    """
+
+    # * End of the jobs of a queue
+    __Sentinel = None;
+
+    # * Initializing (Constructor)
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters
+        ----------
+        readers : int
+            Threads reading the sources (default is 4).
+        workers : int
+            Processes or threads of the compute stage (default is 4).
+        writers : int
+            Threads writing the outputs (default is 4).
+        queue_size : int
+            Capacity of every queue and maximum number of jobs in the compute pool (default is 2 * workers).
+        executor : str
+            'process' or 'thread' compute pool (default is 'process').
+        """
+
+        self.Readers: int = max(1, kwargs.get('readers', 4));
+        self.Workers: int = max(1, kwargs.get('workers', 4));
+        self.Writers: int = max(1, kwargs.get('writers', 4));
+        self.Queue_size: int = max(1, kwargs.get('queue_size', 2 * self.Workers));
+        self.Executor: str = kwargs.get('executor', 'process');
+
+        if self.Executor not in ('thread', 'process'):
+            raise ValueError(f"Executor {self.Executor} incompatible, it must be: ('thread', 'process')");
+
+        self.__Busy = {'read': 0.0, 'compute': 0.0, 'write': 0.0};
+        self.__Elapsed = 0.0;
+        self.__Lock = threading.Lock();
+
+    # * Class description
+    def __str__(self) -> str:
+        """
+        Return a string description of the Pipeline object.
+
+        Returns:
+        ----------
+        str
+            A string description of the Pipeline object.
+        """
+
+        return f'''{self.__class__.__name__}:{self.Readers} readers, {self.Workers} {self.Executor} workers, {self.Writers} writers.''';
+
+    # * Time spent by a stage
+    def __add_busy(self, Stage: str, Seconds: float) -> None:
+        with self.__Lock:
+            self.__Busy[Stage] += Seconds;
+
+    # * Read stage: raw bytes of the jobs, in order
+    def __read(self, Jobs: list[dict], Source: Callable, Next: Iterator[int], Next_lock: threading.Lock, Read_queue: queue.Queue, Stop: threading.Event) -> None:
+
+        while not Stop.is_set():
+            with Next_lock:
+                Index = next(Next, None);
+
+            if Index is None:
+                break;
+
+            Start_time = time.perf_counter();
+
+            try:
+                Data = ImageReader.read_bytes(Source(Jobs[Index]));
+            except Exception as e:
+                Data = e;
+
+            Read_time = time.perf_counter() - Start_time;
+            self.__add_busy('read', Read_time);
+
+            # * Blocks while the compute stage is behind
+            self.__put(Read_queue, (Index, Data, Read_time), Stop);
+
+        self.__put(Read_queue, self.__Sentinel, Stop);
+
+    # * Put an item unless the run stopped
+    @staticmethod
+    def __put(Queue: queue.Queue, Item, Stop: threading.Event) -> None:
+
+        while not Stop.is_set():
+            try:
+                Queue.put(Item, timeout = 0.1);
+                return;
+            except queue.Full:
+                continue;
+
+    # * Write stage: encoded outputs of the computed jobs
+    def __write(self, Write_queue: queue.Queue, Done_queue: queue.Queue) -> None:
+
+        while True:
+            Item = Write_queue.get();
+
+            if Item is self.__Sentinel:
+                break;
+
+            Index, Result = Item;
+            Start_time = time.perf_counter();
+
+            try:
+                for Paths, Data, Link_mode in Result.pop('Writes', []):
+                    ImageWriter.place(Data, Paths, Link_mode);
+
+            except Exception as e:
+                Result['Success'] = False;
+                Result['Error'] = str(e);
+
+            Write_time = time.perf_counter() - Start_time;
+            self.__add_busy('write', Write_time);
+
+            Result['Stages']['write'] = Result['Stages'].get('write', 0.0) + Write_time;
+            Result['Time'] += Write_time;
+
+            Done_queue.put((Index, Result));
+
+    # ? Run the jobs.
+    def run(self, Jobs: list[dict], Source: Callable[[dict], str], Compute: Callable[[dict], dict], Ordered: bool = False) -> Iterator[tuple[int, dict]]:
+        """
+        Run the jobs through the read, compute and write stages.
+
+        Parameters
+        ----------
+        Jobs : list[dict]
+            The jobs.
+        Source : Callable[[dict], str]
+            Returns the path read for a job.
+        Compute : Callable[[dict], dict]
+            The compute function, picklable for a process pool (e.g. a static method).
+        Ordered : bool
+            Yield the results in the order of the jobs, holding back the ones that finish early (default is False).
+
+        Yields
+        ------
+        tuple[int, dict]
+            The index of the job and its result, once its outputs are written.
+        """
+
+        if not Ordered:
+            yield from self.__run(Jobs, Source, Compute);
+            return;
+
+        # * The readers go in job order, so only the jobs in flight wait here
+        Held = {};
+        Next_index = 0;
+
+        for Index, Result in self.__run(Jobs, Source, Compute):
+            Held[Index] = Result;
+
+            while Next_index in Held:
+                yield Next_index, Held.pop(Next_index);
+                Next_index += 1;
+
+    # * Read, compute and write stages, results in completion order
+    def __run(self, Jobs: list[dict], Source: Callable[[dict], str], Compute: Callable[[dict], dict]) -> Iterator[tuple[int, dict]]:
+
+        self.__Busy = {'read': 0.0, 'compute': 0.0, 'write': 0.0};
+        Start_time = time.perf_counter();
+
+        Read_queue = queue.Queue(maxsize = self.Queue_size);
+        Write_queue = queue.Queue(maxsize = self.Queue_size);
+        Done_queue = queue.Queue();
+        Stop = threading.Event();
+
+        Next = iter(range(len(Jobs)));
+        Next_lock = threading.Lock();
+
+        Readers = [threading.Thread(target = self.__read, args = (Jobs, Source, Next, Next_lock, Read_queue, Stop), name = f'Pipeline-reader-{i}', daemon = True) for i in range(self.Readers)];
+        Writers = [threading.Thread(target = self.__write, args = (Write_queue, Done_queue), name = f'Pipeline-writer-{i}', daemon = True) for i in range(self.Writers)];
+
+        for Thread in Readers + Writers:
+            Thread.start();
+
+        Executor_class = ProcessPoolExecutor if self.Executor == 'process' else ThreadPoolExecutor;
+        Finished_readers = 0;
+        Pending = {};
+
+        try:
+            with Executor_class(max_workers = self.Workers) as Executor:
+
+                while Finished_readers < self.Readers or Pending:
+
+                    # * Results whose outputs are written
+                    while not Done_queue.empty():
+                        yield Done_queue.get();
+
+                    # * Feed the pool while it has room and the readers have bytes
+                    if Finished_readers < self.Readers and len(Pending) < self.Queue_size:
+                        try:
+                            Item = Read_queue.get(timeout = 0.05 if Pending else None);
+                        except queue.Empty:
+                            Item = False;
+
+                        if Item is self.__Sentinel:
+                            Finished_readers += 1;
+                            continue;
+
+                        if Item is not False:
+                            Index, Data, Read_time = Item;
+                            Job = dict(Jobs[Index], Data = Data, Deferred = True);
+                            Pending[Executor.submit(Compute, Job)] = (Index, Read_time);
+
+                            if len(Pending) < self.Queue_size:
+                                continue;
+
+                    if not Pending:
+                        continue;
+
+                    Done, _ = wait(Pending, timeout = 0.05, return_when = FIRST_COMPLETED);
+
+                    for Future in Done:
+                        Index, Read_time = Pending.pop(Future);
+                        Result = Future.result();
+
+                        self.__add_busy('compute', Result['Time']);
+                        Result['Stages']['read'] = Result['Stages'].get('read', 0.0) + Read_time;
+                        Result['Time'] += Read_time;
+
+                        # * Blocks while the writers are behind
+                        Write_queue.put((Index, Result));
+
+        finally:
+            Stop.set();
+
+            for _ in Writers:
+                Write_queue.put(self.__Sentinel);
+
+            for Thread in Readers + Writers:
+                Thread.join();
+
+            self.__Elapsed = time.perf_counter() - Start_time;
+
+        while not Done_queue.empty():
+            yield Done_queue.get();
+
+    # ? Stage utilization.
+    def utilization(self) -> dict:
+        """
+        Return the busy time and utilization of every stage of the last run.
+
+        The utilization is the busy time divided by the wall time and the number of
+        workers of the stage: a stage close to 1.0 is the bottleneck, a stage close
+        to 0.0 has more workers than it needs.
+
+        Returns
+        -------
+        dict
+            Stage -> {'Workers', 'Busy' (seconds), 'Utilization'}.
+        """
+
+        Workers = {'read': self.Readers, 'compute': self.Workers, 'write': self.Writers};
+
+        return {
+            Stage: {
+                'Workers': Workers[Stage],
+                'Busy': Busy,
+                'Utilization': Busy / (self.__Elapsed * Workers[Stage]) if self.__Elapsed > 0 else 0.0,
+            }
+            for Stage, Busy in self.__Busy.items()
+        }
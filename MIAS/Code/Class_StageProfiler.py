@@ -0,0 +1,311 @@
+# ? Class for profiling the stages of the pipeline.
+import io
+import json
+import time
+import pstats
+import cProfile
+import platform
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+class StageProfiler:
+    """
+    A class used to collect the time spent by each image in each stage of a run.
+
+    Per-image stages (read, decode, crop, encode, write) are measured by the workers
+    with StageProfiler.stage and returned inside their results, so they work across
+    processes. Run stages (list, plan) are measured once per run. The profiler can
+    also capture a cProfile and the tracemalloc peak of a run executed in-process.
+
+    Stages
+    ------
+    list
+        Listing and sorting the input folder.
+    plan
+        Computing the crop boxes and the jobs.
+    read
+        Reading the raw bytes of the image.
+    decode
+        Decoding the image.
+    crop
+        Slicing the boxes out of the image.
+    encode
+        Encoding the outputs.
+    write
+        Writing and linking the encoded outputs.
+
+    Other stages reported by the jobs (e.g. 'features') follow the image stages.
+
+    Methods
+    -------
+    stage(Stages, Name)
+        Context manager adding the time of a block to a stage.
+    add(File, Stages)
+        Records the stages of an image.
+    add_run_stage(Name, Seconds)
+        Records a stage measured once per run.
+    capture(Cprofile, Tracemalloc)
+        Context manager capturing a cProfile and the memory peak of a block.
+    summary()
+        Returns the statistics of every stage.
+    table()
+        Returns the summary as a text table.
+    dump(Path)
+        Writes the per-image timings and the summary as JSON or CSV.
+
+    Example
+    -------
+    Crop_images = CropImages(..., profile_stages = True, profile_output = 'stages.json');
+    Crop_images.CropMIAS();
+    print(Crop_images.get_profiler().summary());
+    """
+
+    Run_stages = ('list', 'plan');
+    Image_stages = ('read', 'decode', 'crop', 'encode', 'write');
+
+    # * Initializing (Constructor)
+    def __init__(self, Name: str) -> None:
+        """
+        Parameters
+        ----------
+        Name : str
+            The name of the profiled job (e.g. 'CropMIAS').
+        """
+
+        self.Name = Name;
+
+        self.__Rows: list[dict] = [];
+        self.__Run: dict[str, float] = {};
+        self.__Captured: dict = {};
+
+    # * Class description
+    def __str__(self) -> str:
+        """
+        Return a string description of the StageProfiler object.
+
+        Returns:
+        ----------
+        str
+            A string description of the StageProfiler object.
+        """
+
+        return f'''{self.__class__.__name__}:{self.Name} stages of {len(self.__Rows)} images.''';
+
+    # ? Time a stage.
+    @staticmethod
+    @contextmanager
+    def stage(Stages: Optional[dict], Name: str) -> Iterator[None]:
+        """
+        Add the time spent in the block to a stage.
+
+        Parameters
+        ----------
+        Stages : dict, optional
+            Stage name -> seconds, updated in place. Nothing is measured if None.
+        Name : str
+            The name of the stage.
+        """
+
+        if Stages is None:
+            yield;
+            return;
+
+        Start_time = time.perf_counter();
+
+        try:
+            yield;
+        finally:
+            Stages[Name] = Stages.get(Name, 0.0) + time.perf_counter() - Start_time;
+
+    # ? Record an image.
+    def add(self, File: str, Stages: dict) -> None:
+        """
+        Record the stages of an image.
+
+        Parameters
+        ----------
+        File : str
+            The image file.
+        Stages : dict
+            Stage name -> seconds.
+        """
+
+        Row = {'File': File};
+        Row.update(Stages);
+        self.__Rows.append(Row);
+
+    # ? Record a run stage.
+    def add_run_stage(self, Name: str, Seconds: float) -> None:
+        """
+        Record a stage measured once per run.
+
+        Parameters
+        ----------
+        Name : str
+            The name of the stage (e.g. 'list').
+        Seconds : float
+            The time spent in the stage.
+        """
+
+        self.__Run[Name] = self.__Run.get(Name, 0.0) + Seconds;
+
+    # ? Capture a cProfile and the memory peak.
+    @contextmanager
+    def capture(self, Cprofile: bool = False, Tracemalloc: bool = False, Top: int = 30) -> Iterator[None]:
+        """
+        Capture a cProfile and the tracemalloc peak of the block, for in-process runs.
+
+        Parameters
+        ----------
+        Cprofile : bool
+            Capture a cProfile, the 'Top' functions by cumulative time are kept (default is False).
+        Tracemalloc : bool
+            Capture the peak of the memory traced by tracemalloc (default is False).
+        Top : int
+            Number of functions kept from the cProfile (default is 30).
+        """
+
+        Profiler = cProfile.Profile() if Cprofile else None;
+
+        if Tracemalloc:
+            tracemalloc.start();
+
+        if Profiler is not None:
+            Profiler.enable();
+
+        try:
+            yield;
+
+        finally:
+            if Profiler is not None:
+                Profiler.disable();
+
+                Stream = io.StringIO();
+                pstats.Stats(Profiler, stream = Stream).sort_stats('cumulative').print_stats(Top);
+                self.__Captured['Cprofile'] = Stream.getvalue();
+
+            if Tracemalloc:
+                _, Peak = tracemalloc.get_traced_memory();
+                tracemalloc.stop();
+                self.__Captured['Peak_memory'] = Peak;
+
+    # ? Captured cProfile and memory peak.
+    def captured(self) -> dict:
+        """
+        Return what capture() recorded.
+
+        Returns
+        -------
+        dict
+            'Cprofile' (text report) and 'Peak_memory' (bytes), when captured.
+        """
+
+        return dict(self.__Captured)
+
+    # ? Per-image timings.
+    def rows(self) -> pd.DataFrame:
+        """
+        Return the per-image timings.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per image with the File column and one column per stage, in seconds.
+        """
+
+        Extra = [];
+
+        for Row in self.__Rows:
+            for Name in Row:
+                if Name != 'File' and Name not in self.Image_stages and Name not in Extra:
+                    Extra.append(Name);
+
+        return pd.DataFrame(self.__Rows, columns = ['File', *self.Image_stages, *Extra]).fillna(0.0)
+
+    # ? Statistics of every stage.
+    def summary(self) -> pd.DataFrame:
+        """
+        Return the statistics of every stage.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per stage with the columns Stage, Count, Total, Mean, P50, P95, Max (seconds) and Share (% of the total).
+        """
+
+        Rows = [];
+
+        for Name in self.Run_stages:
+            if Name in self.__Run:
+                Seconds = self.__Run[Name];
+                Rows.append({'Stage': Name, 'Count': 1, 'Total': Seconds, 'Mean': Seconds, 'P50': Seconds, 'P95': Seconds, 'Max': Seconds});
+
+        Timings = self.rows();
+
+        for Name in Timings.columns[1:]:
+            Values = Timings[Name].to_numpy(dtype = np.float64);
+
+            if len(Values) == 0:
+                continue;
+
+            Rows.append({
+                'Stage': Name,
+                'Count': len(Values),
+                'Total': Values.sum(),
+                'Mean': Values.mean(),
+                'P50': np.percentile(Values, 50),
+                'P95': np.percentile(Values, 95),
+                'Max': Values.max(),
+            });
+
+        Summary = pd.DataFrame(Rows, columns = ['Stage', 'Count', 'Total', 'Mean', 'P50', 'P95', 'Max']);
+        Grand_total = Summary['Total'].sum();
+        Summary['Share'] = 100 * Summary['Total'] / Grand_total if Grand_total > 0 else 0.0;
+
+        return Summary
+
+    # ? Summary as a table.
+    def table(self) -> str:
+        """
+        Return the summary as a text table.
+
+        Returns
+        -------
+        str
+            The table.
+        """
+
+        return f"{self.Name} stages\n" + self.summary().to_string(index = False, float_format = lambda Value: f"{Value:.6f}")
+
+    # ? Write the timings.
+    def dump(self, Path: str) -> None:
+        """
+        Write the timings of the run, to compare runs across machines and storage backends.
+
+        A '.csv' path receives the per-image timings. Any other path receives a JSON
+        document with the machine, the summary, the per-image timings and the captures.
+
+        Parameters
+        ----------
+        Path : str
+            The output file.
+        """
+
+        if Path.lower().endswith('.csv'):
+            self.rows().to_csv(Path, index = False);
+            return;
+
+        Document = {
+            'Name': self.Name,
+            'Machine': {'Node': platform.node(), 'Platform': platform.platform(), 'Python': platform.python_version()},
+            'Summary': self.summary().to_dict(orient = 'records'),
+            'Images': self.rows().to_dict(orient = 'records'),
+            'Captured': self.__Captured,
+        };
+
+        with open(Path, 'w') as File:
+            json.dump(Document, File, indent = 2, default = float);
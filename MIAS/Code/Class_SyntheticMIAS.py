@@ -0,0 +1,155 @@
+# ? Class for generating synthetic Mini-MIAS datasets.
+import os
+import cv2
+import numpy as np
+import pandas as pd
+
+from Class_ImageWriter import ImageWriter
+
+class SyntheticMIAS:
+    """
+    A class used to generate a synthetic dataset with the layout of Mini-MIAS.
+
+    Every image is a square PGM with a noisy breast-like silhouette on the left side
+    and one bright blob per lesion. The annotations are written into an 'Info.csv'
+    with the columns of the original (REFNUM, BG, CLASS, SEVERITY, X, Y, RADIUS),
+    one row per lesion and the Y axis starting at the bottom, so the files can be fed
+    to ChangeFormat and CropImages like the real dataset. The generator is seeded and
+    always produces the same dataset for the same settings.
+
+    Methods
+    -------
+    generate()
+        Writes the images and the Info.csv, returns the annotations.
+
+    Example
+    -------
+    Generator = SyntheticMIAS(folder = 'Synthetic', count = 200, size = 1024, depth = 8, lesions = 2);
+    Dataframe = Generator.generate();
+    """
+
+    Backgrounds = ('F', 'G', 'D');
+    Classes = ('CALC', 'CIRC', 'SPIC', 'MISC', 'ARCH', 'ASYM');
+    Columns = ('REFNUM', 'BG', 'CLASS', 'SEVERITY', 'X', 'Y', 'RADIUS');
+
+    # * Initializing (Constructor)
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters
+        ----------
+        folder : str
+            Folder receiving the images and the Info.csv.
+        count : int
+            Number of images (default is 322, the size of Mini-MIAS).
+        size : int
+            Height and width of the images in pixels (default is 1024).
+        depth : int
+            Bits per pixel, 8 or 16 (default is 8).
+        lesions : int
+            Maximum number of lesions per abnormal image (default is 1).
+        normal_fraction : float
+            Fraction of images without lesions (default is 0.6, close to Mini-MIAS).
+        seed : int
+            Seed of the generator (default is 0).
+
+        Raises
+        ------
+        ValueError
+            If the depth is not 8 or 16.
+        """
+
+        self.Folder: str = kwargs.get('folder', None);
+        self.Count: int = kwargs.get('count', 322);
+        self.Size: int = kwargs.get('size', 1024);
+        self.Depth: int = kwargs.get('depth', 8);
+        self.Lesions: int = kwargs.get('lesions', 1);
+        self.Normal_fraction: float = kwargs.get('normal_fraction', 0.6);
+        self.Seed: int = kwargs.get('seed', 0);
+
+        if self.Depth not in (8, 16):
+            raise ValueError(f"Depth {self.Depth} incompatible, it must be: (8, 16)");
+
+    # * Class description
+    def __str__(self) -> str:
+        """
+        Return a string description of the SyntheticMIAS object.
+
+        Returns:
+        ----------
+        str
+            A string description of the SyntheticMIAS object.
+        """
+
+        return f'''{self.__class__.__name__}:{self.Count} images of {self.Size}x{self.Size}, {self.Depth} bits.''';
+
+    # * Background of every image: breast silhouette, intensity falloff and noise
+    def __background(self, Rng: np.random.Generator, Grid: tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+
+        Y, X = Grid;
+
+        # * Half ellipse attached to the left border, as in the left-oriented Mini-MIAS views
+        Radius_x = self.Size * Rng.uniform(0.45, 0.7);
+        Radius_y = self.Size * Rng.uniform(0.35, 0.5);
+        Center_y = self.Size * Rng.uniform(0.4, 0.6);
+
+        Distance = (X / Radius_x) ** 2 + ((Y - Center_y) / Radius_y) ** 2;
+        Tissue = np.clip(1.0 - Distance, 0.0, 1.0) ** 0.5;
+
+        return 0.6 * Tissue + Rng.normal(0.0, 0.03, size = Tissue.shape).astype(np.float32)
+
+    # ? Generate the dataset.
+    def generate(self) -> pd.DataFrame:
+        """
+        Write the images and the Info.csv into the folder.
+
+        Returns
+        -------
+        pd.DataFrame
+            The annotations written into the Info.csv.
+
+        Raises
+        ------
+        ValueError
+            If the folder is None.
+        """
+
+        if self.Folder is None:
+            raise ValueError("Folder does not exist");
+
+        os.makedirs(self.Folder, exist_ok = True);
+
+        Rng = np.random.default_rng(self.Seed);
+        Grid = np.mgrid[0:self.Size, 0:self.Size].astype(np.float32);
+        Maximum = (1 << self.Depth) - 1;
+        Dtype = np.uint8 if self.Depth == 8 else np.uint16;
+
+        Rows = [];
+
+        for i in range(self.Count):
+            Refnum = f"mdb{i + 1:03d}";
+            Background = self.Backgrounds[Rng.integers(len(self.Backgrounds))];
+
+            Image = self.__background(Rng, Grid);
+
+            if Rng.random() < self.Normal_fraction:
+                Rows.append((Refnum, Background, 'NORM', None, None, None, None));
+            else:
+                Class = self.Classes[Rng.integers(len(self.Classes))];
+
+                for _ in range(Rng.integers(1, self.Lesions + 1)):
+                    Radius = int(Rng.integers(8, self.Size // 8));
+                    X = int(Rng.integers(Radius, self.Size // 2));
+                    Y = int(Rng.integers(Radius, self.Size - Radius));
+
+                    # * Bright gaussian blob, Info.csv stores Y from the bottom
+                    Image += 0.35 * np.exp(-((Grid[1] - X) ** 2 + (Grid[0] - (self.Size - Y)) ** 2) / (2 * (Radius / 2) ** 2));
+
+                    Rows.append((Refnum, Background, Class, 'B' if Rng.random() < 0.55 else 'M', float(X), float(Y), float(Radius)));
+
+            Image = (np.clip(Image, 0.0, 1.0) * Maximum).astype(Dtype);
+            ImageWriter.write(Image, [os.path.join(self.Folder, f"{Refnum}.pgm")], 'encode');
+
+        Dataframe = pd.DataFrame(Rows, columns = list(self.Columns));
+        Dataframe.to_csv(os.path.join(self.Folder, 'Info.csv'), index = False);
+
+        return Dataframe
@@ -0,0 +1,326 @@
+# ? Class for segmenting the breast tissue of a mammogram.
+import os
+import cv2
+import hashlib
+import threading
+import numpy as np
+
+from collections import OrderedDict
+from typing import Optional
+
+class TissueMask:
+    """
+    A class used to segment the breast tissue of a mammogram at a low resolution.
+
+    The image is downsampled so its longest side is 'Side' pixels, blurred and
+    thresholded (Otsu unless a threshold is given). An opening removes the film
+    labels and small artifacts, a closing fills the holes, and only the largest
+    connected component is kept. Masks are cached in memory by file path, size
+    and modification time, and optionally as PNG files in a cache folder, so each
+    image is segmented once.
+
+    Boxes and centers are always given in full-resolution image coordinates
+    (Y0, Y1, X0, X1 with the origin at the top-left corner).
+
+    Methods
+    -------
+    compute(Image)
+        Returns the low-resolution mask of a decoded image.
+    get(Image, Path_file)
+        Returns the cached mask of an image file, computing it when needed.
+    full(Mask, Shape)
+        Returns the mask upsampled to the image size.
+    fraction(Mask, Box, Shape)
+        Returns the tissue fraction of a box.
+    recenter(Mask, Box, Shape, Min_fraction)
+        Returns the nearest box of the same size with enough tissue.
+    center(Mask, Shape)
+        Returns the point deepest inside the tissue.
+
+    Example
+    -------
+    Tissue = TissueMask(Side = 256, cache_folder = 'Masks');
+    Mask = Tissue.get(Image, 'mdb001.pgm');
+    if Tissue.fraction(Mask, Box, Image.shape) < 0.5:
+        Box = Tissue.recenter(Mask, Box, Image.shape, 0.5);
+    """
+
+    # * Masks computed in this process: key -> mask, least recently used first
+    _Cache: OrderedDict = OrderedDict();
+    _Cache_lock = threading.Lock();
+    _Cache_size = 512;
+
+    # * Initializing (Constructor)
+    def __init__(self, Side: int = 256, Threshold: Optional[int] = None, Kernel: int = 5, **kwargs) -> None:
+        """
+        Parameters
+        ----------
+        Side : int
+            Longest side of the low-resolution mask (default is 256).
+        Threshold : int, optional
+            Intensity threshold on the 8-bit downsampled image (default is None, Otsu).
+        Kernel : int
+            Side of the elliptic kernel of the morphology, in low-resolution pixels (default is 5).
+        cache_folder : str
+            Folder keeping the masks as PNG files between runs (default is None, memory only).
+        """
+
+        self.Side = Side;
+        self.Threshold = Threshold;
+        self.Kernel = Kernel;
+        self.Cache_folder: str = kwargs.get('cache_folder', None);
+
+        if self.Cache_folder is not None:
+            os.makedirs(self.Cache_folder, exist_ok = True);
+
+    # * Class description
+    def __str__(self) -> str:
+        """
+        Return a string description of the TissueMask object.
+
+        Returns:
+        ----------
+        str
+            A string description of the TissueMask object.
+        """
+
+        return f'''{self.__class__.__name__}:Tissue masks of {self.Side} pixels, {'Otsu' if self.Threshold is None else self.Threshold} threshold.''';
+
+    # ? Low-resolution mask of an image.
+    def compute(self, Image: np.ndarray) -> np.ndarray:
+        """
+        Segment the tissue of a decoded image.
+
+        Parameters
+        ----------
+        Image : np.ndarray
+            The decoded image, grayscale or BGR, 8 or 16 bits.
+
+        Returns
+        -------
+        np.ndarray
+            A uint8 mask, 1 on tissue, whose longest side is 'Side' (or the image size if smaller).
+        """
+
+        Gray = Image if Image.ndim == 2 else cv2.cvtColor(Image, cv2.COLOR_BGR2GRAY);
+
+        Scale = min(1.0, self.Side / max(Gray.shape[:2]));
+
+        if Scale < 1.0:
+            Gray = cv2.resize(Gray, (max(1, round(Gray.shape[1] * Scale)), max(1, round(Gray.shape[0] * Scale))), interpolation = cv2.INTER_AREA);
+
+        # * Thresholds work on 8 bits
+        if Gray.dtype != np.uint8:
+            Gray = cv2.normalize(Gray, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8);
+
+        Gray = cv2.GaussianBlur(Gray, (5, 5), 0);
+
+        if self.Threshold is None:
+            _, Mask = cv2.threshold(Gray, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU);
+        else:
+            _, Mask = cv2.threshold(Gray, self.Threshold, 1, cv2.THRESH_BINARY);
+
+        # * Opening removes labels and specks, closing fills the holes
+        Kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (self.Kernel, self.Kernel));
+        Mask = cv2.morphologyEx(Mask, cv2.MORPH_OPEN, Kernel);
+        Mask = cv2.morphologyEx(Mask, cv2.MORPH_CLOSE, Kernel);
+
+        # * The breast is the largest connected component
+        Count, Labels, Stats, _ = cv2.connectedComponentsWithStats(Mask, connectivity = 8);
+
+        if Count > 2:
+            Largest = 1 + int(np.argmax(Stats[1:, cv2.CC_STAT_AREA]));
+            Mask = (Labels == Largest).astype(np.uint8);
+
+        return Mask
+
+    # ? Cached mask of an image file.
+    def get(self, Image: np.ndarray, Path_file: Optional[str] = None) -> np.ndarray:
+        """
+        Return the mask of an image, from the memory or folder cache when the file did not change.
+
+        Parameters
+        ----------
+        Image : np.ndarray
+            The decoded image.
+        Path_file : str, optional
+            The file of the image, identifies it in the caches (default is None, no cache).
+
+        Returns
+        -------
+        np.ndarray
+            The low-resolution mask (see compute).
+        """
+
+        if Path_file is None:
+            return self.compute(Image)
+
+        Stat = os.stat(Path_file);
+        Key = (os.path.abspath(Path_file), Stat.st_size, Stat.st_mtime_ns, Image.shape, self.Side, self.Threshold, self.Kernel);
+
+        with TissueMask._Cache_lock:
+            Mask = TissueMask._Cache.get(Key);
+
+            if Mask is not None:
+                TissueMask._Cache.move_to_end(Key);
+                return Mask
+
+        Cache_file = None;
+
+        # * Mask files are named by the key, images of the same name in other folders never share them
+        if self.Cache_folder is not None:
+            Name, _ = os.path.splitext(os.path.basename(Path_file));
+            Cache_file = os.path.join(self.Cache_folder, f"{Name}_{hashlib.sha1(repr(Key).encode()).hexdigest()}.png");
+
+            if os.path.isfile(Cache_file):
+                Mask = cv2.imread(Cache_file, cv2.IMREAD_GRAYSCALE);
+
+        if Mask is None:
+            Mask = self.compute(Image);
+
+            if Cache_file is not None:
+                cv2.imwrite(Cache_file, Mask);
+
+        with TissueMask._Cache_lock:
+            TissueMask._Cache[Key] = Mask;
+
+            while len(TissueMask._Cache) > TissueMask._Cache_size:
+                TissueMask._Cache.popitem(last = False);
+
+        return Mask
+
+    # ? Mask at the image size.
+    @staticmethod
+    def full(Mask: np.ndarray, Shape: tuple) -> np.ndarray:
+        """
+        Return the mask upsampled to the image size.
+
+        Parameters
+        ----------
+        Mask : np.ndarray
+            The low-resolution mask.
+        Shape : tuple
+            The shape of the image.
+
+        Returns
+        -------
+        np.ndarray
+            A uint8 mask of the image height and width.
+        """
+
+        return cv2.resize(Mask, (Shape[1], Shape[0]), interpolation = cv2.INTER_NEAREST)
+
+    # * Low-resolution box of a full-resolution box
+    @staticmethod
+    def __scale_box(Mask: np.ndarray, Box: tuple[int, int, int, int], Shape: tuple) -> tuple[int, int, int, int]:
+
+        Scale_y = Mask.shape[0] / Shape[0];
+        Scale_x = Mask.shape[1] / Shape[1];
+        Y0, Y1, X0, X1 = Box;
+
+        Y0, X0 = int(Y0 * Scale_y), int(X0 * Scale_x);
+
+        return Y0, max(int(np.ceil(Y1 * Scale_y)), Y0 + 1), X0, max(int(np.ceil(X1 * Scale_x)), X0 + 1)
+
+    # ? Tissue fraction of a box.
+    @staticmethod
+    def fraction(Mask: np.ndarray, Box: tuple[int, int, int, int], Shape: tuple) -> float:
+        """
+        Return the fraction of a box covered by tissue.
+
+        Parameters
+        ----------
+        Mask : np.ndarray
+            The low-resolution mask.
+        Box : tuple[int, int, int, int]
+            The box (Y0, Y1, X0, X1) in the image.
+        Shape : tuple
+            The shape of the image.
+
+        Returns
+        -------
+        float
+            The tissue fraction, 0.0 for an empty box.
+        """
+
+        Y0, Y1, X0, X1 = TissueMask.__scale_box(Mask, Box, Shape);
+        Window = Mask[Y0:Y1, X0:X1];
+
+        return float(Window.mean()) if Window.size > 0 else 0.0
+
+    # ? Move a box onto the tissue.
+    @staticmethod
+    def recenter(Mask: np.ndarray, Box: tuple[int, int, int, int], Shape: tuple, Min_fraction: float) -> Optional[tuple[int, int, int, int]]:
+        """
+        Return the box of the same size closest to the given one whose tissue fraction reaches Min_fraction.
+
+        Every position is scored at once on the low-resolution mask through its integral image.
+
+        Parameters
+        ----------
+        Mask : np.ndarray
+            The low-resolution mask.
+        Box : tuple[int, int, int, int]
+            The box (Y0, Y1, X0, X1) in the image.
+        Shape : tuple
+            The shape of the image.
+        Min_fraction : float
+            The minimum tissue fraction.
+
+        Returns
+        -------
+        tuple[int, int, int, int], optional
+            The new box in the image, None if no position has enough tissue.
+        """
+
+        Y0, Y1, X0, X1 = TissueMask.__scale_box(Mask, Box, Shape);
+        Height, Width = min(Y1 - Y0, Mask.shape[0]), min(X1 - X0, Mask.shape[1]);
+
+        # * Tissue fraction of the window at every top-left corner
+        Integral = cv2.integral(Mask).astype(np.int64);
+        Fractions = (Integral[Height:, Width:] - Integral[:-Height, Width:] - Integral[Height:, :-Width] + Integral[:-Height, :-Width]) / (Height * Width);
+
+        Y, X = np.nonzero(Fractions >= Min_fraction);
+
+        if len(Y) == 0:
+            return None
+
+        Nearest = np.argmin((Y - Y0) ** 2 + (X - X0) ** 2);
+
+        # * Back to the image, keeping the size of the original box
+        Scale_y = Shape[0] / Mask.shape[0];
+        Scale_x = Shape[1] / Mask.shape[1];
+        Box_height, Box_width = Box[1] - Box[0], Box[3] - Box[2];
+
+        New_y0 = min(max(int(round(Y[Nearest] * Scale_y)), 0), max(Shape[0] - Box_height, 0));
+        New_x0 = min(max(int(round(X[Nearest] * Scale_x)), 0), max(Shape[1] - Box_width, 0));
+
+        return New_y0, New_y0 + Box_height, New_x0, New_x0 + Box_width
+
+    # ? Center of the tissue.
+    @staticmethod
+    def center(Mask: np.ndarray, Shape: tuple) -> Optional[tuple[int, int]]:
+        """
+        Return the point deepest inside the tissue, the farthest from the background.
+
+        Parameters
+        ----------
+        Mask : np.ndarray
+            The low-resolution mask.
+        Shape : tuple
+            The shape of the image.
+
+        Returns
+        -------
+        tuple[int, int], optional
+            The Y and X of the point in the image, None if the mask is empty.
+        """
+
+        if not Mask.any():
+            return None
+
+        # * The image border counts as background, or the breast side would be the deepest point
+        Distance = cv2.distanceTransform(cv2.copyMakeBorder(Mask, 1, 1, 1, 1, cv2.BORDER_CONSTANT, value = 0), cv2.DIST_L2, 5)[1:-1, 1:-1];
+        Y, X = np.unravel_index(int(np.argmax(Distance)), Distance.shape);
+
+        return int((Y + 0.5) * Shape[0] / Mask.shape[0]), int((X + 0.5) * Shape[1] / Mask.shape[1])
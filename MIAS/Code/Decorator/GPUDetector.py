@@ -1,8 +1,9 @@
 import logging
 from functools import wraps
-import tensorflow as tf
 
 import os
+import platform
+import threading
 
 from typing import Optional
 
@@ -12,6 +13,13 @@ class GPUDetector(object):
     logger = logging.getLogger("GPU");
     logger.setLevel(logging.DEBUG);
 
+    # * Device probe, computed once per process. The lock also guards the handlers.
+    _Probe: Optional[dict] = None;
+    _Probe_lock = threading.Lock();
+
+    # * File handlers already attached to the logger, by log file path.
+    _Handlers: dict = {};
+
     """
     A class for detecting the availability of a GPU for a function using the GPUDetector.detect_GPU method.
 
@@ -51,8 +59,92 @@ class GPUDetector(object):
     The decorator can be applied to any function that uses TensorFlow operations. It checks the presence
     of a GPU and prints the status accordingly. If a GPU is found, the function is executed on the GPU.
 
+    TensorFlow is imported lazily, on the first decorated call, and the device probe is cached for the
+    lifetime of the process. Without TensorFlow installed a CPU-only probe is used instead, so importing
+    this module never pays the TensorFlow startup cost.
+
     """
 
+    # ? Probe the devices once.
+    @staticmethod
+    def probe() -> dict:
+        """
+        Return the devices of the process, probing them on the first call only.
+
+        Returns
+        -------
+        dict
+            Dictionary with the keys 'TensorFlow' (version or None), 'Physical devices', 'CUDA',
+            'GPU name' and 'GPU available' (list of GPU devices).
+        """
+
+        if GPUDetector._Probe is not None:
+            return GPUDetector._Probe
+
+        with GPUDetector._Probe_lock:
+
+            if GPUDetector._Probe is None:
+
+                try:
+                    import tensorflow as tf
+
+                    Probe = {
+                        'TensorFlow': tf.__version__,
+                        'Physical devices': tf.config.list_physical_devices(),
+                        'CUDA': tf.test.is_built_with_cuda(),
+                        'GPU name': tf.test.gpu_device_name(),
+                        'GPU available': tf.config.list_physical_devices("GPU"),
+                    };
+
+                except ImportError:
+
+                    # * CPU-only fallback, no GPU can be used without TensorFlow.
+                    Probe = {
+                        'TensorFlow': None,
+                        'Physical devices': [f"CPU:{platform.processor() or platform.machine()} x{os.cpu_count()}"],
+                        'CUDA': False,
+                        'GPU name': '',
+                        'GPU available': [],
+                    };
+
+                GPUDetector.logger.info("Detecting GPU availability...");
+                GPUDetector.logger.info("TensorFlow version: {}".format(Probe['TensorFlow']));
+                GPUDetector.logger.info("Physical devices: {}".format(Probe['Physical devices']));
+                GPUDetector.logger.info("GPU support: {}".format(Probe['CUDA']));
+
+                GPUDetector._Probe = Probe;
+
+        return GPUDetector._Probe
+
+    # ? Attach a file handler once.
+    @staticmethod
+    def add_handler(log_file_path: str) -> None:
+        """
+        Attach a file handler for the log file to the GPU logger, unless it is already attached.
+
+        Parameters
+        ----------
+        log_file_path : str
+            The path of the log file.
+        """
+
+        with GPUDetector._Probe_lock:
+
+            if log_file_path in GPUDetector._Handlers:
+                return;
+
+            File_handler = logging.FileHandler(log_file_path);
+            File_handler.setLevel(logging.INFO);
+
+            # * Configure the logger with a format and set the logging level to DEBUG.
+            log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s';
+            formatter = logging.Formatter(log_format);
+            File_handler.setFormatter(formatter);
+
+            # * Add the file handler to the GPU class logger.
+            GPUDetector.logger.addHandler(File_handler);
+            GPUDetector._Handlers[log_file_path] = File_handler;
+
     @staticmethod
     def detect_GPU(Folder: Optional[str] = 'Data\logs', Class_name=None):
         """
@@ -88,58 +180,26 @@ class GPUDetector(object):
                     The return value of the decorated function.
                 """
 
-                Asterisk = 60;
-
                 Log_app_name = f"{Class_name}_{func.__name__}_{__class__.__name__}.log";
 
-                # * Create a logging handler that writes to a file.
-                if(Folder is not None):
-                    log_file_path = os.path.join(Folder, Log_app_name);
-                
-                File_handler = logging.FileHandler(log_file_path);
-                File_handler.setLevel(logging.INFO);
-
-                # * Configure the logger with a format and set the logging level to DEBUG.
-                log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s';
-                formatter = logging.Formatter(log_format);
-                File_handler.setFormatter(formatter);
-                
-                # * Add the file handler to the Timer class logger.
-                GPUDetector.logger.addHandler(File_handler);
-
-                GPUDetector.logger.info("Detecting GPU availability...");
-
-                # * Print TensorFlow version.
-                GPUDetector.logger.info("TensorFlow version: {}".format(tf.__version__));
-
-                # * List physical devices.
-                GPUDetector.logger.info("Physical devices: {}".format(tf.config.list_physical_devices()));
-
-                # * Check GPU support.
-                GPUDetector.logger.info("GPU support: {}".format(tf.test.is_built_with_cuda()));
-
-                # * Get GPU device name.
-                gpu_name = tf.test.gpu_device_name();
+                # * Create a logging handler that writes to a file, once per log file.
+                log_file_path = os.path.join(Folder, Log_app_name) if Folder is not None else Log_app_name;
+                GPUDetector.add_handler(log_file_path);
 
-                # * Check GPU availability.
-                gpu_available = tf.config.list_physical_devices("GPU");
+                # * TensorFlow is imported and the devices are listed on the first call only.
+                Probe = GPUDetector.probe();
 
-                GPUDetector.logger.info("\n");
-                GPUDetector.logger.info("GPU availability: {}".format(gpu_available));
-                GPUDetector.logger.info("\n");
+                GPUDetector.logger.info("GPU availability: {}".format(Probe['GPU available']));
 
-                if not gpu_available:
+                if not Probe['GPU available']:
                     GPUDetector.logger.info("GPU device not found.");
-                elif "GPU" not in gpu_name:
+                elif "GPU" not in Probe['GPU name']:
                     GPUDetector.logger.info("GPU device not found.");
                 else:
-                    GPUDetector.logger.info("Found GPU at: {}".format(gpu_name));
+                    GPUDetector.logger.info("Found GPU at: {}".format(Probe['GPU name']));
 
                 # *Execute the decorated function.
                 Result = func(*args, **kwargs);
-                
-                # * Close the logging handler.
-                File_handler.close();
 
                 return Result
 
@@ -1,9 +1,13 @@
 import logging
 import time
+import math
 import os
+import atexit
+import threading
 from functools import wraps
+from contextlib import contextmanager
 
-from typing import Optional, Any
+from typing import Optional, Any, Iterator
 
 class Timer(object):
 
@@ -11,6 +15,18 @@ class Timer(object):
     logger = logging.getLogger("Timer");
     logger.setLevel(logging.DEBUG);
 
+    # * File handlers already attached to the logger, by log file path.
+    _Handlers: dict = {};
+
+    # * Fixed-size summary of every span, by span name: count, total and max in nanoseconds,
+    # * and a histogram of log2 buckets (Resolution buckets per power of two) for the percentiles.
+    _Stats: dict = {};
+    Resolution = 8;
+    _Lock = threading.Lock();
+
+    # * Stack of open spans of each thread.
+    _Local = threading.local();
+
     """
     A class for timing the execution of functions and logging debugging prints with customizable log file names.
 
@@ -21,7 +37,7 @@ class Timer(object):
     1. Timing a Function and Logging:
     
     # Decorate a function using the @Timer.timer decorator to measure execution time and log to a file.
-    >>> @Timer.timer(folder="/path/to/logs")
+    >>> @Timer.timer(Folder="/path/to/logs")
     ... def my_func(x, y):
     ...    return np.add(x, y)
 
@@ -33,7 +49,7 @@ class Timer(object):
     
     You can provide a custom log folder and class name when using the decorator:
 
-    >>> @Timer.timer(folder="custom_logs", Class_name="MyClass")
+    >>> @Timer.timer(Folder="custom_logs", Class_name="MyClass")
     ... def another_func(a, b):
     ...     return a * b
 
@@ -41,6 +57,20 @@ class Timer(object):
 
     The decorator generates log files with names like "MyClass_another_func_Timer.log" in the "custom_logs" folder.
 
+    3. Sections and statistics:
+
+    >>> @Timer.timer(Folder="logs", Class_name="CropImages")
+    ... def crop(path):
+    ...     with Timer.section("decode"):
+    ...         image = cv2.imread(path)
+    ...     with Timer.section("encode"):
+    ...         data = cv2.imencode(".png", image)
+
+    Sections opened inside a span are nested under it ("CropImages_crop/decode"). Every span is
+    timed with time.perf_counter_ns and aggregated, so Timer.report() returns the count, total,
+    mean, p50, p95 and max of each one, and Timer.dump_at_exit() writes that report when the
+    process ends.
+
     Notes:
     -----
     This class decorator uses the `functools.wraps` decorator to preserve the metadata of the original function, such as the function name, docstring, and parameter information.
@@ -53,6 +83,16 @@ class Timer(object):
     ----------
     timer(Folder: Optional[str] = 'Data\logs', Class_name: Optional[str] = None) -> Any
         A decorator function that measures the execution time of a function and logs debugging prints to a specified folder or the current working directory.
+    section(Name: str)
+        A context manager that times a section of code as a nested span.
+    statistics() -> dict
+        The aggregated statistics of every span.
+    report() -> str
+        The statistics as a text table.
+    dump_at_exit(Path: Optional[str] = None)
+        Writes the report when the process ends.
+    reset()
+        Forgets every recorded span.
 
     Parameters:
     ----------
@@ -68,6 +108,186 @@ class Timer(object):
         A function that executes the input function and prints the execution time.
     """
     
+    # ? Attach a file handler once.
+    @staticmethod
+    def add_handler(log_file_path: str) -> None:
+        """
+        Attach a file handler for the log file to the Timer logger, unless it is already attached.
+
+        Parameters
+        ----------
+        log_file_path : str
+            The path of the log file.
+        """
+
+        with Timer._Lock:
+
+            if log_file_path in Timer._Handlers:
+                return;
+
+            File_handler = logging.FileHandler(log_file_path);
+            File_handler.setLevel(logging.DEBUG);
+
+            # * Configure the logger with a format and set the logging level to DEBUG.
+            log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s';
+            formatter = logging.Formatter(log_format);
+            File_handler.setFormatter(formatter);
+
+            # * Add the file handler to the Timer class logger.
+            Timer.logger.addHandler(File_handler);
+            Timer._Handlers[log_file_path] = File_handler;
+
+    # ? Time a section of code.
+    @staticmethod
+    @contextmanager
+    def section(Name: str) -> Iterator[dict]:
+        """
+        Context manager that times a section of code as a span nested in the open spans of the thread.
+
+        Parameters
+        ----------
+        Name : str
+            The name of the section.
+
+        Yields
+        ------
+        dict
+            The span, its 'Name' is the full nested name and its 'Duration_ns' is set when the section ends.
+        """
+
+        Stack = getattr(Timer._Local, 'Stack', None);
+
+        if Stack is None:
+            Stack = Timer._Local.Stack = [];
+
+        Stack.append(Name);
+        Span = {'Name': '/'.join(Stack), 'Duration_ns': 0};
+
+        Start_time = time.perf_counter_ns();
+
+        try:
+            yield Span;
+        finally:
+            Span['Duration_ns'] = time.perf_counter_ns() - Start_time;
+            Stack.pop();
+
+            Duration = Span['Duration_ns'];
+            Bucket = int(math.log2(Duration) * Timer.Resolution) if Duration > 0 else -1;
+
+            with Timer._Lock:
+                Stats = Timer._Stats.get(Span['Name']);
+
+                if Stats is None:
+                    Stats = Timer._Stats[Span['Name']] = {'Count': 0, 'Total': 0, 'Max': 0, 'Buckets': {}};
+
+                Stats['Count'] += 1;
+                Stats['Total'] += Duration;
+                Stats['Max'] = max(Stats['Max'], Duration);
+                Stats['Buckets'][Bucket] = Stats['Buckets'].get(Bucket, 0) + 1;
+
+    # ? Aggregated statistics.
+    @staticmethod
+    def statistics() -> dict:
+        """
+        Return the aggregated statistics of every span.
+
+        The percentiles are read from the log2 histogram of the span, within about 9% of the
+        exact value, and never above the max.
+
+        Returns
+        -------
+        dict
+            Span name -> dictionary with 'Count' and the 'Total', 'Mean', 'P50', 'P95' and 'Max' durations in seconds.
+        """
+
+        with Timer._Lock:
+            Snapshot = {Name: dict(Stats, Buckets = sorted(Stats['Buckets'].items())) for Name, Stats in Timer._Stats.items()};
+
+        Statistics = {};
+
+        for Name, Stats in Snapshot.items():
+            Count = Stats['Count'];
+
+            # * Nearest-rank percentiles, the middle of the bucket holding the rank
+            def Percentile(Q: int) -> float:
+                Rank = max(1, -(-Q * Count // 100));
+                Seen = 0;
+
+                for Bucket, Bucket_count in Stats['Buckets']:
+                    Seen += Bucket_count;
+
+                    if Seen >= Rank:
+                        return min(2 ** ((Bucket + 0.5) / Timer.Resolution), Stats['Max']) if Bucket >= 0 else 0
+
+                return Stats['Max']
+
+            Statistics[Name] = {
+                'Count': Count,
+                'Total': Stats['Total'] / 1e9,
+                'Mean': Stats['Total'] / Count / 1e9,
+                'P50': Percentile(50) / 1e9,
+                'P95': Percentile(95) / 1e9,
+                'Max': Stats['Max'] / 1e9,
+            };
+
+        return Statistics
+
+    # ? Statistics as a table.
+    @staticmethod
+    def report() -> str:
+        """
+        Return the aggregated statistics of every span as a text table, slowest total first.
+
+        Returns
+        -------
+        str
+            The report.
+        """
+
+        Statistics = Timer.statistics();
+
+        Width = max([len(Name) for Name in Statistics] + [4]);
+        Lines = [f"{'Span':<{Width}} {'Count':>8} {'Total s':>12} {'Mean s':>12} {'P50 s':>12} {'P95 s':>12} {'Max s':>12}"];
+
+        for Name, Values in sorted(Statistics.items(), key = lambda Item: -Item[1]['Total']):
+            Lines.append(f"{Name:<{Width}} {Values['Count']:>8} {Values['Total']:>12.6f} {Values['Mean']:>12.6f} {Values['P50']:>12.6f} {Values['P95']:>12.6f} {Values['Max']:>12.6f}");
+
+        return "\n".join(Lines)
+
+    # ? Write the report at exit.
+    @staticmethod
+    def dump_at_exit(Path: Optional[str] = None) -> None:
+        """
+        Write the report when the process ends.
+
+        Parameters
+        ----------
+        Path : str, optional
+            The file receiving the report (default is None, the report is printed).
+        """
+
+        def Dump():
+            if not Timer._Stats:
+                return;
+
+            if Path is None:
+                print(Timer.report());
+            else:
+                with open(Path, 'w') as File:
+                    File.write(Timer.report() + "\n");
+
+        atexit.register(Dump);
+
+    # ? Forget the recorded durations.
+    @staticmethod
+    def reset() -> None:
+        """
+        Forget every recorded span.
+        """
+
+        with Timer._Lock:
+            Timer._Stats.clear();
+
     @staticmethod  
     def timer(Folder: Optional[str] = 'Data\logs', Class_name=None) -> Any:
         """
@@ -77,7 +297,7 @@ class Timer(object):
         -----------
         func : function
             The function to be timed.
-        folder : str, optional
+        Folder : str, optional
             The folder where the log file should be saved.
 
         Returns:
@@ -108,37 +328,25 @@ class Timer(object):
 
                 Log_app_name = f"{Class_name}_{func.__name__}_{__class__.__name__}.log";
 
-                # * Create a logging handler that writes to a file.
-                if(Folder is not None):
-                    log_file_path = os.path.join(Folder, Log_app_name);
+                # * Create a logging handler that writes to a file, once per log file.
+                log_file_path = os.path.join(Folder, Log_app_name) if Folder is not None else Log_app_name;
+                Timer.add_handler(log_file_path);
 
-                File_handler = logging.FileHandler(log_file_path);
-                File_handler.setLevel(logging.DEBUG);
+                Timer.logger.debug(f"Starting the execution of function {func.__name__}");
 
-                # * Configure the logger with a format and set the logging level to DEBUG.
-                log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s';
-                formatter = logging.Formatter(log_format);
-                File_handler.setFormatter(formatter);
-                
-                # * Add the file handler to the Timer class logger.
-                Timer.logger.addHandler(File_handler);
+                # * The function is a span, so sections inside it are nested under its name.
+                with Timer.section(f"{Class_name}_{func.__name__}") as Span:
+                    Result = func(*args, **kwargs);
 
-                Timer.logger.debug(f"Starting the execution of function {func.__name__}");
-                
-                Start_time = time.time();
-                Result = func(*args, **kwargs);
-                End_time = time.time();
+                Elapsed_time = Span['Duration_ns'] / 1e9;
 
                 print("\n");
                 print("*" * Asterisk);
-                print(f"Function {Class_name}_{func.__name__} executed in {End_time - Start_time:.4f} seconds.");
+                print(f"Function {Class_name}_{func.__name__} executed in {Elapsed_time:.4f} seconds.");
                 print("*" * Asterisk);
                 print("\n");
 
-                Timer.logger.debug(f"Function {func.__name__} executed in {End_time - Start_time:.4f} seconds.");
-
-                # * Close the logging handler.
-                File_handler.close();
+                Timer.logger.debug(f"Function {func.__name__} executed in {Elapsed_time:.4f} seconds.");
 
                 return Result
             return wrapper
@@ -1,7 +1,12 @@
-import pandas as pd
+import os
+import sys
 
-txt_file = r"C:\Users\Slaye\OneDrive\Escritorio\Code Tesis\Code\Tesis\Datasets\MIAS\Code\MIAS\Info.txt"
-df = pd.read_csv(txt_file)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from Class_AnnotationLoader import AnnotationLoader
+
+txt_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Info.txt')
+df = AnnotationLoader().load(txt_file)
 
 csv_file = 'output.csv'
-df.to_csv(csv_file, index=False)
\ No newline at end of file
+df.to_csv(csv_file, index=False)